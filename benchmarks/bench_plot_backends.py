@@ -0,0 +1,92 @@
+# BENCHMARK: plot_forecast latency, plotnine vs matplotlib backend
+#
+# Usage: python -m benchmarks.bench_plot_backends [facet counts...]
+
+import io
+import subprocess
+import sys
+import time
+
+from benchmarks.synthetic import make_forecast
+from my_pandas_extension.plot_forecast import (
+    plot_forecast,
+    prepare_forecast_data,
+)
+
+N_FACETS = [int(n) for n in sys.argv[1:]] or [4, 40, 400]
+FACET_NCOL = 4
+N_HISTORY = 60
+N_HORIZON = 12
+
+
+def render(prepped_df, backend: str) -> None:
+    """Builds the chart and renders it to an in-memory png."""
+    chart = plot_forecast(
+        prepped_df,
+        "id",
+        "date",
+        facet_ncol=FACET_NCOL,
+        figure_size=(16, max(8, len(prepped_df["id"].cat.categories) / 2)),
+        prepared=True,
+        backend=backend,
+    )
+
+    buffer = io.BytesIO()
+    if backend == "plotnine":
+        chart.save(
+            buffer, format="png", dpi=72, limitsize=False, verbose=False
+        )
+    else:
+        chart.savefig(buffer, format="png", dpi=72)
+
+
+def import_seconds(statement: str) -> float:
+    """Import time in a fresh interpreter, as a report kernel pays it."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            (
+                "import time; start = time.perf_counter(); "
+                f"{statement}; print(time.perf_counter() - start)"
+            ),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout)
+
+
+# 1.0 Import cost
+
+print(
+    "import plot_forecast      "
+    f"{import_seconds('import my_pandas_extension.plot_forecast'):6.2f}s"
+)
+print(
+    "  + plotnine, mizani      "
+    f"{import_seconds('import my_pandas_extension.plot_forecast, plotnine, mizani.formatters'):6.2f}s"
+)
+
+# 2.0 Build and render latency
+
+print(f"{'facets':>6} {'plotnine':>10} {'matplotlib':>11}")
+
+for n_facets in N_FACETS:
+    prepped_df = prepare_forecast_data(
+        make_forecast(n_facets, N_HISTORY, N_HORIZON, id_prefix="Category 2"),
+        "id",
+        "date",
+    )
+
+    seconds = {}
+    for backend in ["plotnine", "matplotlib"]:
+        start = time.perf_counter()
+        render(prepped_df, backend)
+        seconds[backend] = time.perf_counter() - start
+
+    print(
+        f"{n_facets:>6} {seconds['plotnine']:>9.2f}s "
+        f"{seconds['matplotlib']:>10.2f}s"
+    )
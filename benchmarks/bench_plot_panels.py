@@ -0,0 +1,77 @@
+# BENCHMARK: per-id forecast panels, one plot_forecast call per id vs
+# render_forecast_panels
+#
+# Usage: python -m benchmarks.bench_plot_panels [n_ids] [n_jobs]
+
+import sys
+import tempfile
+import time
+
+from path import Path
+
+from benchmarks.synthetic import make_forecast
+from my_pandas_extension.plot_forecast import (
+    plot_forecast,
+    prepare_forecast_data,
+    render_forecast_panels,
+)
+
+N_IDS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+N_JOBS = int(sys.argv[2]) if len(sys.argv) > 2 else -1
+N_HISTORY = 24
+N_HORIZON = 4
+
+
+def timed(label: str, render) -> None:
+    start = time.perf_counter()
+    n_panels = len(render())
+    seconds = time.perf_counter() - start
+    print(
+        f"{label:<28} {seconds:6.1f}s "
+        f"{seconds / n_panels * 1000:6.0f} ms/panel"
+    )
+
+
+forecast_df = make_forecast(
+    N_IDS, N_HISTORY, N_HORIZON, freq="QS", start="2020-01-01"
+)
+tmp_dir = Path(tempfile.mkdtemp())
+
+print(f"ids: {N_IDS:,}")
+
+# 1.0 Before: a full plot_forecast pipeline per id
+
+
+def plot_per_id():
+    file_paths = []
+    for i, (bikeshop, bikeshop_df) in enumerate(forecast_df.groupby("id")):
+        file_path = tmp_dir / "loop" / f"{i}.png"
+        file_path.parent.makedirs_p()
+        plot_forecast(
+            bikeshop_df, "id", "date", figure_size=(8, 4), title=bikeshop
+        ).save(file_path, dpi=100, verbose=False)
+        file_paths.append(file_path)
+
+    return file_paths
+
+
+timed("plot_forecast per id", plot_per_id)
+
+# 2.0 After: prepared once, split once, shared style
+
+prepped_df = prepare_forecast_data(forecast_df, "id", "date")
+
+for n_jobs in sorted({1, N_JOBS}):
+    timed(
+        f"render_forecast_panels n_jobs={n_jobs}",
+        lambda n_jobs=n_jobs: render_forecast_panels(
+            prepped_df,
+            "id",
+            "date",
+            output_dir=tmp_dir / f"batch_{n_jobs}",
+            prepared=True,
+            n_jobs=n_jobs,
+        ),
+    )
+
+tmp_dir.rmtree_p()
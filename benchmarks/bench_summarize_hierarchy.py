@@ -0,0 +1,63 @@
+# BENCHMARK: summarize_hierarchy vs. one summarize_by_time per level
+#
+# Usage: python -m benchmarks.bench_summarize_hierarchy [n_rows]
+
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_order_lines
+from my_pandas_extension.timeseries_func import (
+    summarize_by_time,
+    summarize_hierarchy,
+)
+
+N_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+
+LEVELS = [
+    (None, "MS"),
+    (["category_1"], "MS"),
+    (["category_2"], "MS"),
+    (["bikeshop_name"], "Q"),
+]
+
+
+bike_order_line_df = make_order_lines(N_ROWS)
+
+# 1.0 One summarize_by_time call per level
+
+start = time.perf_counter()
+per_level_dfs = [
+    summarize_by_time(
+        bike_order_line_df,
+        date_column="order_date",
+        value_column=["total_price"],
+        groups=groups,
+        rules=rule,
+        time_format="period",
+    )
+    for groups, rule in LEVELS
+]
+per_level_seconds = time.perf_counter() - start
+
+# 2.0 Single pass
+
+start = time.perf_counter()
+hierarchy_dfs = summarize_hierarchy(
+    bike_order_line_df,
+    date_column="order_date",
+    value_column=["total_price"],
+    grouping_sets=[groups for groups, _ in LEVELS],
+    rules=[rule for _, rule in LEVELS],
+    time_format="period",
+)
+hierarchy_seconds = time.perf_counter() - start
+
+for expected, result in zip(per_level_dfs, hierarchy_dfs):
+    pd.testing.assert_frame_equal(expected, result)
+
+print(f"rows:                {N_ROWS:,}")
+print(f"summarize_by_time:   {per_level_seconds:.2f}s (4 calls)")
+print(f"summarize_hierarchy: {hierarchy_seconds:.2f}s")
+print(f"speedup:             {per_level_seconds / hierarchy_seconds:.1f}x")
@@ -0,0 +1,67 @@
+# BENCHMARK: per-call cost of pydantic argument validation on the
+# DataFrame methods, with and without trusted mode
+#
+# Usage: python -m benchmarks.bench_trusted_mode [n_calls]
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from helper.utils import prepare_data
+from my_pandas_extension.timeseries_func import (
+    detect_outliers,
+    summarize_by_time,
+)
+from my_pandas_extension.validation import trusted_mode
+
+N_CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+
+rng = np.random.default_rng(123)
+
+# Small inputs, as in a per-group or per-series loop
+series = pd.Series(rng.random(50))
+orders_df = pd.DataFrame(
+    {
+        "order_date": pd.date_range("2020-01-01", periods=50, freq="D"),
+        "total_price": rng.random(50),
+    }
+)
+forecast_df = pd.DataFrame(
+    {
+        "bikeshop_name": ["Shop 1"] * 12,
+        "order_date": pd.period_range("2020-01", periods=12, freq="M"),
+        "value": rng.random(12),
+    }
+)
+
+CALLS = {
+    "detect_outliers": lambda: detect_outliers(series),
+    "summarize_by_time": lambda: summarize_by_time(
+        orders_df,
+        value_column=["total_price"],
+        date_column="order_date",
+        rules="MS",
+    ),
+    "prepare_data": lambda: prepare_data(
+        forecast_df, id_column="bikeshop_name", date_column="order_date"
+    ),
+}
+
+
+def per_call_us(call) -> float:
+    return min(timeit.repeat(call, number=N_CALLS, repeat=3)) / N_CALLS * 1e6
+
+
+print(f"{'method':<20} {'validated':>11} {'trusted':>10} {'overhead':>10}")
+
+for name, call in CALLS.items():
+    validated_us = per_call_us(call)
+    with trusted_mode():
+        trusted_us = per_call_us(call)
+
+    print(
+        f"{name:<20} {validated_us:>9.1f}us {trusted_us:>8.1f}us "
+        f"{validated_us - trusted_us:>8.1f}us"
+    )
@@ -0,0 +1,81 @@
+# BENCHMARK: forecast table write throughput
+#
+# Usage: python -m benchmarks.bench_write_forecast [n_rows]
+
+import sys
+import tempfile
+import time
+
+from path import Path
+from sqlalchemy import create_engine
+from sqlalchemy.types import Numeric, String
+
+from benchmarks.synthetic import make_forecast
+from transformer.data_access import DataAccess
+
+N_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+N_IDS = 1_000
+
+# Column types used before the typed bulk writer
+LEGACY_SQL_DTYPES = {
+    "id": String(),
+    "date": String(),
+    "value": Numeric(),
+    "prediction": Numeric(),
+    "ci_lo": Numeric(),
+    "ci_hi": Numeric(),
+}
+
+
+def timed(label: str, write) -> None:
+    start = time.perf_counter()
+    write()
+    seconds = time.perf_counter() - start
+    print(
+        f"{label:<22} {seconds:6.1f}s {len(forecast_df) / seconds:>10,.0f} rows/s"
+    )
+
+
+forecast_df = make_forecast(
+    N_IDS, N_ROWS // N_IDS, 0, start="2000-01-01", dense=True
+)
+tmp_dir = Path(tempfile.mkdtemp())
+
+print(f"rows: {len(forecast_df):,}")
+
+# 1.0 Before: default to_sql, Numeric/String columns, default pragmas
+
+
+def legacy_write():
+    engine = create_engine(f"sqlite:///{tmp_dir / 'legacy.sqlite'}")
+    with engine.connect() as conn:
+        forecast_df.to_sql(
+            name="forecast",
+            con=conn,
+            if_exists="replace",
+            dtype=LEGACY_SQL_DTYPES,
+            index=False,
+        )
+        conn.commit()
+
+
+timed("to_sql (legacy)", legacy_write)
+
+# 2.0 After: DataAccess with and without the bulk insert
+
+for bulk in [False, True]:
+    db_access = DataAccess(
+        engine=create_engine(f"sqlite:///{tmp_dir / f'bulk_{bulk}.sqlite'}")
+    )
+    timed(
+        f"write_data_to_db bulk={bulk}",
+        lambda db_access=db_access, bulk=bulk: db_access.write_data_to_db(
+            data=forecast_df,
+            id_column="id",
+            date_column="date",
+            if_exists="replace",
+            bulk=bulk,
+        ),
+    )
+
+tmp_dir.rmtree_p()
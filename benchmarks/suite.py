@@ -0,0 +1,347 @@
+# BENCHMARK SUITE: the forecasting pipeline on synthetic data at
+# production scale, results written to a JSON baseline
+#
+# Usage:
+#   python -m benchmarks.suite --scale medium
+#   python -m benchmarks.suite --scale medium --compare \
+#       benchmarks/results/medium.json
+#
+# Every benchmark runs in a temporary working directory holding a
+# synthetic data/database/bikes_order_database.sqlite, so the relative
+# paths of settings.py resolve there and nothing in the repo is touched.
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from typing import Callable, Dict, get_args
+
+import numpy as np
+import pandas as pd
+from path import Path
+from sqlalchemy import create_engine
+
+from benchmarks.synthetic import (
+    make_bike_tables,
+    make_forecast,
+    write_bike_database,
+)
+from my_pandas_extension.plot_forecast import (
+    plot_forecast,
+    prepare_forecast_data,
+)
+from my_pandas_extension.timeseries_func import (
+    Rule,
+    detect_outliers,
+    detect_outliers_by_group,
+    summarize_by_time,
+)
+from transformer.bike_order_transformer import BikeOrderTransformer
+from transformer.data_access import DataAccess
+from transformer.forecasting import Forecaster
+
+SCALES = {
+    # About the size of the bike sales database
+    "small": {"n_shops": 30, "n_models": 97, "years": 5},
+    "medium": {"n_shops": 300, "n_models": 200, "years": 8},
+    "large": {"n_shops": 3_000, "n_models": 500, "years": 10},
+}
+
+DATABASE_PATH = Path("data/database/bikes_order_database.sqlite")
+RESULTS_DIR = Path("benchmarks/results")
+
+# Library deprecation notices would interleave with the timing table
+warnings.filterwarnings("ignore")
+
+# Facets of the plot_forecast benchmark, plots of thousands of facets are
+# not drawn in practice
+MAX_PLOT_IDS = 12
+
+
+def timed(func: Callable[[], object], repeat: int) -> dict:
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+
+    return {
+        "repeat": repeat,
+        "min_s": round(min(seconds), 4),
+        "median_s": round(statistics.median(seconds), 4),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def render_png(chart, backend: str) -> None:
+    buffer = io.BytesIO()
+    if backend == "plotnine":
+        chart.save(buffer, format="png", dpi=72, verbose=False)
+    else:
+        chart.savefig(buffer, format="png", dpi=72)
+
+
+def run_suite(
+    n_shops: int, n_models: int, years: int, n_series: int, repeat: int
+) -> Dict[str, dict]:
+    """Runs every benchmark in the current directory, returns the timings."""
+    results = {}
+
+    def bench(name: str, func: Callable[[], object], repeat=repeat) -> None:
+        results[name] = timed(func, repeat)
+        print(
+            f"{name:<48} {results[name]['median_s']:>9.4f}s "
+            f"(min {results[name]['min_s']:.4f}s, n={repeat})"
+        )
+
+    tables = make_bike_tables(n_shops=n_shops, n_models=n_models, years=years)
+    write_bike_database(tables, DATABASE_PATH)
+    print(f"order_lines: {len(tables['order_lines']):,} rows")
+
+    # 1.0 transform_data
+
+    transformer = BikeOrderTransformer()
+    for method in ["pandas", "sql"]:
+        bench(
+            f"transform_data[{method}]",
+            lambda method=method: transformer.transform_data(  # type: ignore
+                method=method
+            ),
+        )
+
+    # Cache built outside the timing, only the warm read is measured
+    transformer.transform_data(method="sql", use_cache=True)  # type: ignore
+    bench(
+        "transform_data[sql, cached]",
+        lambda: transformer.transform_data(  # type: ignore
+            method="sql", use_cache=True
+        ),
+    )
+
+    order_lines_df = transformer.transform_data(method="sql")  # type: ignore
+    order_lines_df["order_date"] = pd.to_datetime(order_lines_df["order_date"])
+
+    # 2.0 summarize_by_time, per rule
+
+    for rule in get_args(Rule):
+        bench(
+            f"summarize_by_time[{rule}]",
+            lambda rule=rule: summarize_by_time(
+                order_lines_df,
+                value_column=["total_price"],
+                date_column="order_date",
+                groups=["bikeshop_name"],
+                rules=rule,
+            ),
+        )
+
+    # 3.0 detect_outliers
+
+    bench(
+        "detect_outliers",
+        lambda: detect_outliers(order_lines_df["total_price"]),
+    )
+    bench(
+        "detect_outliers_by_group[bikeshop_name]",
+        lambda: detect_outliers_by_group(
+            order_lines_df,
+            value_column="total_price",
+            groups=["bikeshop_name"],
+        ),
+    )
+
+    # 4.0 Forecaster.forecast, the largest shops of the quarterly level
+
+    bikeshop_df = summarize_by_time(
+        order_lines_df,
+        value_column=["total_price"],
+        date_column="order_date",
+        groups=["bikeshop_name"],
+        rules="Q",
+        time_format="period",
+    )
+    top_shops = bikeshop_df.sum().nlargest(n_series).index
+    bench(
+        f"Forecaster.forecast[{n_series} series]",
+        lambda: Forecaster(
+            data=bikeshop_df.loc[:, top_shops], h=4, sp=3
+        ).forecast(),
+        repeat=1,
+    )
+
+    # Vectorized baselines fit every shop at once
+    for method in ["seasonal_naive", "drift", "ets", "theta"]:
+        bench(
+            f"Forecaster.forecast[{method}, all series]",
+            lambda method=method: Forecaster(
+                data=bikeshop_df, h=4, sp=3, method=method
+            ).forecast(),
+        )
+
+    # 5.0 write_data_to_db, one quarterly forecast per shop
+
+    forecast_df = make_forecast(
+        n_shops, n_history=years * 4, n_horizon=4, freq="QS"
+    )
+    db_access = DataAccess(
+        engine=create_engine(f"sqlite:///{Path('forecast.sqlite').absolute()}")
+    )
+    for if_exists in ["replace", "upsert"]:
+        bench(
+            f"write_data_to_db[{if_exists}]",
+            lambda if_exists=if_exists: db_access.write_data_to_db(
+                data=forecast_df,
+                id_column="id",
+                date_column="date",
+                if_exists=if_exists,  # type: ignore
+            ),
+        )
+
+    # 6.0 plot_forecast, build and render to png
+
+    plot_ids = forecast_df["id"].unique()[:MAX_PLOT_IDS]
+    prepped_df = prepare_forecast_data(
+        forecast_df[forecast_df["id"].isin(plot_ids)], "id", "date"
+    )
+    for backend in ["plotnine", "matplotlib"]:
+        bench(
+            f"plot_forecast[{backend}, {len(plot_ids)} ids]",
+            lambda backend=backend: render_png(
+                plot_forecast(
+                    prepped_df,
+                    "id",
+                    "date",
+                    facet_ncol=4,
+                    prepared=True,
+                    backend=backend,
+                ),
+                backend,
+            ),
+        )
+
+    return results
+
+
+def compare(
+    results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float
+) -> list:
+    """Prints the median ratios, returns the benchmarks slower than allowed."""
+    regressions = []
+
+    print(f"\n{'benchmark':<48} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<48} {'-':>10} {result['median_s']:>9.4f}s")
+            continue
+
+        ratio = result["median_s"] / max(baseline[name]["median_s"], 1e-9)
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+
+        print(
+            f"{name:<48} {baseline[name]['median_s']:>9.4f}s "
+            f"{result['median_s']:>9.4f}s {ratio:>6.2f}x{flag}"
+        )
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pipeline on synthetic data."
+    )
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--shops", type=int, help="Overrides the scale")
+    parser.add_argument("--models", type=int, help="Overrides the scale")
+    parser.add_argument("--years", type=int, help="Overrides the scale")
+    parser.add_argument(
+        "--series",
+        type=int,
+        default=4,
+        help="Series fitted by the Forecaster benchmark",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--output", help="Defaults to benchmarks/results/<scale>.json"
+    )
+    parser.add_argument("--compare", help="Baseline JSON to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative slowdown before a regression is reported",
+    )
+    args = parser.parse_args()
+
+    params = dict(SCALES[args.scale])
+    for key, value in [
+        ("n_shops", args.shops),
+        ("n_models", args.models),
+        ("years", args.years),
+    ]:
+        if value is not None:
+            params[key] = value
+
+    output_path = Path(args.output or RESULTS_DIR / f"{args.scale}.json")
+    output_path = output_path.absolute()
+    baseline_path = Path(args.compare).absolute() if args.compare else None
+
+    repo_dir = Path.cwd()
+    work_dir = Path(tempfile.mkdtemp(prefix="benchmarks_"))
+    os.chdir(work_dir)
+    try:
+        results = run_suite(**params, n_series=args.series, repeat=args.repeat)
+    finally:
+        os.chdir(repo_dir)
+        work_dir.rmtree_p()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "scale": args.scale,
+            "params": {**params, "n_series": args.series},
+        },
+        "results": results,
+    }
+
+    output_path.parent.makedirs_p()
+    output_path.write_text(json.dumps(report, indent=2))
+    print(f"\nresults written to {output_path}")
+
+    if baseline_path is not None:
+        baseline = json.loads(baseline_path.read_text())
+        if baseline["meta"]["params"] != report["meta"]["params"]:
+            print(
+                "warning: baseline was run with "
+                f"{baseline['meta']['params']}, not comparable"
+            )
+
+        regressions = compare(results, baseline["results"], args.tolerance)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,267 @@
+# Synthetic bike sales data at configurable scale, shared by the
+# benchmarks
+#
+# Usage:
+#   python -m benchmarks.synthetic OUTPUT [--shops N] [--models N] \
+#       [--years N] [--force]
+#
+# OUTPUT is required and an existing file is only replaced with --force,
+# so the production database of settings.CONN_STRING is never written
+# by accident.
+
+import argparse
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from path import Path
+from sqlalchemy import create_engine
+
+# Same taxonomy as the bikes table, so the description splits into the
+# category_1 - category_2 - frame_material columns
+CATEGORIES = {
+    "Mountain": [
+        "Cross Country Race",
+        "Trail",
+        "Over Mountain",
+        "Fat Bike",
+        "Sport",
+    ],
+    "Road": ["Elite Road", "Endurance Road", "Triathalon", "Cyclocross"],
+}
+FRAME_MATERIALS = ["Carbon", "Aluminum"]
+STATES = ["CA", "CO", "FL", "IL", "MI", "NY", "OR", "TX", "UT", "WA"]
+
+# Order lines per order are drawn uniformly from 1..MAX_LINES_PER_ORDER
+MAX_LINES_PER_ORDER = 15
+QUANTITY_WEIGHTS = {1: 0.7, 2: 0.2, 3: 0.07, 4: 0.03}
+
+
+def make_bike_tables(
+    n_shops: int = 30,
+    n_models: int = 97,
+    years: int = 5,
+    orders_per_shop_per_year: int = 14,
+    start: str = "2011-01-01",
+    seed: int = 123,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Raw `bikes`, `bike_shops` and `order_lines` tables.
+
+    The defaults give about the size of the bike sales database (about
+    15k order lines). Orders are spread over shops with a long tail of
+    small shops, as in the real data.
+    """
+    rng = np.random.default_rng(seed)
+
+    category_pairs = [
+        (category_1, category_2)
+        for category_1, categories_2 in CATEGORIES.items()
+        for category_2 in categories_2
+    ]
+    pair_idx = rng.integers(0, len(category_pairs), n_models)
+    material_idx = rng.integers(0, len(FRAME_MATERIALS), n_models)
+
+    bikes_df = pd.DataFrame(
+        {
+            "bike_id": np.arange(1, n_models + 1),
+            "model": [f"Model {i}" for i in range(1, n_models + 1)],
+            "description": [
+                f"{category_pairs[p][0]} - {category_pairs[p][1]} - "
+                f"{FRAME_MATERIALS[m]}"
+                for p, m in zip(pair_idx, material_idx)
+            ],
+            "price": rng.integers(40, 1_280, n_models) * 10,
+        }
+    )
+
+    bike_shops_df = pd.DataFrame(
+        {
+            "bikeshop_id": np.arange(1, n_shops + 1),
+            "bikeshop_name": [f"Bikeshop {i}" for i in range(1, n_shops + 1)],
+            "location": [
+                f"City {i}, {STATES[i % len(STATES)]}"
+                for i in range(1, n_shops + 1)
+            ],
+        }
+    )
+
+    # Orders, shop shares fall off with the shop's rank
+    n_orders = n_shops * orders_per_shop_per_year * years
+    shop_weights = 1 / np.arange(1, n_shops + 1) ** 0.8
+    customer_id = rng.choice(
+        np.arange(1, n_shops + 1),
+        size=n_orders,
+        p=shop_weights / shop_weights.sum(),
+    )
+
+    start_date = np.datetime64(start)
+    n_days = (
+        np.datetime64(pd.Timestamp(start) + pd.DateOffset(years=years), "D")
+        - start_date
+    ).astype(int)
+    order_dates = np.sort(
+        start_date + rng.integers(0, n_days, n_orders).astype("timedelta64[D]")
+    )
+
+    # Order lines
+    n_lines = rng.integers(1, MAX_LINES_PER_ORDER + 1, n_orders)
+    total_lines = int(n_lines.sum())
+    line_offsets = np.repeat(np.cumsum(n_lines) - n_lines, n_lines)
+
+    order_lines_df = pd.DataFrame(
+        {
+            "order_id": np.repeat(np.arange(1, n_orders + 1), n_lines),
+            "order_line": np.arange(total_lines) - line_offsets + 1,
+            "order_date": pd.DatetimeIndex(
+                np.repeat(order_dates, n_lines)
+            ).strftime("%Y-%m-%d %H:%M:%S"),
+            "customer_id": np.repeat(customer_id, n_lines),
+            "product_id": rng.integers(1, n_models + 1, total_lines),
+            "quantity": rng.choice(
+                list(QUANTITY_WEIGHTS),
+                size=total_lines,
+                p=list(QUANTITY_WEIGHTS.values()),
+            ),
+        }
+    )
+
+    return {
+        "bikes": bikes_df,
+        "bike_shops": bike_shops_df,
+        "order_lines": order_lines_df,
+    }
+
+
+def write_bike_database(
+    tables: Dict[str, pd.DataFrame],
+    database_path: Path,
+    overwrite: bool = False,
+) -> Path:
+    """
+    Writes the tables of `make_bike_tables` to a new SQLite file.
+
+    Raises:
+        FileExistsError: If `database_path` exists and `overwrite` is
+            False.
+    """
+    database_path = Path(database_path)
+    if database_path.exists():
+        if not overwrite:
+            raise FileExistsError(
+                f"{database_path} exists, pass overwrite=True to replace it."
+            )
+        database_path.remove()
+    database_path.parent.makedirs_p()
+
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.begin() as conn:
+        for table_name, df in tables.items():
+            df.to_sql(table_name, conn, index=False, chunksize=100_000)
+    engine.dispose()
+
+    return database_path
+
+
+def make_order_lines(n_rows: int, seed: int = 123) -> pd.DataFrame:
+    """
+    Cleaned order lines with the columns `summarize_hierarchy` needs,
+    generated directly, without the raw tables and the join.
+    """
+    rng = np.random.default_rng(seed)
+
+    category_1 = np.array(["Mountain", "Road"], dtype=object)
+    category_2 = np.array([f"Category 2 {i}" for i in range(9)], dtype=object)
+    bikeshops = np.array([f"Bikeshop {i}" for i in range(30)], dtype=object)
+
+    start = np.datetime64("2011-01-01")
+    return pd.DataFrame(
+        {
+            "order_date": start
+            + rng.integers(0, 5 * 365, n_rows).astype("timedelta64[D]"),
+            "category_1": category_1[rng.integers(0, 2, n_rows)],
+            "category_2": category_2[rng.integers(0, 9, n_rows)],
+            "bikeshop_name": bikeshops[rng.integers(0, 30, n_rows)],
+            "total_price": rng.integers(400, 12_000, n_rows).astype(float),
+        }
+    )
+
+
+def make_forecast(
+    n_ids: int,
+    n_history: int,
+    n_horizon: int,
+    freq: str = "MS",
+    start: str = "2011-01-01",
+    id_prefix: str = "Bikeshop",
+    dense: bool = False,
+    seed: int = 123,
+) -> pd.DataFrame:
+    """
+    Long forecast frame in the layout of the forecast table.
+
+    History rows hold `value`, horizon rows `prediction` and the interval.
+    With `dense=True` every column of every row is filled instead, as
+    for raw write throughput.
+    """
+    rng = np.random.default_rng(seed)
+    n_dates = n_history + n_horizon
+
+    ids = np.repeat([f"{id_prefix}: {i}" for i in range(n_ids)], n_dates)
+    dates = np.tile(pd.date_range(start, periods=n_dates, freq=freq), n_ids)
+
+    if dense:
+        value = rng.random(n_ids * n_dates) * 1e5
+        return pd.DataFrame(
+            {
+                "id": ids,
+                "date": dates,
+                "value": value,
+                "prediction": value * 1.01,
+                "ci_lo": value * 0.9,
+                "ci_hi": value * 1.1,
+            }
+        )
+
+    is_history = np.tile(np.arange(n_dates) < n_history, n_ids)
+    level = np.repeat(rng.random(n_ids) * 1e5, n_dates)
+    noise = rng.normal(1, 0.1, n_ids * n_dates)
+
+    return pd.DataFrame(
+        {
+            "id": ids,
+            "date": dates,
+            "value": np.where(is_history, level * noise, np.nan),
+            "prediction": np.where(is_history, np.nan, level),
+            "ci_lo": np.where(is_history, np.nan, level * 0.8),
+            "ci_hi": np.where(is_history, np.nan, level * 1.2),
+        }
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic bike sales database."
+    )
+    parser.add_argument("output", help="SQLite file to write")
+    parser.add_argument("--shops", type=int, default=30)
+    parser.add_argument("--models", type=int, default=97)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument(
+        "--force", action="store_true", help="Replace an existing file"
+    )
+    args = parser.parse_args()
+
+    tables = make_bike_tables(
+        n_shops=args.shops, n_models=args.models, years=args.years
+    )
+    try:
+        database_path = write_bike_database(
+            tables, Path(args.output), overwrite=args.force
+        )
+    except FileExistsError:
+        parser.error(f"{args.output} exists, pass --force to replace it.")
+
+    for table_name, df in tables.items():
+        print(f"{table_name:<12} {len(df):>12,} rows")
+    print(f"written to {database_path}")
@@ -5,10 +5,22 @@ from pathlib import Path
 from loguru import logger
 
 
+def _is_profile(record) -> bool:
+    return "profile" in record["extra"]
+
+
+def _is_not_profile(record) -> bool:
+    return "profile" not in record["extra"]
+
+
 class Log:
     """
     A wrapper around Loguru to provide a simple, reusable logging interface.
     Supports console and file logging with rotation and retention.
+
+    Records bound with `profile` (see helper.profiling) skip the console and
+    the log file and go to a shared JSON lines file instead, one object
+    per line. They are only written while profiling is turned on.
     """
 
     def __init__(
@@ -18,6 +30,7 @@ class Log:
         rotation: str = "10 MB",
         retention: str = "7 days",
         level: str = "INFO",
+        profile_path: str = "logs/profile/profile.jsonl",
     ):
         """
         Initialize a Loguru logger instance.
@@ -28,6 +41,7 @@ class Log:
             rotation (str): When to rotate the log file (e.g., "10 MB", "1 week").
             retention (str): How long to keep old log files (e.g., "7 days").
             level (str): Minimum log level to capture.
+            profile_path (str): JSON lines file of the profiling records.
         """
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
@@ -46,6 +60,7 @@ class Log:
             "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
             "<level>{message}</level>",
             level=level,
+            filter=_is_not_profile,
         )
 
         # File handler
@@ -60,7 +75,23 @@ class Log:
             diagnose=True,
             level=level,
             format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+            filter=_is_not_profile,
+        )
+
+        # Profiling handler, the message is already a JSON object
+        profile_path = Path(profile_path)
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        logger.add(
+            profile_path,
+            rotation=rotation,
+            retention=retention,
+            encoding="utf-8",
+            enqueue=True,
+            level=level,
+            format="{message}",
+            filter=_is_profile,
         )
+        logger.enable("helper.profiling")
 
         self.logger = logger
 
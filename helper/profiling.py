@@ -0,0 +1,250 @@
+import inspect
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    Optional,
+    ParamSpec,
+    Sequence,
+    TypeVar,
+)
+
+import pandas as pd
+from loguru import logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+# Set to "1" to profile process-wide, e.g. in batch jobs, or to "deep"
+# to also count the bytes held by object columns, which walks every
+# Python object of those columns
+PROFILE_ENV = "HELPER_PROFILE"
+_ENV_MODE = os.environ.get(PROFILE_ENV, "0")
+
+_mode: ContextVar[str] = ContextVar(
+    "profile_mode", default=_ENV_MODE if _ENV_MODE in ("1", "deep") else "0"
+)
+
+# Stages of the `profiled` calls running in this context, so a call that
+# re-enters its own stage is not recorded twice
+_active: ContextVar[tuple] = ContextVar("profile_active", default=())
+
+_profile_log = logger.bind(profile=True)
+
+# Silent until a `Log` adds the profiling handler, loguru's default
+# handler would otherwise print every record to stderr
+logger.disable(__name__)
+
+
+def is_enabled() -> bool:
+    return _mode.get() != "0"
+
+
+def current_mode() -> str:
+    """
+    "0", "1" or "deep", e.g. to turn profiling on in a spawned process,
+    which starts from the `PROFILE_ENV` default.
+    """
+    return _mode.get()
+
+
+@contextmanager
+def profiling(enabled: bool = True, deep: bool = False) -> Iterator[None]:
+    """
+    Turns profiling on (or off) inside the block.
+
+    Off by default: `profile`, `profiled`, `emit` and `frame_stats` then
+    do nothing beyond checking this flag.
+
+    Args:
+        enabled (bool, optional): Defaults to True.
+        deep (bool, optional): Count the bytes held by object columns,
+            not only their pointers. Defaults to False.
+    """
+    token = _mode.set(("deep" if deep else "1") if enabled else "0")
+    try:
+        yield
+    finally:
+        _mode.reset(token)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water mark of the resident set size of this process."""
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(max_rss * _RSS_UNIT / 1024**2, 1)
+
+
+def frame_stats(data: Any, suffix: str = "") -> dict:
+    """
+    Row and byte counts of a DataFrame or Series, empty otherwise and
+    while profiling is off.
+    """
+    if not is_enabled() or not isinstance(data, (pd.DataFrame, pd.Series)):
+        return {}
+
+    n_bytes = data.memory_usage(index=True, deep=_mode.get() == "deep")
+    if isinstance(data, pd.DataFrame):
+        n_bytes = n_bytes.sum()
+
+    return {f"rows{suffix}": len(data), f"bytes{suffix}": int(n_bytes)}
+
+
+def emit(stage: str, **fields) -> None:
+    """Writes one profiling record to the JSON lines file of `Log`."""
+    if not is_enabled():
+        return
+
+    record = {
+        "time": datetime.now().isoformat(timespec="milliseconds"),
+        "stage": stage,
+        "pid": os.getpid(),
+        **fields,
+    }
+    _profile_log.info(json.dumps(record, default=str))
+
+
+@contextmanager
+def measure(
+    cpu_clock: Callable[[], float] = time.process_time,
+) -> Iterator[dict]:
+    """Yields a dict that holds the usage of the block once it exits."""
+    usage = {}
+    rss_start = peak_rss_mb()
+    cpu_start = cpu_clock()
+    wall_start = time.perf_counter()
+
+    try:
+        yield usage
+    finally:
+        rss_end = peak_rss_mb()
+        usage.update(
+            wall_s=round(time.perf_counter() - wall_start, 4),
+            cpu_s=round(cpu_clock() - cpu_start, 4),
+            peak_rss_mb=rss_end,
+            # How much the block raised the process high-water mark
+            rss_growth_mb=(
+                None if rss_end is None else round(rss_end - rss_start, 1)
+            ),
+        )
+
+
+@contextmanager
+def profile(
+    stage: str,
+    cpu_clock: Callable[[], float] = time.process_time,
+    **fields,
+) -> Iterator[dict]:
+    """
+    Measures the block and emits one record for it.
+
+    The yielded dict is added to the record, e.g. for row counts only
+    known inside the block.
+
+    Args:
+        stage (str): Name charted across runs, e.g. "transform_data".
+        cpu_clock (callable, optional): `time.process_time` counts every
+            thread of the process, pass `time.thread_time` to count only
+            the calling thread. Defaults to `time.process_time`.
+        fields: Constant fields added to the record.
+
+    While profiling is off the block runs unmeasured and the yielded dict
+    is discarded.
+
+    Example:
+        with profile("write_data_to_db", table="forecast") as record:
+            record.update(frame_stats(forecast_df))
+            ...
+    """
+    record = dict(fields)
+    if not is_enabled():
+        yield record
+        return
+
+    status = "error"
+    try:
+        with measure(cpu_clock) as usage:
+            yield record
+        status = "ok"
+    finally:
+        emit(stage, status=status, **usage, **record)
+
+
+def profiled(
+    stage: Optional[str] = None, arguments: Sequence[str] = (), **fields
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """
+    Decorator form of `profile`.
+
+    Adds `rows_in`/`bytes_in` of the first DataFrame argument and
+    `rows_out`/`bytes_out` of a returned DataFrame to the record. Only the
+    outermost call is recorded when the function calls itself.
+
+    Args:
+        stage (str, optional): Defaults to the function's qualified name.
+        arguments (list[str], optional): Call arguments copied into the
+            record, e.g. ["method"] to tell the code paths apart.
+        fields: Constant fields added to every record.
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        name = stage or func.__qualname__
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            active = _active.get()
+            if not is_enabled() or name in active:
+                return func(*args, **kwargs)
+
+            data = next(
+                (
+                    value
+                    for value in (*args, *kwargs.values())
+                    if isinstance(value, pd.DataFrame)
+                ),
+                None,
+            )
+            # Counted outside the measured block, byte counts of object
+            # columns are not free in deep mode
+            record = {**fields, **frame_stats(data, suffix="_in")}
+
+            if arguments:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                record.update({a: bound.arguments[a] for a in arguments})
+
+            status = "error"
+            token = _active.set((*active, name))
+            try:
+                with measure() as usage:
+                    result = func(*args, **kwargs)
+                status = "ok"
+                record.update(frame_stats(result, suffix="_out"))
+            finally:
+                _active.reset(token)
+                emit(name, status=status, **usage, **record)
+
+            return result
+
+        return wrapper
+
+    return decorator
@@ -1,19 +1,21 @@
+import hashlib
 from functools import wraps
 from typing import Any, Callable, List, Literal, ParamSpec, TypeVar
 
 import janitor  # type: ignore
 import pandas as pd
 import pandas_flavor as pf  # type: ignore
-from pydantic import ConfigDict, validate_call
+from pydantic import ConfigDict
 
 from my_pandas_extension.plot_forecast import convert_to_datetime
+from my_pandas_extension.validation import validate_unless_trusted
 
 P = ParamSpec("P")
 R = TypeVar("R")
 
 
 @pf.register_dataframe_method
-@validate_call(config=ConfigDict(arbitrary_types_allowed=True))
+@validate_unless_trusted(config=ConfigDict(arbitrary_types_allowed=True))
 def prepare_data(data: pd.DataFrame, id_column: str, date_column: str):
     if data is None:
         raise ValueError("No data available to prepare.")
@@ -29,11 +31,72 @@ def prepare_data(data: pd.DataFrame, id_column: str, date_column: str):
 
 
 def with_db_connection(func: Callable[P, R]) -> Callable[P, R]:
-    """Injects `conn` argument into the wrapped method."""
+    """
+    Injects `conn` argument into the wrapped method. Reuses the connection
+    of an open `DataAccess.batch()` block, otherwise opens a new one.
+    """
 
     @wraps(func)
     def wrapper(self, *args: P.args, **kwargs: P.kwargs) -> R:
+        batch_conn = getattr(self, "_batch_conn", None)
+        if batch_conn is not None:
+            return func(self, batch_conn, *args, **kwargs)
+
         with self.engine.connect() as conn:
             return func(self, conn, *args, **kwargs)
 
     return wrapper  # type: ignore
+
+
+def fingerprint_series(y: pd.Series) -> str:
+    """Content hash of a series, including its index."""
+    return hashlib.sha1(
+        pd.util.hash_pandas_object(y, index=True).values.tobytes()
+    ).hexdigest()
+
+
+def fingerprint_frame(data: pd.DataFrame) -> str:
+    """Content hash of a frame's column names and values, ignoring its index."""
+    digest = hashlib.sha1(repr(list(data.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+
+    return digest.hexdigest()
+
+
+def fingerprint_wide_frame(
+    data: pd.DataFrame, id_format: str, config: str = ""
+) -> pd.DataFrame:
+    """
+    Row count and content hash for every column of a wide time-series frame.
+
+    Args:
+        data (DataFrame): Output of `summarize_by_time` in wide format.
+        id_format (str): Format string turning a column label into the
+            forecast `id`, e.g. "Category 1: {}" or "Total Revenue".
+        config (str, optional): Hash of the forecast settings (horizon,
+            seasonal period, model, ...), folded into every data_hash so
+            a settings change marks all columns as changed.
+
+    Returns:
+        DataFrame indexed like `data.columns` with id, n_rows and data_hash.
+    """
+    records = []
+    for column in data.columns:
+        y = data[column]
+        label = column[-1] if isinstance(column, tuple) else column
+
+        data_hash = fingerprint_series(y)
+        if config:
+            data_hash = hashlib.sha1(
+                f"{data_hash}{config}".encode("utf-8")
+            ).hexdigest()
+
+        records.append(
+            {
+                "id": id_format.format(label),
+                "n_rows": len(y),
+                "data_hash": data_hash,
+            }
+        )
+
+    return pd.DataFrame(records, index=data.columns)
@@ -5,6 +5,7 @@ import papermill as pm  # type: ignore
 from path import Path
 
 from transformer.data_access import DataAccess
+from transformer.kernel_pool import KernelPool
 
 # COLLECT DATA
 db_access = DataAccess()
@@ -43,18 +44,22 @@ template_path = Path("module9/template/jupyter_report_template.ipynb")
 
 output_path = "module9/reports/sales_report_{}.ipynb"
 
-for i, id_value in enumerate(ids_set):
-    params = {
-        "ids": list(prepare_data_for_automation(all_forecasts_df, id_value)),
-        "data": all_forecasts_df.to_json(),
-        "title": f"Sales Forecast: {id_value}",
-    }
-
-    pm.execute_notebook(
-        input_path=template_path,
-        output_path=Path(
-            output_path.format(id_value.lower().replace(" ", "_"))
-        ),
-        parameters=params,
-        report_mode=True,
-    )
+# Reports share one warm kernel instead of starting a fresh one each
+with KernelPool(size=1) as kernel_pool:
+    for i, id_value in enumerate(ids_set):
+        params = {
+            "ids": list(prepare_data_for_automation(all_forecasts_df, id_value)),
+            "data": all_forecasts_df.to_json(),
+            "title": f"Sales Forecast: {id_value}",
+        }
+
+        with kernel_pool.acquire() as km:
+            pm.execute_notebook(
+                input_path=template_path,
+                output_path=Path(
+                    output_path.format(id_value.lower().replace(" ", "_"))
+                ),
+                parameters=params,
+                report_mode=True,
+                km=km,
+            )
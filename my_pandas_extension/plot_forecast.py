@@ -1,18 +1,242 @@
 # Plotting Imports
-import mizani.formatters as ml
+import hashlib
+import math
+import re
+
+import matplotlib.dates as mdates
 import numpy as np
 import pandas as pd
-from plotnine import aes
-from plotnine.facets.facet_wrap import facet_wrap
-from plotnine.geoms import geom_line
-from plotnine.geoms.geom_ribbon import geom_ribbon
-from plotnine.ggplot import ggplot
-from plotnine.labels import labs
-from plotnine.scales.scale_manual import scale_color_manual
-from plotnine.scales.scale_xy import scale_x_datetime, scale_y_continuous
-from plotnine.themes import theme
-from plotnine.themes.theme_minimal import theme_minimal
-from plydata.cat_tools import cat_reorder  # type: ignore
+from joblib import Parallel, delayed, effective_n_jobs
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+from path import Path
+
+# plotnine and mizani are imported by _plot_forecast_plotnine() only, so
+# the matplotlib backend does not pay for them
+
+FORECAST_VARIABLES = ["prediction", "value"]
+
+# Colors of scale_color_manual, in FORECAST_VARIABLES order
+FORECAST_COLORS = ["red", "#2C3E50"]
+
+# theme_minimal look for the matplotlib renderer
+GRID_COLOR = "#EBEBEB"
+TEXT_COLOR = "#4D4D4D"
+RIBBON_COLOR = "#333333"
+
+DATE_LOCATORS = {
+    "year": lambda n: mdates.YearLocator(base=n),
+    "month": lambda n: mdates.MonthLocator(interval=n),
+    "week": lambda n: mdates.WeekdayLocator(interval=n),
+    "day": lambda n: mdates.DayLocator(interval=n),
+}
+
+
+def prepare_forecast_data(data, id_column, date_column):
+    """Long-format frame drawn by plot_forecast()
+
+    Stacks `value` and `prediction` into one `value` column with a
+    `variable` label, keeping the confidence interval on every row. The
+    id column becomes a categorical ordered by the mean of both series,
+    largest first, so facets are sorted by revenue.
+
+    The result can be passed back to plot_forecast() with
+    `prepared=True`, so a report drawing several plots (or subsets of
+    ids) prepares the data only once.
+
+    Args:
+        data (DataFrame): Output of the arima_forecast() function.
+        id_column (str): The series identifier column.
+        date_column (str): The timestamp column.
+
+    Returns:
+        DataFrame: Columns id, date, variable, value, ci_lo, ci_hi.
+    """
+    n_rows = len(data)
+
+    id_codes, id_uniques = pd.factorize(data[id_column], sort=True)
+
+    value = data["value"].to_numpy(dtype="float64")
+    prediction = data["prediction"].to_numpy(dtype="float64")
+
+    # Facet order: mean of value and prediction together, NaNs skipped
+    sums = np.bincount(
+        id_codes, weights=np.nan_to_num(value), minlength=len(id_uniques)
+    ) + np.bincount(
+        id_codes, weights=np.nan_to_num(prediction), minlength=len(id_uniques)
+    )
+    counts = np.bincount(
+        id_codes, weights=~np.isnan(value), minlength=len(id_uniques)
+    ) + np.bincount(
+        id_codes, weights=~np.isnan(prediction), minlength=len(id_uniques)
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = pd.Series(sums / counts)
+
+    order = means.sort_values(ascending=False).index.to_numpy()
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+
+    dates = convert_to_datetime(
+        data[[date_column]].reset_index(drop=True), date_column
+    )[date_column].to_numpy()
+
+    # Same layout as melt(): every value row, then every prediction row
+    return pd.DataFrame(
+        {
+            id_column: pd.Categorical.from_codes(
+                np.tile(rank[id_codes], 2),
+                categories=pd.Index(id_uniques).take(order),
+            ),
+            date_column: np.tile(dates, 2),
+            "ci_lo": np.tile(data["ci_lo"].to_numpy(dtype="float64"), 2),
+            "ci_hi": np.tile(data["ci_hi"].to_numpy(dtype="float64"), 2),
+            "variable": pd.Categorical.from_codes(
+                np.repeat([1, 0], n_rows), categories=FORECAST_VARIABLES
+            ),
+            "value": np.concatenate([value, prediction]),
+        }
+    )
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets selection of `n_out` points
+
+    Keeps the first and last point and, from each of the `n_out - 2`
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the mean of the next bucket, which keeps
+    peaks and troughs visible.
+
+    Args:
+        x (ndarray): Sorted x coordinates as floats.
+        y (ndarray): The y coordinates.
+        n_out (int): Number of points to keep, at least 3.
+
+    Returns:
+        ndarray: Positions of the kept points, ascending.
+    """
+    if n_out < 3:
+        raise ValueError("n_out must be at least 3.")
+
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+
+    # edges[b]:edges[b + 1] is bucket b; the last edge is the final point
+    edges = (
+        np.floor(np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(int) + 1
+    )
+    edges = np.append(edges, n)
+
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+
+    a = 0
+    for b in range(n_out - 2):
+        start, stop, next_stop = edges[b], edges[b + 1], edges[b + 2]
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+
+        area = np.abs(
+            (x[a] - next_x) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (next_y - y[a])
+        )
+        a = start + int(area.argmax())
+        kept[b + 1] = a
+
+    return kept
+
+
+def minmax_indices(y, n_out):
+    """Minimum and maximum of `(n_out - 2) // 2` equal buckets, plus both ends.
+
+    Args:
+        y (ndarray): The y coordinates, ordered by x.
+        n_out (int): Maximum number of points to keep, at least 4.
+
+    Returns:
+        ndarray: Positions of the kept points, ascending.
+    """
+    if n_out < 4:
+        raise ValueError("n_out must be at least 4.")
+
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+
+    # Both ends count towards n_out
+    n_buckets = (n_out - 2) // 2
+    buckets = pd.Series(y).groupby(np.arange(n) * n_buckets // n)
+
+    return np.unique(
+        np.concatenate(
+            [
+                [0, n - 1],
+                buckets.idxmin().to_numpy(),
+                buckets.idxmax().to_numpy(),
+            ]
+        )
+    )
+
+
+def downsample_forecast_data(
+    df_prepped, id_column, date_column, max_points, method="lttb"
+):
+    """Bounds the number of history points drawn per facet
+
+    Only the observed `value` rows are decimated; forecast rows and their
+    confidence interval are kept as is.
+
+    Args:
+        df_prepped (DataFrame): Output of prepare_forecast_data().
+        id_column (str): The series identifier column.
+        date_column (str): The timestamp column.
+        max_points (int): Maximum history points kept per id, at least 4.
+        method (str, optional): "lttb" or "minmax". Defaults to "lttb".
+
+    Returns:
+        DataFrame: The prepared frame without the dropped rows.
+    """
+    if method not in ("lttb", "minmax"):
+        raise ValueError("method must be 'lttb' or 'minmax'.")
+
+    if max_points < 4:
+        raise ValueError("max_points must be at least 4.")
+
+    values = df_prepped["value"].to_numpy()
+    is_history = (df_prepped["variable"].to_numpy() == "value") & ~np.isnan(
+        values
+    )
+
+    # History rows ordered by id then date, sliced into contiguous runs
+    all_codes = df_prepped[id_column].cat.codes.to_numpy()
+    all_dates = df_prepped[date_column].to_numpy()
+
+    history_rows = np.flatnonzero(is_history)
+    history_rows = history_rows[
+        np.lexsort((all_dates[history_rows], all_codes[history_rows]))
+    ]
+    bounds = np.flatnonzero(np.diff(all_codes[history_rows])) + 1
+    x = all_dates[history_rows].astype("int64").astype("float64")
+
+    keep = ~is_history
+    for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(history_rows)]):
+        if stop - start <= max_points:
+            keep[history_rows[start:stop]] = True
+            continue
+
+        if method == "lttb":
+            kept = lttb_indices(
+                x[start:stop],
+                values[history_rows[start:stop]],
+                max_points,
+            )
+        else:
+            kept = minmax_indices(values[history_rows[start:stop]], max_points)
+
+        keep[history_rows[start:stop][kept]] = True
+
+    return df_prepped[keep]
 
 
 def plot_forecast(
@@ -29,6 +253,10 @@ def plot_forecast(
     title="Forecast Plot",
     xlab="Date",
     ylab="Revenue",
+    prepared=False,
+    backend="plotnine",
+    max_points=None,
+    downsample="lttb",
 ):
     """Automates the forecast visualization
 
@@ -47,46 +275,96 @@ def plot_forecast(
         title (str, optional): The plot title. Defaults to "Forecast Plot".
         xlab (str, optional): The x-axis label. Defaults to "Date".
         ylab (str, optional): The y-axis label. Defaults to "Revenue".
+        prepared (bool, optional): `data` is already the output of
+            prepare_forecast_data(). Defaults to False.
+        backend (str, optional): "plotnine" or "matplotlib", which draws
+            the same chart directly on a subplot grid. Defaults to "plotnine".
+        max_points (int, optional): Maximum history points drawn per facet,
+            at least 4. None draws all of them. Defaults to None.
+        downsample (str, optional): Decimation used with `max_points`,
+            "lttb" or "minmax". Defaults to "lttb".
 
     Returns:
-        [gglot]: Returns a plotnine ggplot object
+        [gglot]: Returns a plotnine ggplot object, or a matplotlib Figure
+            with the matplotlib backend
     """
+    if backend not in ("plotnine", "matplotlib"):
+        raise ValueError("backend must be 'plotnine' or 'matplotlib'.")
 
-    arima_forecast_df = data
+    # Data Wrangling
+    if prepared:
+        df_prepped = data
 
-    required_columns = [
-        id_column,
-        date_column,
-        "value",
-        "prediction",
-        "ci_lo",
-        "ci_hi",
-    ]
+        # A subset of a prepared frame still carries every id as category
+        if (
+            df_prepped[id_column].cat.categories.size
+            > df_prepped[id_column].nunique()
+        ):
+            df_prepped = df_prepped.assign(
+                **{
+                    id_column: df_prepped[
+                        id_column
+                    ].cat.remove_unused_categories()
+                }
+            )
+    else:
+        df_prepped = prepare_forecast_data(data, id_column, date_column)
 
-    # Data Wrangling
-    df_prepped = (
-        arima_forecast_df.loc[:, required_columns]
-        .melt(
-            value_vars=["value", "prediction"],
-            id_vars=[id_column, date_column, "ci_lo", "ci_hi"],
-            # var_name   = ".variable",
-            value_name=".value",
+    if max_points is not None:
+        df_prepped = downsample_forecast_data(
+            df_prepped, id_column, date_column, max_points, downsample
         )
-        .rename({".value": "value"}, axis=1)
-    )
 
-    # Handle the Categorical Conversion
+    # Preparing the Plot
 
-    df_prepped[id_column] = cat_reorder(
-        c=pd.Categorical(df_prepped[id_column]),
-        x=df_prepped["value"],
-        fun=np.mean,
-        ascending=False,
+    plot_args = (
+        df_prepped,
+        id_column,
+        date_column,
+        facet_ncol,
+        facet_scales,
+        date_labels,
+        date_breaks,
+        ribbon_alpha,
+        wspace,
+        figure_size,
+        title,
+        xlab,
+        ylab,
     )
 
-    df_prepped = convert_to_datetime(df_prepped, date_column)
+    if backend == "matplotlib":
+        return _plot_forecast_matplotlib(*plot_args)
 
-    # Preparing the Plot
+    return _plot_forecast_plotnine(*plot_args)
+
+
+def _plot_forecast_plotnine(
+    df_prepped,
+    id_column,
+    date_column,
+    facet_ncol,
+    facet_scales,
+    date_labels,
+    date_breaks,
+    ribbon_alpha,
+    wspace,
+    figure_size,
+    title,
+    xlab,
+    ylab,
+):
+    import mizani.formatters as ml
+    from plotnine import aes
+    from plotnine.facets.facet_wrap import facet_wrap
+    from plotnine.geoms import geom_line
+    from plotnine.geoms.geom_ribbon import geom_ribbon
+    from plotnine.ggplot import ggplot
+    from plotnine.labels import labs
+    from plotnine.scales.scale_manual import scale_color_manual
+    from plotnine.scales.scale_xy import scale_x_datetime, scale_y_continuous
+    from plotnine.themes import theme
+    from plotnine.themes.theme_minimal import theme_minimal
 
     # Geometries
     g = (
@@ -124,19 +402,372 @@ def plot_forecast(
     return g
 
 
+def _plot_forecast_matplotlib(
+    df_prepped,
+    id_column,
+    date_column,
+    facet_ncol,
+    facet_scales,
+    date_labels,
+    date_breaks,
+    ribbon_alpha,
+    wspace,
+    figure_size,
+    title,
+    xlab,
+    ylab,
+):
+    panels = _split_by_id(df_prepped, id_column)
+
+    n_cols = min(facet_ncol, len(panels))
+    n_rows = math.ceil(len(panels) / n_cols)
+    width, height = figure_size
+
+    # Same sharing rules as facet_wrap(scales=...)
+    share_x = facet_scales not in ("free", "free_x")
+    share_y = facet_scales not in ("free", "free_y")
+
+    # Axes are not linked with sharex/sharey: every limit change would be
+    # propagated to all siblings, which is quadratic in the facet count.
+    # Shared limits are set once after drawing instead.
+    figure = Figure(figsize=figure_size)
+    axes = figure.subplots(
+        n_rows,
+        n_cols,
+        squeeze=False,
+        gridspec_kw={"wspace": wspace, "hspace": 0.4},
+    ).ravel()
+
+    # Fixed margins (in inches), a layout engine is slow with many facets
+    figure.subplots_adjust(
+        left=1.2 / width,
+        right=1 - 0.2 / width,
+        bottom=0.7 / height,
+        top=1 - 0.7 / height,
+    )
+
+    for ax, (label, panel_df) in zip(axes, panels):
+        _style_axes(ax, date_labels, date_breaks, None, None)
+        value_xy, prediction_xy, interval = _panel_arrays(
+            panel_df, date_column
+        )
+
+        ax.fill_between(
+            *interval, color=RIBBON_COLOR, alpha=ribbon_alpha, linewidth=0
+        )
+        for (x, y), color in zip([prediction_xy, value_xy], FORECAST_COLORS):
+            ax.plot(x, y, color=color, linewidth=1)
+
+        ax.set_title(str(label), fontsize="small")
+
+    for ax in axes[len(panels) :]:
+        ax.set_visible(False)
+
+    axes = axes[: len(panels)]
+    if share_x:
+        _share_limits(axes, "x")
+        # Only panels with another panel below drop their date labels, the
+        # last panel of each column keeps them above the hidden cells
+        for i, ax in enumerate(axes):
+            if i + n_cols < len(panels):
+                ax.tick_params(labelbottom=False)
+    if share_y:
+        _share_limits(axes, "y")
+        for i, ax in enumerate(axes):
+            if i % n_cols:
+                ax.tick_params(labelleft=False)
+
+    figure.suptitle(title)
+    figure.supxlabel(xlab)
+    figure.supylabel(ylab)
+
+    return figure
+
+
+def _share_limits(axes, axis):
+    """Sets the union of the data limits, with default margins, on all axes.
+
+    Panels without data (all values missing) do not count towards the
+    limits, they keep matplotlib's default ones when no panel has data.
+    """
+    limits = [
+        (getattr(ax.dataLim, f"{axis}0"), getattr(ax.dataLim, f"{axis}1"))
+        for ax in axes
+    ]
+    limits = [(lo, hi) for lo, hi in limits if np.isfinite([lo, hi]).all()]
+    if not limits:
+        return
+
+    low = min(lo for lo, _ in limits)
+    high = max(hi for _, hi in limits)
+    margin = (high - low) * 0.05
+
+    for ax in axes:
+        getattr(ax, f"set_{axis}lim")(low - margin, high + margin)
+
+
 def convert_to_datetime(df_prepped, date_column):
-    # Check for period, convert to datetime64
-    if df_prepped[date_column].dtype != "datetime64[ns]":
-        # Try changing to timestamp
+    # Dispatch on the dtype: periods become timestamps, anything else
+    # not already datetime64 is parsed
+    dates = df_prepped[date_column]
+
+    if isinstance(dates.dtype, pd.PeriodDtype):
+        df_prepped[date_column] = dates.dt.to_timestamp()
+
+    elif dates.dtype != "datetime64[ns]":
         try:
-            df_prepped[date_column] = df_prepped[date_column].dt.to_timestamp()
-        except ValueError:
-            try:
-                df_prepped[date_column] = pd.to_datetime(
-                    df_prepped[date_column]
-                )
-            except ValueError:
-                raise Exception(
-                    "Could not auto-convert `date_column` to datetime64."
-                )
+            df_prepped[date_column] = pd.to_datetime(dates)
+        except (TypeError, ValueError):
+            raise Exception(
+                "Could not auto-convert `date_column` to datetime64."
+            )
+
     return df_prepped
+
+
+def _date_locator(date_breaks):
+    """Matplotlib locator for a plotnine style break spec like "2 years"."""
+    match = re.fullmatch(r"\s*(\d+)\s*(year|month|week|day)s?\s*", date_breaks)
+    if match is None:
+        raise ValueError(f"Unsupported date_breaks: {date_breaks!r}")
+
+    return DATE_LOCATORS[match.group(2)](int(match.group(1)))
+
+
+def _dollar(x, _=None):
+    return f"-${-x:,.0f}" if x < 0 else f"${x:,.0f}"
+
+
+def _style_axes(ax, date_labels, date_breaks, xlab, ylab):
+    ax.xaxis.set_major_locator(_date_locator(date_breaks))
+    ax.xaxis.set_major_formatter(mdates.DateFormatter(date_labels))
+    ax.yaxis.set_major_formatter(FuncFormatter(_dollar))
+
+    ax.grid(True, color=GRID_COLOR, linewidth=0.8)
+    ax.set_axisbelow(True)
+    ax.tick_params(length=0, colors=TEXT_COLOR)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    if xlab is not None:
+        ax.set_xlabel(xlab)
+    if ylab is not None:
+        ax.set_ylabel(ylab)
+
+
+def _panel_arrays(panel_df, date_column):
+    """Dates, value, prediction and interval of one id of a prepared frame."""
+    is_value = panel_df["variable"].to_numpy() == "value"
+    dates = panel_df[date_column].to_numpy()
+    values = panel_df["value"].to_numpy()
+
+    value_dates, value = dates[is_value], values[is_value]
+    prediction_dates, prediction = dates[~is_value], values[~is_value]
+    ci_lo = panel_df["ci_lo"].to_numpy()[~is_value]
+    ci_hi = panel_df["ci_hi"].to_numpy()[~is_value]
+
+    # geom_line / geom_ribbon drop missing rows rather than break the line
+    has_value = ~np.isnan(value)
+    has_prediction = ~np.isnan(prediction)
+    has_ci = ~(np.isnan(ci_lo) | np.isnan(ci_hi))
+
+    return (
+        (value_dates[has_value], value[has_value]),
+        (prediction_dates[has_prediction], prediction[has_prediction]),
+        (prediction_dates[has_ci], ci_lo[has_ci], ci_hi[has_ci]),
+    )
+
+
+def _split_by_id(df_prepped, id_column):
+    """(label, frame) per id of a prepared frame, in facet order."""
+    # Sort the category codes once and slice contiguous runs
+    ids = df_prepped[id_column].cat
+    codes = ids.codes.to_numpy()
+    row_order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(
+        codes[row_order], np.arange(len(ids.categories) + 1)
+    )
+
+    panel_df = df_prepped.drop(columns=id_column)
+
+    return [
+        (label, panel_df.iloc[row_order[start:stop]])
+        for label, start, stop in zip(ids.categories, bounds[:-1], bounds[1:])
+        if stop > start
+    ]
+
+
+def _panel_file_name(label):
+    """File-safe stem of an id, unique per id.
+
+    Ids that had to be sanitized get a short hash of the raw id, so e.g.
+    "Bikeshop: A" and "Bikeshop_ A" do not overwrite each other's panel.
+    """
+    label = str(label)
+    name = re.sub(r"[^\w\-]+", "_", label).strip("_")
+    if name == label:
+        return name
+
+    digest = hashlib.sha1(label.encode("utf-8")).hexdigest()[:8]
+    return f"{name}_{digest}" if name else digest
+
+
+def _render_panel_chunk(panels, date_column, output_dir, format, dpi, style):
+    """Draws a chunk of panels on one figure, swapping only the data."""
+    width, height = style["figure_size"]
+
+    # Fixed margins (in inches) instead of a layout engine, which would
+    # measure every tick label again on each save
+    figure = Figure(figsize=(width, height))
+    figure.subplots_adjust(
+        left=1.2 / width,
+        right=1 - 0.2 / width,
+        bottom=0.6 / height,
+        top=1 - 0.45 / height,
+    )
+    ax = figure.add_subplot()
+    _style_axes(
+        ax,
+        style["date_labels"],
+        style["date_breaks"],
+        style["xlab"],
+        style["ylab"],
+    )
+
+    prediction_line, value_line = (
+        ax.plot([], [], color=color, linewidth=1)[0]
+        for color in FORECAST_COLORS
+    )
+    ribbon = None
+
+    file_paths = []
+    for label, panel_df in panels:
+        value_xy, prediction_xy, interval = _panel_arrays(
+            panel_df, date_column
+        )
+
+        value_line.set_data(*value_xy)
+        prediction_line.set_data(*prediction_xy)
+
+        if ribbon is not None:
+            ribbon.remove()
+        ribbon = ax.fill_between(
+            *interval,
+            color=RIBBON_COLOR,
+            alpha=style["ribbon_alpha"],
+            linewidth=0,
+        )
+
+        # relim() only looks at lines, the ribbon extent is added by hand
+        ax.relim()
+        ribbon_x = mdates.date2num(interval[0])
+        ax.update_datalim(np.column_stack([ribbon_x, interval[1]]))
+        ax.update_datalim(np.column_stack([ribbon_x, interval[2]]))
+        ax.autoscale_view()
+        ax.set_title(str(label))
+
+        file_path = output_dir / f"{_panel_file_name(label)}.{format}"
+        figure.savefig(file_path, format=format, dpi=dpi)
+        file_paths.append(file_path)
+
+    return file_paths
+
+
+def render_forecast_panels(
+    data,
+    id_column,
+    date_column,
+    output_dir,
+    format="png",
+    dpi=100,
+    date_labels="%Y",
+    date_breaks="1 year",
+    ribbon_alpha=0.2,
+    figure_size=(8, 4),
+    xlab="Date",
+    ylab="Revenue",
+    prepared=False,
+    max_points=None,
+    downsample="lttb",
+    n_jobs=1,
+):
+    """Writes one forecast chart per id to disk
+
+    The data is prepared once and split by id up front. Each worker builds
+    a single matplotlib figure with the plot_forecast styling and, for
+    every id, only swaps the line and ribbon data before saving, instead
+    of running a full plotnine pipeline per id.
+
+    Args:
+        data (DataFrame): Output of the arima_forecast() function, or of
+            prepare_forecast_data() when `prepared` is True.
+        id_column (str): The series identifier column.
+        date_column (str): The timestamp column.
+        output_dir (str): Directory the panels are written to.
+        format (str, optional): "png" or "svg". Defaults to "png".
+        dpi (int, optional): Resolution of png panels. Defaults to 100.
+        date_labels (str, optional): The strftime format for the x-axis date label. Defaults to "%Y".
+        date_breaks (str, optional): Locations for the date breaks on the x-axis. Defaults to "1 year".
+        ribbon_alpha (float, optional): The opacity of the confidence intervals. Defaults to 0.2.
+        figure_size (tuple, optional): Size of each panel. Defaults to (8,4).
+        xlab (str, optional): The x-axis label. Defaults to "Date".
+        ylab (str, optional): The y-axis label. Defaults to "Revenue".
+        prepared (bool, optional): `data` is already prepared. Defaults to False.
+        max_points (int, optional): Maximum history points per panel. Defaults to None.
+        downsample (str, optional): "lttb" or "minmax". Defaults to "lttb".
+        n_jobs (int, optional): Worker processes, -1 for all cores. Defaults to 1.
+
+    Returns:
+        list: Paths of the written panels, in facet order.
+    """
+    if format not in ("png", "svg"):
+        raise ValueError("format must be 'png' or 'svg'.")
+
+    df_prepped = (
+        data
+        if prepared
+        else prepare_forecast_data(data, id_column, date_column)
+    )
+
+    if max_points is not None:
+        df_prepped = downsample_forecast_data(
+            df_prepped, id_column, date_column, max_points, downsample
+        )
+
+    output_dir = Path(output_dir)
+    output_dir.makedirs_p()
+
+    panels = _split_by_id(df_prepped, id_column)
+
+    style = {
+        "date_labels": date_labels,
+        "date_breaks": date_breaks,
+        "ribbon_alpha": ribbon_alpha,
+        "figure_size": figure_size,
+        "xlab": xlab,
+        "ylab": ylab,
+    }
+
+    n_chunks = max(min(effective_n_jobs(n_jobs), len(panels)), 1)
+    chunks = [panels[i::n_chunks] for i in range(n_chunks)]
+
+    if n_chunks == 1:
+        chunk_paths = [
+            _render_panel_chunk(
+                chunks[0], date_column, output_dir, format, dpi, style
+            )
+        ]
+    else:
+        chunk_paths = Parallel(n_jobs=n_chunks, backend="loky")(
+            delayed(_render_panel_chunk)(
+                chunk, date_column, output_dir, format, dpi, style
+            )
+            for chunk in chunks
+        )
+
+    # Undo the round-robin chunking so paths follow the facet order
+    file_paths = [None] * len(panels)
+    for i, paths in enumerate(chunk_paths):
+        file_paths[i::n_chunks] = paths
+
+    return file_paths
@@ -12,14 +12,22 @@ import numpy as np
 import pandas as pd
 import pandas_flavor as pf  # type: ignore
 from pandas.core.groupby.generic import DataFrameGroupBy
-from pydantic import ConfigDict, Field, StrictFloat, validate_call
+from pydantic import ConfigDict, Field, StrictFloat
+
+from helper.profiling import profiled
+from my_pandas_extension.validation import validate_unless_trusted
 
 GroupKeys = Sequence[Hashable]
 ValueCols = Sequence[str]
+Rule = Literal["D", "MS", "QE", "Q", "YS"]
+
+# Aggregations that can be rolled up from a finer pre-aggregated grain
+ROLLUP_AGG_FUNCS = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
 
 
 @pf.register_dataframe_method
-@validate_call(config=ConfigDict(arbitrary_types_allowed=True))
+@profiled("summarize_by_time", arguments=["rules", "time_format"])
+@validate_unless_trusted(config=ConfigDict(arbitrary_types_allowed=True))
 def summarize_by_time(
     data: pd.DataFrame,
     value_column: ValueCols,
@@ -51,7 +59,7 @@ def summarize_by_time(
 
     # Apply grouping if needed
     if group_by_column:
-        grouped = data.groupby(group_by_column)
+        grouped = data.groupby(group_by_column, observed=True)
     else:
         grouped = data
 
@@ -78,7 +86,111 @@ def summarize_by_time(
 
 
 @pf.register_dataframe_method
-@validate_call(config=ConfigDict(arbitrary_types_allowed=True))
+@validate_unless_trusted(config=ConfigDict(arbitrary_types_allowed=True))
+def summarize_hierarchy(
+    data: pd.DataFrame,
+    value_column: ValueCols,
+    date_column: str,
+    grouping_sets: Sequence[Optional[GroupKeys]],
+    rules: Union[Rule, Sequence[Rule]] = "D",
+    agg_func: Literal["sum", "count", "min", "max"] = "sum",
+    time_format: Literal["timestamp", "period"] = "timestamp",
+    na_value: int = 0,
+) -> List[pd.DataFrame]:
+    """
+    Summarize several hierarchy levels in one pass over the data.
+
+    The rows are bucketed once at the finest requested frequency and
+    aggregated with a single integer-coded groupby over every grouping
+    column. Each grouping set is then rolled up from that small frame with
+    `summarize_by_time`, so the output matches calling `summarize_by_time`
+    once per level.
+
+    Args:
+        data (DataFrame): Line-level data.
+        value_column (list[str]): Columns to aggregate.
+        date_column (str): The timestamp column.
+        grouping_sets (list): One entry per level, either None for the
+            total or a list of grouping columns.
+        rules (str or list[str]): One frequency for all levels or one per
+            level. Defaults to "D".
+        agg_func (str): One of "sum", "count", "min", "max". Only
+            aggregations that can be rolled up are supported.
+        time_format (str): "timestamp" or "period". Defaults to "timestamp".
+        na_value (int): Fill value for empty periods. Defaults to 0.
+
+    Returns:
+        List of wide DataFrames in the order of `grouping_sets`.
+    """
+    level_rules = (
+        [rules] * len(grouping_sets) if isinstance(rules, str) else list(rules)
+    )
+
+    if len(level_rules) != len(grouping_sets):
+        raise ValueError("Provide one rule or one rule per grouping set.")
+
+    group_columns = list(
+        dict.fromkeys(
+            col for groups in grouping_sets if groups for col in groups
+        )
+    )
+
+    # Daily buckets are only needed when a daily level is requested,
+    # every other frequency nests into calendar months
+    bucket_unit = "datetime64[D]" if "D" in level_rules else "datetime64[M]"
+    dates = pd.to_datetime(data[date_column])
+
+    # Bucket tz-aware dates on their local wall clock, like the resample
+    # of summarize_by_time, and put the zone back on the bucket starts
+    tz = dates.dt.tz
+    if tz is not None:
+        dates = dates.dt.tz_localize(None)
+    buckets = dates.to_numpy().astype(bucket_unit).astype("datetime64[ns]")
+
+    # Integer-code the grouping columns so the groupby hashes ints only
+    base_df = pd.DataFrame({date_column: buckets}, index=data.index)
+    if tz is not None:
+        base_df[date_column] = base_df[date_column].dt.tz_localize(tz)
+    uniques = {}
+    for col in group_columns:
+        base_df[col], uniques[col] = pd.factorize(data[col])
+    for col in value_column:
+        base_df[col] = data[col]
+
+    base_df = (
+        base_df.groupby([date_column, *group_columns], sort=False)[
+            list(value_column)
+        ]
+        .agg(agg_func)
+        .reset_index()
+    )
+
+    # Decode to plain labels (also for categorical inputs), missing (-1)
+    # codes become NaN and are dropped by the rollup
+    for col in group_columns:
+        base_df[col] = pd.api.extensions.take(
+            np.asarray(uniques[col], dtype=object),
+            base_df[col].to_numpy(),
+            allow_fill=True,
+        )
+
+    return [
+        summarize_by_time(
+            base_df,
+            value_column=value_column,
+            date_column=date_column,
+            groups=groups,
+            rules=rule,
+            agg_func=ROLLUP_AGG_FUNCS[agg_func],
+            time_format=time_format,
+            na_value=na_value,
+        )
+        for groups, rule in zip(grouping_sets, level_rules)
+    ]
+
+
+@pf.register_dataframe_method
+@validate_unless_trusted(config=ConfigDict(arbitrary_types_allowed=True))
 def detect_outliers(
     x: pd.Series,
     iqr_multiplier: Annotated[StrictFloat, Field(strict=True, gt=0)] = 1.5,
@@ -101,8 +213,13 @@ def detect_outliers(
 
     """
     # IQR Method
-    q75 = np.quantile(x, 0.75)
-    q25 = np.quantile(x, 0.25)
+    q25, q75 = np.quantile(x, [0.25, 0.75])
+
+    return _flag_outliers(x, q25, q75, iqr_multiplier, how)
+
+
+def _flag_outliers(x, q25, q75, iqr_multiplier: float, how: str):
+    """Compares `x` to the IQR fences, element-wise for array quartiles."""
     iqr = q75 - q25
 
     lower_limit = q25 - iqr_multiplier * iqr
@@ -115,3 +232,157 @@ def detect_outliers(
         outliers = x <= lower_limit
 
     return outliers
+
+
+def _group_codes(data: pd.DataFrame, groups: GroupKeys) -> np.ndarray:
+    """One integer code per row for the combination of `groups`."""
+    return (
+        data.groupby(list(groups), sort=False, dropna=False, observed=True)
+        .ngroup()
+        .to_numpy()
+    )
+
+
+@pf.register_dataframe_method
+@validate_unless_trusted(config=ConfigDict(arbitrary_types_allowed=True))
+def detect_outliers_by_group(
+    data: pd.DataFrame,
+    value_column: str,
+    groups: GroupKeys,
+    iqr_multiplier: Annotated[StrictFloat, Field(strict=True, gt=0)] = 1.5,
+    how: Literal["both", "upper", "lower"] = "both",
+) -> pd.Series:
+    """
+    IQR outlier flags within each group, computed for all groups at once.
+
+    The values are sorted once by (group, value), so every group's
+    quartiles are read from its contiguous run with the same linear
+    interpolation as `np.quantile`. Equivalent to
+    `data.groupby(groups)[value_column].apply(detect_outliers)` without a
+    Python call per group.
+
+    Args:
+        data (DataFrame): Long format data.
+        value_column (str): Column to check.
+        groups (list[str]): Grouping columns.
+        iqr_multiplier(Float) : A multiplier used to modify the sensitivity. Must be positive. Defaults values = 1.5
+        how (Literal[str] ): one of "both", "upper" , "lower". Default to "both"
+
+    Returns:
+        Series of True or False aligned with `data`. Missing values are
+        ignored by the quartiles and never flagged.
+    """
+    values = data[value_column].to_numpy(dtype="float64")
+    codes = _group_codes(data, groups)
+
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return pd.Series(False, index=data.index, name=value_column)
+
+    order = np.lexsort((values[valid], codes[valid]))
+    sorted_values = values[valid][order]
+
+    sizes = np.bincount(codes[valid], minlength=codes.max() + 1)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    def quartile(q: float) -> np.ndarray:
+        position = q * (sizes - 1)
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, sizes - 1)
+        fraction = position - lower
+
+        # Groups without any valid value get NaN quartiles
+        lower_value = sorted_values.take(starts + lower, mode="clip")
+        upper_value = sorted_values.take(starts + upper, mode="clip")
+        return np.where(
+            sizes > 0,
+            lower_value + fraction * (upper_value - lower_value),
+            np.nan,
+        )
+
+    q25, q75 = quartile(0.25), quartile(0.75)
+
+    outliers = _flag_outliers(
+        values, q25[codes], q75[codes], iqr_multiplier, how
+    )
+
+    return pd.Series(outliers, index=data.index, name=value_column)
+
+
+@pf.register_dataframe_method
+@validate_unless_trusted(config=ConfigDict(arbitrary_types_allowed=True))
+def detect_outliers_rolling(
+    data: pd.DataFrame,
+    value_column: str,
+    window: Union[int, str],
+    date_column: Optional[str] = None,
+    groups: Optional[GroupKeys] = None,
+    min_periods: Optional[int] = None,
+    center: bool = False,
+    iqr_multiplier: Annotated[StrictFloat, Field(strict=True, gt=0)] = 1.5,
+    how: Literal["both", "upper", "lower"] = "both",
+) -> pd.Series:
+    """
+    IQR outlier flags against the quartiles of a rolling window.
+
+    Each point is compared to the quartiles of its own window, so level
+    shifts and trends do not turn a whole regime into outliers. Rows are
+    ordered by (groups, date_column) internally; the flags are returned in
+    the original row order.
+
+    Args:
+        data (DataFrame): Long format data.
+        value_column (str): Column to check.
+        window (int or str): Number of rows, or an offset such as "90D"
+            when `date_column` is given.
+        date_column (str, optional): The timestamp column to order by.
+        groups (list[str], optional): Windows never span two groups.
+        min_periods (int, optional): Minimum observations in a window,
+            defaults to the pandas rolling default.
+        center (bool): Center the window on each point. Defaults to False.
+        iqr_multiplier(Float) : A multiplier used to modify the sensitivity. Must be positive. Defaults values = 1.5
+        how (Literal[str] ): one of "both", "upper" , "lower". Default to "both"
+
+    Returns:
+        Series of True or False aligned with `data`. Points whose window
+        has fewer than `min_periods` values are not flagged.
+    """
+    if isinstance(window, str) and date_column is None:
+        raise ValueError("An offset window requires `date_column`.")
+
+    sort_keys = []
+    if date_column is not None:
+        sort_keys.append(pd.to_datetime(data[date_column]).to_numpy())
+    if groups:
+        sort_keys.append(_group_codes(data, groups))
+    order = np.lexsort(sort_keys) if sort_keys else np.arange(len(data))
+
+    values = pd.Series(data[value_column].to_numpy(dtype="float64")[order])
+    if date_column is not None:
+        values.index = pd.DatetimeIndex(sort_keys[0][order])
+
+    rolling_args = {
+        "window": window,
+        "min_periods": min_periods,
+        "center": center,
+    }
+    if groups:
+        # Rows are already ordered by group, so the grouped result keeps
+        # the same row order
+        rolling = values.groupby(sort_keys[-1][order], sort=False).rolling(
+            **rolling_args
+        )
+    else:
+        rolling = values.rolling(**rolling_args)
+
+    q25 = rolling.quantile(0.25).to_numpy()
+    q75 = rolling.quantile(0.75).to_numpy()
+
+    ordered_outliers = _flag_outliers(
+        values.to_numpy(), q25, q75, iqr_multiplier, how
+    )
+
+    outliers = np.empty(len(data), dtype=bool)
+    outliers[order] = ordered_outliers
+
+    return pd.Series(outliers, index=data.index, name=value_column)
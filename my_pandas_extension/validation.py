@@ -0,0 +1,64 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Iterator, Optional, ParamSpec, TypeVar
+
+from pydantic import ConfigDict, validate_call
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Set to "1" to skip argument validation process-wide, e.g. in batch jobs
+TRUSTED_MODE_ENV = "MY_PANDAS_EXTENSION_TRUSTED"
+
+_trusted: ContextVar[bool] = ContextVar(
+    "trusted", default=os.environ.get(TRUSTED_MODE_ENV, "0") == "1"
+)
+
+
+def is_trusted() -> bool:
+    return _trusted.get()
+
+
+@contextmanager
+def trusted_mode(enabled: bool = True) -> Iterator[None]:
+    """
+    Skips pydantic argument validation of the DataFrame methods decorated
+    with `validate_unless_trusted` inside the block.
+
+    Only for callers that already pass well-typed arguments, e.g. a loop
+    calling `detect_outliers` once per group: invalid arguments are then
+    no longer rejected up front.
+    """
+    token = _trusted.set(enabled)
+    try:
+        yield
+    finally:
+        _trusted.reset(token)
+
+
+def validate_unless_trusted(
+    func: Optional[Callable[P, R]] = None,
+    *,
+    config: Optional[ConfigDict] = None,
+):
+    """
+    `validate_call` that is bypassed in trusted mode.
+
+    The validated wrapper is built once; in trusted mode the undecorated
+    function is called directly.
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        validated = validate_call(config=config)(func)
+
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if _trusted.get():
+                return func(*args, **kwargs)
+            return validated(*args, **kwargs)
+
+        return wrapper
+
+    return decorator if func is None else decorator(func)
@@ -1,20 +1,59 @@
+from datetime import timedelta
 from typing import List
 
 from path import Path
-from sqlalchemy.types import Numeric, String
+from sqlalchemy.types import DateTime, Float, String
+from traitlets.config import Config
 
 database_folder_path = Path("data/database")
 CONN_STRING = f"sqlite:///{database_folder_path}/bikes_order_database.sqlite"
 
+# Pool settings of the shared engines from transformer.data_access.get_engine
+ENGINE_OPTIONS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_recycle": 3600,
+    "pool_pre_ping": True,
+}
+
+# Seconds DataAccess.table_exists trusts its cached table names, tables
+# dropped by other processes are noticed at the latest after this long
+TABLE_NAMES_TTL = 60
+
 SQL_DTYPES = {
     "id": String(),
-    "date": String(),
-    "value": Numeric(),
-    "prediction": Numeric(),
-    "ci_lo": Numeric(),
-    "ci_hi": Numeric(),
+    "date": DateTime(),
+    "value": Float(),
+    "prediction": Float(),
+    "ci_lo": Float(),
+    "ci_hi": Float(),
 }
 
+# Applied on every new SQLite connection: WAL lets readers keep reading
+# while the forecast table is written, NORMAL syncs once per transaction
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+}
+
+FINGERPRINT_TABLE = "forecast_fingerprint"
+
+MODEL_STORE_PATH = Path("data/model_store")
+
+TRANSFORM_CACHE_PATH = Path("data/cache/bike_order_lines.parquet")
+
+REPORT_MANIFEST_PATH = Path("reports/output/manifest")
+
+PIPELINE_CHECKPOINT_PATH = Path("data/pipeline")
+
+# Run directories kept under PIPELINE_CHECKPOINT_PATH, older ones are
+# deleted once a run finishes
+PIPELINE_KEEP_RUNS = 3
+
+# Unfinished runs older than this are not resumed automatically, their
+# checkpointed inputs would produce stale forecasts
+PIPELINE_RESUME_MAX_AGE = timedelta(hours=12)
+
 
 SELECTED_COLUMN_TO_KEEP: List[str] = [
     "order_id",
@@ -32,3 +71,24 @@ SELECTED_COLUMN_TO_KEEP: List[str] = [
     "city",
     "state",
 ]
+
+# Low-cardinality text columns stored as categoricals in the parquet cache
+CATEGORICAL_COLUMNS: List[str] = [
+    "category_1",
+    "category_2",
+    "bikeshop_name",
+    "state",
+    "city",
+]
+
+
+def make_nbconvert_config() -> Config:
+    """nbconvert config that drops cells and inputs tagged in the template."""
+    config = Config()
+    config.TagRemovePreprocessor.remove_cell_tags = ("remove_cell",)
+    config.TagRemovePreprocessor.remove_input_tags = ("remove_input",)
+    config.TagRemovePreprocessor.remove_all_outputs_tags = ("remove_output",)
+    config.TagRemovePreprocessor.enabled = True
+    config.HTMLExporter.exclude_input = True
+
+    return config
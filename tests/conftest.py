@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+from loguru import logger
+from path import Path
+
+from benchmarks.synthetic import make_bike_tables, write_bike_database
+from helper.logger import _is_profile
+from transformer.bike_order_transformer import BikeOrderTransformer
+from transformer.data_access import DataAccess, get_engine
+
+# Working directory before the session and the scratch directory used
+# instead
+_ORIGINAL_CWD = pytest.StashKey[str]()
+_SCRATCH_DIR = pytest.StashKey[str]()
+
+
+def pytest_configure(config):
+    # Modules write logs/ and data/ relative to the working directory at
+    # import time, i.e. while test modules are collected and before any
+    # fixture runs, keep those out of the repository
+    config.stash[_ORIGINAL_CWD] = os.getcwd()
+    config.stash[_SCRATCH_DIR] = tempfile.mkdtemp(
+        prefix="python-business-science-tests-"
+    )
+    os.chdir(config.stash[_SCRATCH_DIR])
+
+
+def pytest_unconfigure(config):
+    if _SCRATCH_DIR not in config.stash:
+        return
+
+    os.chdir(config.stash[_ORIGINAL_CWD])
+    # Close the log files opened by Log before removing them
+    logger.remove()
+    shutil.rmtree(config.stash[_SCRATCH_DIR], ignore_errors=True)
+
+
+@pytest.fixture
+def profile_records():
+    """Profiling records emitted while the test runs, parsed."""
+    records = []
+    handler_id = logger.add(
+        lambda message: records.append(json.loads(message)),
+        format="{message}",
+        filter=_is_profile,
+    )
+    logger.enable("helper.profiling")
+
+    yield records
+
+    logger.remove(handler_id)
+
+
+@pytest.fixture
+def quarterly_panel() -> pd.DataFrame:
+    """Wide frame of three seasonal quarterly revenue series."""
+    rng = np.random.default_rng(0)
+    index = pd.period_range("2015Q1", periods=28, freq="Q", name="order_date")
+    trend = np.linspace(100, 200, len(index))
+    season = np.tile([10.0, -5.0, 0.0, 20.0], len(index) // 4)
+
+    columns = pd.MultiIndex.from_product(
+        [["total_price"], ["Shop A", "Shop B", "Shop C"]],
+        names=[None, "bikeshop_name"],
+    )
+    values = np.column_stack(
+        [
+            scale * (trend + season) + rng.normal(0, 5, len(index))
+            for scale in (1.0, 2.0, 0.5)
+        ]
+    )
+
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+@pytest.fixture
+def db_access(tmp_path) -> DataAccess:
+    """DataAccess on an empty SQLite file."""
+    return DataAccess(engine=get_engine(f"sqlite:///{tmp_path}/test.sqlite"))
+
+
+@pytest.fixture
+def bike_transformer(tmp_path) -> BikeOrderTransformer:
+    """BikeOrderTransformer on a small synthetic bike sales database."""
+    database_path = Path(tmp_path) / "bikes_order_database.sqlite"
+    write_bike_database(
+        make_bike_tables(n_shops=4, n_models=12, years=2), database_path
+    )
+
+    transformer = BikeOrderTransformer()
+    transformer.engine = get_engine(f"sqlite:///{database_path}")
+
+    return transformer
+
+
+@pytest.fixture
+def forecast_df() -> pd.DataFrame:
+    """Rows in the layout of the forecast table, two ids of three months."""
+    dates = pd.date_range("2024-01-01", periods=3, freq="MS")
+
+    return pd.DataFrame(
+        {
+            "id": ["Total Revenue"] * 3 + ["Category 1: Road"] * 3,
+            "date": dates.append(dates),
+            "value": [1.0, 2.0, np.nan, 4.0, 5.0, np.nan],
+            "prediction": [np.nan, np.nan, 3.0, np.nan, np.nan, 6.0],
+            "ci_lo": [np.nan, np.nan, 2.0, np.nan, np.nan, 5.0],
+            "ci_hi": [np.nan, np.nan, 4.0, np.nan, np.nan, 7.0],
+        }
+    )
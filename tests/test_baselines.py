@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helper.profiling import profiling
+from transformer.baselines import forecast_baseline
+from transformer.forecasting import Forecaster
+
+METHODS = ["seasonal_naive", "drift", "ets", "theta"]
+
+
+@pytest.fixture
+def y() -> np.ndarray:
+    """Five seasonal quarterly series of 7 years, as columns."""
+    rng = np.random.default_rng(0)
+    season = np.tile([10.0, -5.0, 0.0, 20.0], 7)[:, None]
+    trend = np.linspace(100, 200, 28)[:, None] * rng.uniform(0.5, 2, 5)
+
+    return trend + season + rng.normal(0, 5, (28, 5))
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_batch_fit_matches_column_by_column(y, method):
+    batch = forecast_baseline(y, method, h=6, sp=4, coverage=0.8)
+
+    for i in range(y.shape[1]):
+        single = forecast_baseline(y[:, [i]], method, h=6, sp=4, coverage=0.8)
+        for name, forecast in single.items():
+            np.testing.assert_allclose(batch[name][:, [i]], forecast)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_intervals_widen_with_coverage(y, method):
+    narrow = forecast_baseline(y, method, h=6, sp=4, coverage=0.5)
+    wide = forecast_baseline(y, method, h=6, sp=4, coverage=0.95)
+
+    np.testing.assert_allclose(narrow["prediction"], wide["prediction"])
+    assert (wide["ci_lo"] <= narrow["ci_lo"]).all()
+    assert (wide["ci_hi"] >= narrow["ci_hi"]).all()
+
+
+def test_simple_baselines_reproduce_exact_patterns():
+    line = np.arange(1.0, 13.0)[:, None]
+    seasonal = np.tile([1.0, 2.0, 3.0, 4.0], 3)[:, None]
+
+    drift = forecast_baseline(line, "drift", h=3, sp=4)
+    naive = forecast_baseline(seasonal, "seasonal_naive", h=6, sp=4)
+
+    np.testing.assert_allclose(drift["prediction"][:, 0], [13.0, 14.0, 15.0])
+    np.testing.assert_allclose(drift["ci_hi"], drift["ci_lo"])
+    np.testing.assert_allclose(
+        naive["prediction"][:, 0], [1.0, 2.0, 3.0, 4.0, 1.0, 2.0]
+    )
+
+
+def test_too_short_series_are_rejected():
+    with pytest.raises(ValueError, match="sp=4"):
+        forecast_baseline(np.ones((4, 2)), "seasonal_naive", h=2, sp=4)
+
+
+def test_baseline_forecaster_matches_the_arima_layout(quarterly_panel):
+    arima_df = Forecaster(data=quarterly_panel, h=4, sp=3).forecast()
+    baseline_df = Forecaster(
+        data=quarterly_panel, h=4, sp=3, method="theta"
+    ).forecast()
+
+    pd.testing.assert_index_equal(baseline_df.index, arima_df.index)
+    pd.testing.assert_index_equal(baseline_df.columns, arima_df.columns)
+    pd.testing.assert_series_equal(baseline_df["value"], arima_df["value"])
+
+
+def test_baseline_forecaster_reports_series_with_gaps(quarterly_panel):
+    data = quarterly_panel.copy()
+    data.iloc[5, 1] = np.nan
+
+    forecaster = Forecaster(data=data, h=4, sp=3, method="ets")
+    forecast_df = forecaster.forecast()
+
+    assert list(forecaster.errors) == [("total_price", "Shop B")]
+    assert set(forecast_df["bikeshop_name"]) == {"Shop A", "Shop C"}
+
+
+def test_baseline_forecaster_records_every_series(
+    profile_records, quarterly_panel
+):
+    data = quarterly_panel.copy()
+    data.iloc[5, 1] = np.nan
+
+    with profiling():
+        Forecaster(data=data, h=4, sp=3, method="theta").forecast()
+
+    records = {
+        record["series"][1]: record
+        for record in profile_records
+        if record["stage"] == "Forecaster.forecast.series"
+    }
+    assert {name: r["status"] for name, r in records.items()} == {
+        "Shop A": "ok",
+        "Shop B": "error",
+        "Shop C": "ok",
+    }
+    # The vectorized fit is split evenly across the series it covered
+    assert records["Shop A"]["wall_s"] == records["Shop C"]["wall_s"]
+    assert records["Shop A"]["rows_out"] == len(data) + 4
+    assert "wall_s" not in records["Shop B"]
@@ -0,0 +1,75 @@
+import pandas as pd
+from path import Path
+
+from settings import CATEGORICAL_COLUMNS, SELECTED_COLUMN_TO_KEEP
+
+
+def _by_order_line(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["order_id", "order_line"]).reset_index(drop=True)
+
+
+def test_sql_transform_matches_pandas_transform(bike_transformer):
+    pandas_df = bike_transformer.transform_data(method="pandas")
+    sql_df = bike_transformer.transform_data(method="sql")
+
+    assert list(sql_df.columns) == SELECTED_COLUMN_TO_KEEP
+    pd.testing.assert_frame_equal(
+        _by_order_line(sql_df), _by_order_line(pandas_df)
+    )
+
+
+def test_cache_hit_and_rebuild_return_the_same_frame(
+    bike_transformer, tmp_path
+):
+    cache_path = Path(tmp_path) / "cache" / "order_lines.parquet"
+
+    rebuilt = bike_transformer.transform_data(
+        method="sql", use_cache=True, cache_path=cache_path
+    )
+    assert cache_path.exists()
+    cached = bike_transformer.transform_data(
+        method="sql", use_cache=True, cache_path=cache_path
+    )
+
+    pd.testing.assert_frame_equal(cached, rebuilt)
+    for column, dtype in cached.dtypes.items():
+        if column in CATEGORICAL_COLUMNS:
+            assert isinstance(dtype, pd.CategoricalDtype), column
+        else:
+            assert isinstance(dtype, pd.ArrowDtype), column
+
+    # Same rows as the uncached transform, only the dtypes differ
+    pd.testing.assert_frame_equal(
+        _by_order_line(cached.astype(object)),
+        _by_order_line(bike_transformer.transform_data(method="sql")).astype(
+            object
+        ),
+    )
+
+
+def test_cache_is_rebuilt_when_the_source_tables_change(
+    bike_transformer, tmp_path
+):
+    cache_path = Path(tmp_path) / "order_lines.parquet"
+    before = bike_transformer.transform_data(
+        method="sql", use_cache=True, cache_path=cache_path
+    )
+
+    order_lines_df = bike_transformer.read_data_from_db(
+        table_name="order_lines"
+    )
+    new_line = order_lines_df.tail(1).assign(
+        order_id=order_lines_df["order_id"].max() + 1
+    )
+    new_line.to_sql(
+        "order_lines",
+        bike_transformer.engine,
+        if_exists="append",
+        index=False,
+    )
+
+    after = bike_transformer.transform_data(
+        method="sql", use_cache=True, cache_path=cache_path
+    )
+
+    assert len(after) == len(before) + 1
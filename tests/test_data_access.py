@@ -0,0 +1,253 @@
+import inspect
+import threading
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
+from sqlalchemy.types import DATETIME, FLOAT, Text
+
+from settings import ENGINE_OPTIONS
+from transformer import data_access
+from transformer.data_access import DataAccess, get_engine
+
+
+@pytest.fixture
+def orders(db_access) -> pd.DataFrame:
+    orders_df = pd.DataFrame(
+        {
+            "order_id": range(1, 11),
+            "quantity": [1, 2] * 5,
+            "customer": list("abcdeabcde"),
+        }
+    )
+    orders_df.to_sql("orders", db_access.engine, index=False)
+
+    return orders_df
+
+
+def test_read_projects_and_filters_in_the_database(db_access, orders):
+    result = db_access.read_data_from_db(
+        table_name="orders",
+        columns=["order_id", "quantity"],
+        where="order_id > :last_id",
+        params={"last_id": 7},
+    )
+
+    expected = orders.loc[orders["order_id"] > 7, ["order_id", "quantity"]]
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True))
+
+
+def test_chunked_read_streams_the_whole_table(db_access, orders):
+    chunks = list(
+        db_access.iter_data_from_db(table_name="orders", chunksize=4)
+    )
+
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), orders)
+
+
+def test_read_of_unknown_table_raises(db_access):
+    with pytest.raises(ValueError, match="does not exist"):
+        db_access.read_data_from_db(table_name="orders")
+
+
+def _stored(db_access, table_name="forecast") -> pd.DataFrame:
+    return (
+        db_access.read_data_from_db(
+            table_name=table_name, parse_dates=["date"]
+        )
+        .sort_values(["id", "date"])
+        .reset_index(drop=True)
+    )
+
+
+def test_bulk_insert_is_the_default_and_types_the_table(
+    db_access, forecast_df
+):
+    signature = inspect.signature(db_access.write_data_to_db)
+    assert signature.parameters["bulk"].default is True
+
+    db_access.write_data_to_db(
+        data=forecast_df, id_column="id", date_column="date"
+    )
+
+    columns = {
+        c["name"]: type(c["type"])
+        for c in sa_inspect(db_access.engine).get_columns("forecast")
+    }
+    assert columns["date"] is DATETIME
+    assert columns["value"] is FLOAT
+    pd.testing.assert_frame_equal(
+        _stored(db_access),
+        forecast_df.sort_values(["id", "date"]).reset_index(drop=True),
+    )
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_bulk_and_to_sql_writes_store_the_same_rows(
+    db_access, forecast_df, bulk
+):
+    db_access.write_data_to_db(
+        data=forecast_df, id_column="id", date_column="date", bulk=bulk
+    )
+
+    pd.testing.assert_frame_equal(
+        _stored(db_access),
+        forecast_df.sort_values(["id", "date"]).reset_index(drop=True),
+    )
+
+
+def test_bulk_write_rejects_to_sql_only_arguments(db_access, forecast_df):
+    with pytest.raises(TypeError, match="method"):
+        db_access.write_data_to_db(
+            data=forecast_df,
+            id_column="id",
+            date_column="date",
+            method="multi",
+        )
+
+    assert not db_access.table_exists("forecast")
+
+
+@pytest.mark.parametrize("paramstyle", ["qmark", "named", "numeric"])
+def test_bulk_write_supports_paramstyles_and_chunks(forecast_df, paramstyle):
+    db_access = DataAccess(
+        engine=create_engine("sqlite://", paramstyle=paramstyle)
+    )
+
+    with db_access.batch():
+        db_access.write_data_to_db(
+            data=forecast_df, id_column="id", date_column="date", chunksize=4
+        )
+        stored = _stored(db_access)
+
+    pd.testing.assert_frame_equal(
+        stored, forecast_df.sort_values(["id", "date"]).reset_index(drop=True)
+    )
+
+
+def test_failed_write_rolls_back(db_access, forecast_df):
+    db_access.write_data_to_db(
+        data=forecast_df, id_column="id", date_column="date"
+    )
+
+    # The second row repeats an (id, date) key of the unique index
+    duplicate = pd.concat([forecast_df.head(1), forecast_df.head(1)])
+    with pytest.raises(IntegrityError):
+        db_access.write_data_to_db(
+            data=duplicate,
+            id_column="id",
+            date_column="date",
+            if_exists="replace",
+        )
+
+    assert len(_stored(db_access)) == len(forecast_df)
+
+
+def test_upsert_updates_inserts_and_keeps_other_rows(db_access, forecast_df):
+    db_access.write_data_to_db(
+        data=forecast_df, id_column="id", date_column="date"
+    )
+
+    # New prediction for an existing key and a month not stored yet
+    update_df = forecast_df[forecast_df["id"] == "Total Revenue"].tail(1)
+    update_df = pd.concat(
+        [
+            update_df.assign(prediction=30.0),
+            update_df.assign(date=pd.Timestamp("2024-04-01"), prediction=40.0),
+        ]
+    )
+    db_access.write_data_to_db(
+        data=update_df, id_column="id", date_column="date", if_exists="upsert"
+    )
+
+    stored = _stored(db_access).set_index(["id", "date"])
+    assert len(stored) == len(forecast_df) + 1
+    total = stored.loc["Total Revenue", "prediction"]
+    assert total.loc["2024-03-01"] == 30.0
+    assert total.loc["2024-04-01"] == 40.0
+    pd.testing.assert_frame_equal(
+        stored.loc[["Category 1: Road"]].reset_index(),
+        forecast_df[forecast_df["id"] == "Category 1: Road"].reset_index(
+            drop=True
+        ),
+    )
+
+
+def test_upsert_creates_the_table(db_access, forecast_df):
+    db_access.write_data_to_db(
+        data=forecast_df,
+        id_column="id",
+        date_column="date",
+        if_exists="upsert",
+    )
+
+    assert len(_stored(db_access)) == len(forecast_df)
+
+
+def test_upsert_matches_dates_of_text_date_columns(db_access, forecast_df):
+    # Tables written before SQL_DTYPES stored the dates as text
+    forecast_df.to_sql(
+        "forecast", db_access.engine, index=False, dtype={"date": Text()}
+    )
+
+    db_access.write_data_to_db(
+        data=forecast_df.assign(prediction=1.0),
+        id_column="id",
+        date_column="date",
+        if_exists="upsert",
+    )
+
+    stored = _stored(db_access)
+    assert len(stored) == len(forecast_df)
+    assert (stored["prediction"] == 1.0).all()
+
+
+def test_engines_are_shared_per_url_and_options(tmp_path):
+    url = f"sqlite:///{tmp_path}/shared.sqlite"
+
+    assert get_engine(url) is get_engine(url)
+    assert get_engine(url) is not get_engine(url, pool_size=2)
+    assert get_engine(url).pool.size() == ENGINE_OPTIONS["pool_size"]
+
+
+def test_pool_options_follow_the_pool_class():
+    # SingletonThreadPool takes no max_overflow, create_engine would raise
+    engine = get_engine("sqlite://")
+    assert isinstance(engine.pool, SingletonThreadPool)
+
+    engine = get_engine("sqlite://", poolclass=StaticPool)
+    assert isinstance(engine.pool, StaticPool)
+
+
+def test_table_names_are_reread_after_an_external_drop(
+    db_access, orders, monkeypatch
+):
+    assert db_access.table_exists("orders")
+
+    with db_access.engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE orders")
+    assert db_access.table_exists("orders")
+
+    monkeypatch.setattr(data_access, "TABLE_NAMES_TTL", 0)
+    assert not db_access.table_exists("orders")
+
+
+def test_batch_connection_is_shared_within_a_thread_only(db_access, orders):
+    with db_access.batch() as conn:
+        assert db_access._batch_conn is conn
+        with db_access.batch() as nested:
+            assert nested is conn
+
+        other = {}
+        thread = threading.Thread(
+            target=lambda: other.update(conn=db_access._batch_conn)
+        )
+        thread.start()
+        thread.join()
+        assert other["conn"] is None
+
+    assert db_access._batch_conn is None
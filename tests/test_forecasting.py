@@ -0,0 +1,262 @@
+import time
+from datetime import datetime, timedelta
+from typing import Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from path import Path
+from sktime.forecasting.arima import ARIMA, AutoARIMA
+
+from transformer.forecasting import Forecaster, RoutingPolicy
+from transformer.model_store import CachedModel, ModelStore
+
+
+def test_backends_return_identical_forecasts(quarterly_panel):
+    forecasts = [
+        Forecaster(
+            data=quarterly_panel, h=4, sp=3, backend=backend, n_jobs=2
+        ).forecast()
+        for backend in ("serial", "threads")
+    ]
+
+    pd.testing.assert_frame_equal(*forecasts)
+
+
+def test_failing_series_is_reported_not_raised(quarterly_panel):
+    data = quarterly_panel.copy()
+    data[("total_price", "Shop B")] = np.nan
+
+    forecaster = Forecaster(data=data, h=4, sp=3)
+    forecast_df = forecaster.forecast()
+
+    assert list(forecaster.errors) == [("total_price", "Shop B")]
+    assert set(forecast_df["bikeshop_name"]) == {"Shop A", "Shop C"}
+
+
+def test_all_series_failing_raises(quarterly_panel):
+    data = quarterly_panel.iloc[:, :1] * np.nan
+
+    with pytest.raises(RuntimeError, match="All series failed"):
+        Forecaster(data=data, h=4, sp=3).forecast()
+
+
+def _store_entries(store: ModelStore) -> dict:
+    # A put replaces the file, a cache hit keeps its inode
+    return {path.name: path.stat().st_ino for path in store.path.files()}
+
+
+def test_cached_model_is_reused_for_identical_fit_settings(
+    quarterly_panel, tmp_path
+):
+    store = ModelStore(path=Path(tmp_path) / "models")
+    data = quarterly_panel.iloc[:, :1]
+
+    first = Forecaster(data=data, h=4, sp=3, model_store=store).forecast()
+    entries = _store_entries(store)
+    second = Forecaster(data=data, h=4, sp=3, model_store=store).forecast()
+
+    assert len(entries) == 1
+    assert _store_entries(store) == entries
+    pd.testing.assert_frame_equal(first, second)
+
+
+@pytest.mark.parametrize(
+    "settings, kwargs",
+    [
+        ({"h": 2}, {}),
+        ({"alpha": 0.8}, {}),
+        ({"store_namespace": "other level"}, {}),
+        ({}, {"start_p": 0, "start_q": 0, "max_p": 1, "max_q": 1}),
+    ],
+)
+def test_cache_key_includes_fit_settings_and_namespace(
+    quarterly_panel, tmp_path, settings, kwargs
+):
+    store = ModelStore(path=Path(tmp_path) / "models")
+    data = quarterly_panel.iloc[:, :1]
+
+    Forecaster(data=data, h=4, sp=3, model_store=store).forecast()
+    Forecaster(
+        data=data, model_store=store, **{"h": 4, "sp": 3, **settings}
+    ).forecast(**kwargs)
+
+    assert len(_store_entries(store)) == 2
+
+
+def test_model_store_evicts_least_recently_used(tmp_path):
+    store = ModelStore(path=Path(tmp_path) / "models", max_entries=2)
+    entry = CachedModel(
+        model=None,
+        order=(1, 0, 0),
+        seasonal_order=(0, 0, 0, 0),
+        aic_per_obs=1.0,
+        searched_at=datetime.now(),
+    )
+
+    for i, series_id in enumerate(["a", "b", "c"]):
+        store.put(series_id, "config", f"v{i}", entry)
+        # mtime resolution, keep the use order unambiguous
+        time.sleep(0.01)
+
+    assert store.get("a", "config", "v0") is None
+    assert store.get("c", "config", "v2") is not None
+    assert store.latest("b", "config") is not None
+    assert store.latest("b", "other config") is None
+
+
+def test_routing_classifies_by_length_sparsity_and_share():
+    index = pd.period_range("2015Q1", periods=24, freq="Q")
+    data = pd.DataFrame(
+        {
+            "large": np.full(24, 100.0),
+            "small": np.full(24, 5.0),
+            "new": np.r_[np.zeros(16), np.full(8, 50.0)],
+            "sparse": np.tile([20.0, 0.0], 12),
+        },
+        index=index,
+    )
+
+    routes_df = RoutingPolicy(full_search_share=0.3).classify(data, sp=3)
+
+    assert routes_df["route"].to_dict() == {
+        "large": "arima_full",
+        "small": "arima_restricted",
+        "new": "baseline",
+        "sparse": "baseline",
+    }
+    # Leading zeros are not counted against a new series
+    assert routes_df.loc["new", "length"] == 8
+    assert routes_df.loc["new", "zero_fraction"] == 0.0
+
+
+def test_route_does_not_depend_on_the_other_columns(quarterly_panel):
+    routing = RoutingPolicy(full_search_share=0.3)
+    total = float(quarterly_panel.sum().sum())
+    routes_df = routing.classify(quarterly_panel, sp=3)
+
+    for column in quarterly_panel.columns:
+        alone_df = routing.classify(
+            quarterly_panel[[column]], sp=3, total=total
+        )
+        pd.testing.assert_frame_equal(alone_df, routes_df.loc[[column]])
+
+    # Alone, a series would hold the whole revenue and get the full search
+    assert "arima_restricted" in routes_df["route"].tolist()
+
+
+def test_auto_method_forecasts_every_route(quarterly_panel):
+    data = quarterly_panel.copy()
+    data.iloc[:20, 2] = 0.0
+
+    forecaster = Forecaster(
+        data=data,
+        h=4,
+        sp=3,
+        method="auto",
+        routing=RoutingPolicy(full_search_share=0.5),
+    )
+    forecast_df = forecaster.forecast()
+
+    assert forecaster.routes["route"].tolist() == [
+        "arima_restricted",
+        "arima_full",
+        "baseline",
+    ]
+    assert (forecaster.routes["status"] == "ok").all()
+    assert set(forecast_df["bikeshop_name"]) == {"Shop A", "Shop B", "Shop C"}
+
+
+def test_cached_models_are_keyed_by_route(quarterly_panel, tmp_path):
+    store = ModelStore(path=Path(tmp_path) / "models")
+    data = quarterly_panel.iloc[:, :2]
+    forecaster = Forecaster(data=data, h=4, sp=3, model_store=store)
+
+    assert forecaster._store_config("arima_full") != forecaster._store_config(
+        "arima_restricted"
+    )
+
+    # The same series, once through each AutoARIMA route: every series
+    # has less than the whole revenue, so none gets the full search
+    forecaster.forecast()
+    Forecaster(
+        data=data,
+        h=4,
+        sp=3,
+        method="auto",
+        routing=RoutingPolicy(full_search_share=1.0, restricted_arima={}),
+        model_store=store,
+    ).forecast()
+
+    assert len(_store_entries(store)) == 4
+
+
+def _only_entry(store: ModelStore) -> Tuple[Path, CachedModel]:
+    (file_path,) = store.path.files()
+    return file_path, joblib.load(file_path)
+
+
+@pytest.fixture
+def warm_store(quarterly_panel, tmp_path) -> ModelStore:
+    """Store holding a searched model of the first series, one quarter ago."""
+    store = ModelStore(path=Path(tmp_path) / "models")
+    Forecaster(
+        data=quarterly_panel.iloc[:-1, :1], h=4, sp=3, model_store=store
+    ).forecast()
+
+    return store
+
+
+def _warm_refit(data: pd.DataFrame, store: ModelStore, **kwargs):
+    """Refits the series on one more quarter, warm started."""
+    Forecaster(
+        data=data.iloc[:, :1],
+        h=4,
+        sp=3,
+        model_store=store,
+        warm_start=True,
+        **kwargs,
+    ).forecast()
+
+    return _only_entry(store)[1]
+
+
+def test_warm_start_refits_the_cached_orders(quarterly_panel, warm_store):
+    _, searched = _only_entry(warm_store)
+
+    refit = _warm_refit(quarterly_panel, warm_store)
+
+    assert isinstance(searched.model, AutoARIMA)
+    assert isinstance(refit.model, ARIMA)
+    assert refit.order == searched.order
+    assert refit.seasonal_order == searched.seasonal_order
+    # The orders still come from the original search
+    assert refit.searched_at == searched.searched_at
+
+
+def test_warm_start_searches_again_once_the_search_is_old(
+    quarterly_panel, warm_store
+):
+    file_path, searched = _only_entry(warm_store)
+    searched.searched_at = datetime.now() - timedelta(days=10)
+    joblib.dump(searched, file_path)
+
+    refit = _warm_refit(quarterly_panel, warm_store, search_max_age_days=7)
+
+    assert isinstance(refit.model, AutoARIMA)
+    assert refit.searched_at > searched.searched_at + timedelta(days=9)
+
+
+def test_warm_start_searches_again_when_the_fit_degrades(
+    quarterly_panel, warm_store
+):
+    file_path, searched = _only_entry(warm_store)
+    # Pretend the search found a far better fit than the orders give now
+    searched.aic_per_obs -= 10 * abs(searched.aic_per_obs)
+    joblib.dump(searched, file_path)
+
+    refit = _warm_refit(quarterly_panel, warm_store, degradation_tolerance=0.1)
+
+    assert isinstance(refit.model, AutoARIMA)
+    assert refit.searched_at > searched.searched_at
@@ -0,0 +1,158 @@
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from path import Path
+
+from transformer.pipeline import Pipeline, Stage
+
+
+@pytest.fixture
+def checkpoint_dir(tmp_path) -> Path:
+    return Path(tmp_path) / "checkpoints"
+
+
+def _age_run(run_dir: Path, seconds: float) -> None:
+    """Backdates every file of a run directory by `seconds`."""
+    timestamp = time.time() - seconds
+    for file_path in run_dir.files():
+        os.utime(file_path, (timestamp, timestamp))
+
+
+def test_cycles_and_unknown_dependencies_are_rejected(checkpoint_dir):
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline(
+            stages=[
+                Stage(name="a", func=lambda c: c, depends_on=["c"]),
+                Stage(name="b", func=lambda a: a, depends_on=["a"]),
+                Stage(name="c", func=lambda b: b, depends_on=["b"]),
+            ],
+            checkpoint_dir=checkpoint_dir,
+        )
+
+    with pytest.raises(ValueError, match="unknown"):
+        Pipeline(
+            stages=[Stage(name="a", func=lambda b: b, depends_on=["b"])],
+            checkpoint_dir=checkpoint_dir,
+        )
+
+
+def test_failed_stage_blocks_only_its_dependents(checkpoint_dir):
+    def fail():
+        raise RuntimeError("boom")
+
+    pipeline = Pipeline(
+        stages=[
+            Stage(name="source", func=lambda: 1),
+            Stage(name="broken", func=fail, depends_on=["source"]),
+            Stage(name="after", func=lambda broken: 0, depends_on=["broken"]),
+            Stage(
+                name="other",
+                func=lambda source: source + 1,
+                depends_on=["source"],
+            ),
+        ],
+        checkpoint_dir=checkpoint_dir,
+    )
+
+    state = pipeline.run()
+
+    assert {name: entry["status"] for name, entry in state.items()} == {
+        "source": "done",
+        "broken": "failed",
+        "after": "blocked",
+        "other": "done",
+    }
+    assert not pipeline.succeeded
+    assert pipeline.output("other") == 2
+
+
+def test_resume_reruns_only_unfinished_stages(checkpoint_dir):
+    calls = []
+    healthy = False
+
+    def source():
+        calls.append("source")
+        return 1
+
+    def flaky(source):
+        calls.append("flaky")
+        if not healthy:
+            raise RuntimeError("boom")
+        return source + 1
+
+    def make_pipeline(**kwargs) -> Pipeline:
+        return Pipeline(
+            stages=[
+                Stage(name="source", func=source),
+                Stage(name="flaky", func=flaky, depends_on=["source"]),
+            ],
+            checkpoint_dir=checkpoint_dir,
+            **kwargs,
+        )
+
+    first = make_pipeline()
+    first.run()
+
+    healthy = True
+    second = make_pipeline()
+    second.run()
+
+    assert second.run_id == first.run_id
+    assert second.succeeded
+    assert second.output("flaky") == 2
+    assert calls == ["source", "flaky", "flaky"]
+
+    # A finished run is never resumed
+    assert second._unfinished_run() is None
+
+
+def test_old_unfinished_runs_are_not_resumed(checkpoint_dir):
+    def fail():
+        raise RuntimeError("boom")
+
+    stages = [
+        Stage(name="source", func=lambda: 1),
+        Stage(name="broken", func=fail),
+    ]
+
+    first = Pipeline(
+        stages=stages, checkpoint_dir=checkpoint_dir, run_id="old"
+    )
+    first.run()
+    _age_run(first.run_dir, seconds=3 * 3600)
+
+    resumed = Pipeline(
+        stages=stages,
+        checkpoint_dir=checkpoint_dir,
+        resume_max_age=timedelta(hours=4),
+    )
+    fresh = Pipeline(
+        stages=stages,
+        checkpoint_dir=checkpoint_dir,
+        resume_max_age=timedelta(hours=2),
+    )
+
+    assert resumed.run_id == "old"
+    assert fresh.run_id != "old"
+
+
+def test_finished_runs_prune_the_oldest(checkpoint_dir):
+    stages = [Stage(name="source", func=lambda: 1)]
+
+    for i, run_id in enumerate(["first", "second", "third"]):
+        pipeline = Pipeline(
+            stages=stages,
+            checkpoint_dir=checkpoint_dir,
+            run_id=run_id,
+            keep_runs=2,
+        )
+        pipeline.run()
+        # Older runs started earlier
+        _age_run(pipeline.run_dir, seconds=100 * (3 - i))
+
+    assert sorted(run_dir.name for run_dir in checkpoint_dir.dirs()) == [
+        "second",
+        "third",
+    ]
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+from path import Path
+
+from my_pandas_extension.plot_forecast import (
+    downsample_forecast_data,
+    lttb_indices,
+    minmax_indices,
+    plot_forecast,
+    prepare_forecast_data,
+    render_forecast_panels,
+)
+
+
+def test_prepare_forecast_data_matches_melt(forecast_df):
+    expected = forecast_df.melt(
+        id_vars=["id", "date", "ci_lo", "ci_hi"],
+        value_vars=["value", "prediction"],
+        value_name="stacked",
+    ).rename(columns={"stacked": "value"})
+    # Facets ordered by the mean of both series, largest first
+    order = expected.groupby("id")["value"].mean().sort_values(ascending=False)
+    expected["id"] = pd.Categorical(
+        expected["id"], categories=order.index.tolist()
+    )
+    expected["variable"] = pd.Categorical(
+        expected["variable"], categories=["prediction", "value"]
+    )
+
+    prepared_df = prepare_forecast_data(forecast_df, "id", "date")
+
+    assert prepared_df["id"].cat.categories.tolist() == [
+        "Category 1: Road",
+        "Total Revenue",
+    ]
+    pdt.assert_frame_equal(prepared_df, expected.loc[:, prepared_df.columns])
+
+
+def test_prepare_forecast_data_converts_periods(forecast_df):
+    period_df = forecast_df.assign(date=forecast_df["date"].dt.to_period("M"))
+
+    prepared_df = prepare_forecast_data(period_df, "id", "date")
+
+    pdt.assert_series_equal(
+        prepared_df["date"],
+        prepare_forecast_data(forecast_df, "id", "date")["date"],
+    )
+
+
+def test_panels_of_colliding_ids_get_distinct_files(tmp_path, forecast_df):
+    ids = {"Total Revenue": "Bikeshop: A", "Category 1: Road": "Bikeshop_ A"}
+    panel_df = pd.concat(
+        [
+            forecast_df.replace({"id": ids}),
+            forecast_df.query("id == 'Total Revenue'").assign(id="Plain"),
+        ]
+    )
+
+    file_paths = render_forecast_panels(panel_df, "id", "date", tmp_path)
+
+    assert len(set(file_paths)) == 3
+    assert all(file_path.exists() for file_path in file_paths)
+    # Ids that need no sanitizing keep their name
+    assert Path(tmp_path) / "Plain.png" in file_paths
+
+
+def test_matplotlib_backend_shares_axes_around_an_empty_panel(forecast_df):
+    empty_df = forecast_df.query("id == 'Total Revenue'").assign(
+        id="Empty", value=np.nan, prediction=np.nan, ci_lo=np.nan, ci_hi=np.nan
+    )
+
+    figure = plot_forecast(
+        pd.concat([forecast_df, empty_df]),
+        "id",
+        "date",
+        facet_ncol=2,
+        facet_scales=None,
+        date_breaks="1 month",
+        backend="matplotlib",
+    )
+
+    axes = [ax for ax in figure.axes if ax.get_visible()]
+    assert len(axes) == 3
+    assert len({ax.get_ylim() for ax in axes}) == 1
+    assert all(np.isfinite(axes[0].get_ylim()))
+    # Dates are shown under the last panel of each column only
+    assert [ax.xaxis.get_tick_params()["labelbottom"] for ax in axes] == [
+        False,
+        True,
+        True,
+    ]
+    assert [ax.yaxis.get_tick_params()["labelleft"] for ax in axes] == [
+        True,
+        False,
+        True,
+    ]
+
+
+def test_matplotlib_backend_draws_only_empty_panels(forecast_df):
+    empty_df = forecast_df.assign(
+        value=np.nan, prediction=np.nan, ci_lo=np.nan, ci_hi=np.nan
+    )
+
+    figure = plot_forecast(
+        empty_df, "id", "date", date_breaks="1 month", backend="matplotlib"
+    )
+
+    assert len(figure.axes) == 2
+
+
+@pytest.fixture
+def long_history_df() -> pd.DataFrame:
+    """Prepared frame of one id with 500 history and 3 forecast points."""
+    dates = pd.date_range("2000-01-01", periods=503, freq="D")
+    value = np.sin(np.arange(503) / 10.0)
+    value[250] = 10.0
+    value[500:] = np.nan
+    prediction = np.full(503, np.nan)
+    prediction[500:] = 1.0
+
+    return prepare_forecast_data(
+        pd.DataFrame(
+            {
+                "id": "Total Revenue",
+                "date": dates,
+                "value": value,
+                "prediction": prediction,
+                "ci_lo": prediction - 1,
+                "ci_hi": prediction + 1,
+            }
+        ),
+        "id",
+        "date",
+    )
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+@pytest.mark.parametrize("max_points", [4, 5, 50])
+def test_downsampling_keeps_the_budget_ends_and_peak(
+    long_history_df, method, max_points
+):
+    downsampled_df = downsample_forecast_data(
+        long_history_df, "id", "date", max_points, method
+    )
+
+    history_df = downsampled_df[downsampled_df["variable"] == "value"]
+    history_df = history_df.dropna(subset=["value"])
+    assert len(history_df) <= max_points
+    assert history_df["date"].iloc[[0, -1]].tolist() == [
+        pd.Timestamp("2000-01-01"),
+        pd.Timestamp("2000-01-01") + pd.Timedelta(days=499),
+    ]
+    assert history_df["value"].max() == 10.0
+    # Forecast rows are never dropped
+    assert (downsampled_df["variable"] == "prediction").sum() == 503
+
+
+def test_downsampling_rejects_tiny_budgets(long_history_df):
+    with pytest.raises(ValueError):
+        downsample_forecast_data(long_history_df, "id", "date", 3)
+    with pytest.raises(ValueError):
+        lttb_indices(np.arange(10.0), np.arange(10.0), 2)
+    with pytest.raises(ValueError):
+        minmax_indices(np.arange(10.0), 3)
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from helper.profiling import frame_stats, profile, profiled, profiling
+
+
+@profiled("countdown")
+def countdown(data: pd.DataFrame, n: int) -> pd.DataFrame:
+    return data if n == 0 else countdown(data.iloc[1:], n - 1)
+
+
+@pytest.fixture
+def text_df() -> pd.DataFrame:
+    return pd.DataFrame({"id": [f"Bikeshop: {i:04d}" for i in range(100)]})
+
+
+def test_profiling_is_off_by_default(profile_records, text_df):
+    countdown(text_df, 3)
+    with profile("block"):
+        pass
+
+    assert profile_records == []
+    assert frame_stats(text_df) == {}
+
+
+def test_only_the_outermost_call_is_recorded(profile_records, text_df):
+    with profiling():
+        countdown(text_df, 3)
+
+    assert len(profile_records) == 1
+    assert profile_records[0]["stage"] == "countdown"
+    assert profile_records[0]["status"] == "ok"
+    assert profile_records[0]["rows_in"] == 100
+    assert profile_records[0]["rows_out"] == 97
+
+
+def test_deep_mode_counts_object_bytes(text_df):
+    with profiling():
+        shallow = frame_stats(text_df)
+    with profiling(deep=True):
+        deep = frame_stats(text_df)
+
+    assert shallow["rows"] == deep["rows"] == 100
+    assert deep["bytes"] > shallow["bytes"]
+
+
+def test_failing_block_is_recorded_as_error(profile_records):
+    with (
+        pytest.raises(RuntimeError),
+        profiling(),
+        profile("block", table="forecast"),
+    ):
+        raise RuntimeError("boom")
+
+    assert len(profile_records) == 1
+    assert profile_records[0]["status"] == "error"
+    assert profile_records[0]["table"] == "forecast"
@@ -0,0 +1,263 @@
+import json
+import os
+import queue
+import time
+
+import nbformat
+import pandas as pd
+import pytest
+from path import Path
+
+from helper.profiling import profiling
+from transformer.kernel_pool import KernelPool
+from transformer.report_manifest import ReportManifest
+from transformer.run_reports import ReportBatch, RunReport, _render_report
+
+
+def _write_template(file_path: Path, source: str) -> Path:
+    """Notebook with a papermill parameters cell followed by `source`."""
+    parameters = nbformat.v4.new_code_cell(
+        'ids = []\ndata_path = ""\ntitle = ""'
+    )
+    parameters.metadata["tags"] = ["parameters"]
+
+    notebook = nbformat.v4.new_notebook()
+    notebook.cells = [parameters, nbformat.v4.new_code_cell(source)]
+    # Fixed cell ids, so the same source always gives the same template
+    for i, cell in enumerate(notebook.cells):
+        cell.id = f"cell-{i}"
+    notebook.metadata["kernelspec"] = {
+        "name": "python3",
+        "display_name": "Python 3",
+        "language": "python",
+    }
+    nbformat.write(notebook, file_path)
+
+    return file_path
+
+
+@pytest.fixture
+def report_kwargs(tmp_path, forecast_df):
+    """RunReport arguments writing every output below `tmp_path`."""
+    tmp_path = Path(tmp_path)
+
+    def _report_kwargs(source: str = "pass", **kwargs) -> dict:
+        return {
+            "data": forecast_df,
+            "report_info": "Category 1",
+            "template_path": _write_template(
+                tmp_path / "template.ipynb", source
+            ),
+            "output_path": str(tmp_path / "report.ipynb"),
+            "data_dir_path": tmp_path / "data",
+            "manifest": ReportManifest(path=tmp_path / "manifest"),
+            **kwargs,
+        }
+
+    return _report_kwargs
+
+
+@pytest.fixture
+def make_report(report_kwargs):
+    def _make_report(source: str = "pass", **kwargs) -> RunReport:
+        return RunReport(**report_kwargs(source, **kwargs))
+
+    return _make_report
+
+
+def test_build_param_hands_off_only_the_report_rows(make_report):
+    report = make_report()
+
+    params = report.build_param()
+
+    assert params["ids"] == ["Category 1: Road"]
+    assert Path(params["data_path"]).isabs()
+    report_df = pd.read_parquet(params["data_path"])
+    assert report_df["id"].unique().tolist() == ["Category 1: Road"]
+    assert len(report_df) == 3
+    # Only the path travels through the notebook parameters
+    assert set(params) == {"ids", "data_path", "title"}
+
+
+def test_notebook_reads_its_data_from_the_parquet(make_report):
+    report = make_report(
+        "import pandas as pd\n"
+        "df = pd.read_parquet(data_path)\n"
+        "assert df['id'].unique().tolist() == ids\n"
+    )
+
+    report.execute()
+
+    assert Path(report.output_path).exists()
+
+
+def test_cell_timeout_is_reported_as_timeout(report_kwargs):
+    kwargs = report_kwargs("import time\ntime.sleep(60)", execution_timeout=2)
+    results = queue.Queue()
+
+    start = time.perf_counter()
+    _render_report(kwargs, results)
+
+    summary = results.get_nowait()
+    assert summary["status"] == "timeout"
+    assert time.perf_counter() - start < 30
+
+
+def test_pooled_kernel_is_reused_with_a_clean_namespace():
+    with KernelPool(size=1, warm_imports="import os") as pool:
+        with pool.acquire() as km:
+            first_pid = km.provisioner.pid
+            pool._run(km, "leftover = 1")
+
+        with pool.acquire() as km:
+            assert km.provisioner.pid == first_pid
+            # Raises when the previous report's variable survived the reset
+            pool._run(km, "assert 'leftover' not in globals()")
+
+
+def test_pooled_reports_execute(make_report):
+    with KernelPool(size=1, warm_imports="") as pool:
+        for source in [
+            "report_value = 1",
+            "assert 'report_value' not in dir()",
+        ]:
+            make_report(source, force=True).execute(kernel_pool=pool)
+
+
+def test_input_hash_ignores_other_reports_rows(make_report, forecast_df):
+    other_changed_df = forecast_df.assign(
+        value=forecast_df["value"].where(
+            forecast_df["id"] != "Total Revenue", 0.0
+        )
+    )
+    own_changed_df = forecast_df.assign(
+        value=forecast_df["value"].where(
+            forecast_df["id"] != "Category 1: Road", 0.0
+        )
+    )
+
+    input_hash = make_report().input_hash()
+
+    assert make_report(data=other_changed_df).input_hash() == input_hash
+    assert make_report(data=own_changed_df).input_hash() != input_hash
+    assert make_report(title="Other").input_hash() != input_hash
+
+
+def test_unchanged_report_is_not_executed_again(make_report, forecast_df):
+    assert not make_report().execute().skipped
+    assert make_report().execute().skipped
+    assert not make_report(force=True).execute().skipped
+
+    changed_df = forecast_df.assign(value=forecast_df["value"] + 1)
+    assert not make_report(data=changed_df).execute().skipped
+
+
+def test_manifest_needs_matching_hash_and_output(tmp_path):
+    manifest = ReportManifest(path=Path(tmp_path) / "manifest")
+    output = Path(tmp_path) / "report.html"
+    output.write_text("")
+
+    assert not manifest.is_current("report", "html", "abc", output)
+
+    manifest.record("report", "html", "abc")
+
+    assert manifest.is_current("report", "html", "abc", output)
+    assert not manifest.is_current("report", "html", "def", output)
+    assert not manifest.is_current("report", "pdf", "abc", output)
+
+    output.remove()
+    assert not manifest.is_current("report", "html", "abc", output)
+
+
+@pytest.fixture
+def repo_on_pythonpath(monkeypatch):
+    # Pooled kernels import the report libraries, batch workers and their
+    # kernels inherit the environment
+    monkeypatch.setenv(
+        "PYTHONPATH", str(Path(__file__).absolute().parent.parent)
+    )
+
+
+class _TemplateBatch(ReportBatch):
+    """ReportBatch rendering a test template below `tmp_path`."""
+
+    tmp_path: Path
+    source: str
+
+    def _report_kwargs(self, report_info: str) -> dict:
+        file_name = report_info.lower().replace(" ", "_")
+        return {
+            **super()._report_kwargs(report_info),
+            "template_path": _write_template(
+                self.tmp_path / "template.ipynb", self.source
+            ),
+            "output_path": str(self.tmp_path / f"{file_name}.ipynb"),
+            "data_dir_path": self.tmp_path / "data",
+            "manifest": ReportManifest(path=self.tmp_path / "manifest"),
+        }
+
+
+# Writes the pid of the kernel next to the report data
+KERNEL_PID_SOURCE = (
+    "import os\nopen(data_path + '.pid', 'w').write(str(os.getpid()))"
+)
+
+
+@pytest.mark.parametrize("warm_kernels, n_kernels", [(True, 1), (False, 2)])
+def test_batch_workers_reuse_a_warm_kernel(
+    tmp_path, forecast_df, repo_on_pythonpath, warm_kernels, n_kernels
+):
+    tmp_path = Path(tmp_path)
+
+    summary_df = _TemplateBatch(
+        data=forecast_df,
+        report_infos=["Total Revenue", "Category 1"],
+        n_jobs=1,
+        warm_kernels=warm_kernels,
+        tmp_path=tmp_path,
+        source=KERNEL_PID_SOURCE,
+    ).run()
+
+    assert summary_df["status"].tolist() == ["ok", "ok"]
+    kernel_pids = {
+        file_path.read_text()
+        for file_path in (tmp_path / "data").files("*.pid")
+    }
+    assert len(kernel_pids) == n_kernels
+
+
+def test_batch_failure_does_not_stop_the_worker(
+    tmp_path, forecast_df, repo_on_pythonpath
+):
+    summary_df = _TemplateBatch(
+        data=forecast_df,
+        report_infos=["Total Revenue", "Category 1"],
+        n_jobs=1,
+        tmp_path=Path(tmp_path),
+        source="assert 'Category' in title",
+    ).run()
+
+    assert summary_df["status"].tolist() == ["failed", "ok"]
+
+
+def test_profiled_batch_writes_the_records_of_its_workers(
+    tmp_path, forecast_df, repo_on_pythonpath
+):
+    # Written by the `Log` of every process, relative to the working
+    # directory the workers inherit
+    profile_path = Path("logs/profile/profile.jsonl")
+    n_lines = len(profile_path.lines()) if profile_path.exists() else 0
+
+    with profiling():
+        _TemplateBatch(
+            data=forecast_df,
+            report_infos=["Total Revenue", "Category 1"],
+            n_jobs=1,
+            tmp_path=Path(tmp_path),
+            source="pass",
+        ).run()
+
+    records = [json.loads(line) for line in profile_path.lines()[n_lines:]]
+    executed = [r for r in records if r["stage"] == "RunReport.execute"]
+    assert [r["status"] for r in executed] == ["ok", "ok"]
+    assert all(r["pid"] != os.getpid() and r["pooled"] for r in executed)
@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+import pandas.testing as pdt
+import pytest
+from path import Path
+
+from benchmarks.synthetic import make_bike_tables, write_bike_database
+
+REPO_ROOT = Path(__file__).absolute().parent.parent
+
+
+@pytest.fixture
+def tables() -> dict:
+    return make_bike_tables(n_shops=3, n_models=5, years=1)
+
+
+def test_tables_are_reproducible(tables):
+    for table_name, df in make_bike_tables(
+        n_shops=3, n_models=5, years=1
+    ).items():
+        pdt.assert_frame_equal(df, tables[table_name])
+
+
+def test_existing_database_is_only_replaced_on_request(tmp_path, tables):
+    database_path = Path(tmp_path) / "bikes.sqlite"
+    database_path.write_bytes(b"not a database")
+
+    with pytest.raises(FileExistsError):
+        write_bike_database(tables, database_path)
+    assert database_path.read_bytes() == b"not a database"
+
+    write_bike_database(tables, database_path, overwrite=True)
+    assert database_path.read_bytes().startswith(b"SQLite format 3")
+
+
+def test_cli_needs_force_to_replace(tmp_path):
+    database_path = Path(tmp_path) / "bikes.sqlite"
+    database_path.write_bytes(b"not a database")
+
+    def write(*flags: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, "-m", "benchmarks.synthetic", database_path]
+            + ["--shops", "3", "--models", "5", "--years", "1", *flags],
+            cwd=REPO_ROOT,
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+
+    refused = write()
+    assert refused.returncode == 2
+    assert "--force" in refused.stderr
+    assert database_path.read_bytes() == b"not a database"
+
+    assert write("--force").returncode == 0
+    assert database_path.read_bytes().startswith(b"SQLite format 3")
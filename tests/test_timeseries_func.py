@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+
+from my_pandas_extension.timeseries_func import (
+    detect_outliers,
+    detect_outliers_by_group,
+    detect_outliers_rolling,
+    summarize_by_time,
+    summarize_hierarchy,
+)
+from my_pandas_extension.validation import is_trusted, trusted_mode
+
+
+@pytest.fixture
+def order_lines() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 2_000
+
+    return pd.DataFrame(
+        {
+            "order_date": pd.Timestamp("2019-01-01")
+            + pd.to_timedelta(rng.integers(0, 3 * 365 * 24, n), unit="h"),
+            "category_1": rng.choice(["Mountain", "Road"], n),
+            "bikeshop_name": rng.choice(["Shop A", "Shop B", "Shop C"], n),
+            "total_price": rng.integers(100, 10_000, n),
+        }
+    )
+
+
+LEVELS = [(None, "MS"), (["category_1"], "MS"), (["bikeshop_name"], "Q")]
+
+
+def _per_level(data, time_format="timestamp"):
+    return [
+        summarize_by_time(
+            data,
+            value_column=["total_price"],
+            date_column="order_date",
+            groups=groups,
+            rules=rule,
+            time_format=time_format,
+        )
+        for groups, rule in LEVELS
+    ]
+
+
+def _hierarchy(data, time_format="timestamp"):
+    return summarize_hierarchy(
+        data,
+        value_column=["total_price"],
+        date_column="order_date",
+        grouping_sets=[groups for groups, _ in LEVELS],
+        rules=[rule for _, rule in LEVELS],
+        time_format=time_format,
+    )
+
+
+@pytest.mark.parametrize("time_format", ["timestamp", "period"])
+def test_hierarchy_matches_one_summary_per_level(order_lines, time_format):
+    for expected, result in zip(
+        _per_level(order_lines, time_format),
+        _hierarchy(order_lines, time_format),
+    ):
+        pd.testing.assert_frame_equal(
+            result, expected, check_freq=False, check_dtype=False
+        )
+
+
+def test_hierarchy_buckets_tz_aware_dates_on_local_time(order_lines):
+    data = order_lines.assign(
+        order_date=order_lines["order_date"].dt.tz_localize("US/Eastern")
+    )
+
+    for expected, result in zip(_per_level(data), _hierarchy(data)):
+        assert str(result.index.tz) == "US/Eastern"
+        pd.testing.assert_frame_equal(
+            result, expected, check_freq=False, check_dtype=False
+        )
+
+
+def test_hierarchy_requires_one_rule_per_level(order_lines):
+    with pytest.raises(ValueError, match="one rule per grouping set"):
+        summarize_hierarchy(
+            order_lines,
+            value_column=["total_price"],
+            date_column="order_date",
+            grouping_sets=[None, ["category_1"]],
+            rules=["MS"],
+        )
+
+
+def test_categorical_groups_only_keep_observed_labels(order_lines):
+    road_df = order_lines[order_lines["category_1"] == "Road"]
+    categorical_df = order_lines.astype({"category_1": "category"})[
+        order_lines["category_1"] == "Road"
+    ]
+
+    expected = summarize_by_time(
+        road_df,
+        value_column=["total_price"],
+        date_column="order_date",
+        groups=["category_1"],
+        rules="MS",
+    )
+    result = summarize_by_time(
+        categorical_df,
+        value_column=["total_price"],
+        date_column="order_date",
+        groups=["category_1"],
+        rules="MS",
+    )
+
+    # Unused categories (Mountain) must not become all-zero columns
+    assert result.columns.tolist() == expected.columns.tolist()
+    pd.testing.assert_frame_equal(
+        result.set_axis(expected.columns, axis=1), expected, check_freq=False
+    )
+
+
+@pytest.mark.parametrize("how", ["both", "upper", "lower"])
+def test_outliers_by_group_match_per_group_detection(order_lines, how):
+    # A spike and a drop every 200 rows
+    spikes = np.select(
+        [order_lines.index % 200 == 0, order_lines.index % 200 == 100],
+        [1_000_000, -1_000_000],
+        order_lines["total_price"],
+    )
+    data = order_lines.assign(total_price=spikes)
+
+    flags = detect_outliers_by_group(
+        data, "total_price", ["category_1", "bikeshop_name"], how=how
+    )
+
+    expected = pd.concat(
+        [
+            detect_outliers(group_df["total_price"], how=how)
+            for _, group_df in data.groupby(["category_1", "bikeshop_name"])
+        ]
+    ).reindex(data.index)
+    assert flags.any()
+    assert flags.equals(expected.rename("total_price"))
+
+
+def test_outliers_by_group_never_flag_missing_values(order_lines):
+    data = order_lines.assign(total_price=order_lines["total_price"] * 1.0)
+    data.loc[data.index % 2 == 0, "total_price"] = np.nan
+    data.loc[data["bikeshop_name"] == "Shop C", "total_price"] = np.nan
+
+    flags = detect_outliers_by_group(data, "total_price", ["bikeshop_name"])
+
+    assert not flags[data["total_price"].isna()].any()
+
+
+def test_rolling_outliers_match_a_loop_over_windows(order_lines):
+    data = order_lines.sample(frac=1.0, random_state=0)
+
+    flags = detect_outliers_rolling(
+        data,
+        "total_price",
+        window=30,
+        date_column="order_date",
+        groups=["bikeshop_name"],
+    )
+
+    expected = pd.Series(False, index=data.index)
+    for _, group_df in data.groupby("bikeshop_name"):
+        values = group_df.sort_values("order_date")["total_price"]
+        for end in range(30, len(values) + 1):
+            window = values.iloc[end - 30 : end]
+            expected[window.index[-1]] = detect_outliers(window).iloc[-1]
+
+    assert flags.equals(expected.rename("total_price"))
+
+
+def test_trusted_mode_skips_argument_validation(order_lines):
+    x = order_lines["total_price"]
+
+    with pytest.raises(ValidationError):
+        detect_outliers(x, iqr_multiplier=-1.0)
+
+    with trusted_mode():
+        assert is_trusted()
+        # Not rejected up front any more, the fences are just inverted
+        detect_outliers(x, iqr_multiplier=-1.0)
+
+    assert not is_trusted()
+    with pytest.raises(ValidationError):
+        detect_outliers(x, iqr_multiplier=-1.0)
+
+
+def test_trusted_mode_gives_the_same_flags(order_lines):
+    x = order_lines["total_price"]
+
+    with trusted_mode():
+        trusted_flags = detect_outliers(x, how="upper")
+
+    assert trusted_flags.equals(detect_outliers(x, how="upper"))
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from helper.utils import fingerprint_wide_frame
+from update_database import FORECAST_LEVELS, select_changed
+
+
+def test_fingerprints_depend_on_data_and_config(quarterly_panel):
+    base = fingerprint_wide_frame(quarterly_panel, "Bikeshop: {}")
+    assert base["id"].tolist() == [
+        "Bikeshop: Shop A",
+        "Bikeshop: Shop B",
+        "Bikeshop: Shop C",
+    ]
+    assert (base["n_rows"] == len(quarterly_panel)).all()
+
+    changed_data = quarterly_panel.copy()
+    changed_data.iloc[-1, 0] += 1
+    changed = fingerprint_wide_frame(changed_data, "Bikeshop: {}")
+    assert (changed["data_hash"] != base["data_hash"]).tolist() == [
+        True,
+        False,
+        False,
+    ]
+
+    configured = fingerprint_wide_frame(
+        quarterly_panel, "Bikeshop: {}", config="h=8"
+    )
+    assert (configured["data_hash"] != base["data_hash"]).all()
+
+
+def test_level_config_hash_tracks_forecast_settings_only():
+    level = next(
+        level for level in FORECAST_LEVELS if level.name == "bikeshop"
+    )
+
+    assert level.config_hash() == level.model_copy().config_hash()
+    for update in ({"h": level.h + 1}, {"sp": 6}, {"alpha": 0.8}):
+        assert level.model_copy(update=update).config_hash() != (
+            level.config_hash()
+        )
+
+    # How the fits run does not change the forecasts
+    assert level.model_copy(update={"n_jobs": 2}).config_hash() == (
+        level.config_hash()
+    )
+
+
+def test_select_changed_picks_new_and_modified_ids(quarterly_panel):
+    fingerprints_df = fingerprint_wide_frame(quarterly_panel, "Bikeshop: {}")
+
+    stored = fingerprints_df.set_index("id").iloc[:2].copy()
+    stored.loc["Bikeshop: Shop B", "data_hash"] = "outdated"
+
+    assert select_changed(fingerprints_df, stored) == [
+        ("total_price", "Shop B"),
+        ("total_price", "Shop C"),
+    ]
+
+    no_history = pd.DataFrame(columns=["n_rows", "data_hash"])
+    assert len(select_changed(fingerprints_df, no_history)) == 3
@@ -0,0 +1,194 @@
+from statistics import NormalDist
+from typing import Dict, Literal, Optional, Tuple
+
+import numpy as np
+
+# Every baseline fits all columns of a (n_periods, n_series) array at
+# once and returns the point forecasts and their standard errors, both
+# (h, n_series)
+BaselineMethod = Literal["seasonal_naive", "drift", "ets", "theta"]
+
+# Smoothing parameters tried by the exponential smoothing baselines
+ALPHA_GRID = np.linspace(0.05, 1.0, 20)
+
+
+def seasonal_naive(
+    y: np.ndarray, h: int, sp: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Repeats the last observed season."""
+    n_periods = y.shape[0]
+    if n_periods <= sp:
+        raise ValueError(
+            f"seasonal_naive needs more than sp={sp} periods, "
+            f"got {n_periods}."
+        )
+
+    steps = np.arange(h)
+    pred = y[n_periods - sp + steps % sp]
+
+    residuals = y[sp:] - y[:-sp]
+    sigma = np.sqrt(np.mean(residuals**2, axis=0))
+    se = sigma * np.sqrt(steps // sp + 1)[:, None]
+
+    return pred, se
+
+
+def drift(y: np.ndarray, h: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Extends the line through the first and last observation."""
+    n_periods = y.shape[0]
+    if n_periods < 3:
+        raise ValueError(f"drift needs at least 3 periods, got {n_periods}.")
+
+    slope = (y[-1] - y[0]) / (n_periods - 1)
+    steps = np.arange(1, h + 1)[:, None]
+    pred = y[-1] + steps * slope
+
+    residuals = np.diff(y, axis=0) - slope
+    sigma = np.sqrt(np.sum(residuals**2, axis=0) / (n_periods - 2))
+    se = sigma * np.sqrt(steps * (1 + steps / (n_periods - 1)))
+
+    return pred, se
+
+
+def _fit_ses(y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Simple exponential smoothing of every column for every alpha of
+    ALPHA_GRID, keeping the alpha with the lowest one step ahead SSE.
+    Returns alpha, final level and residual variance per column.
+    """
+    n_periods, n_series = y.shape
+    alphas = ALPHA_GRID[:, None]
+
+    level = np.repeat(y[:1], len(ALPHA_GRID), axis=0)
+    sse = np.zeros((len(ALPHA_GRID), n_series))
+
+    # One vectorized update per period, over all alphas and columns
+    for t in range(1, n_periods):
+        error = y[t] - level
+        sse += error**2
+        level += alphas * error
+
+    best = np.argmin(sse, axis=0)
+    columns = np.arange(n_series)
+
+    return (
+        ALPHA_GRID[best],
+        level[best, columns],
+        sse[best, columns] / (n_periods - 1),
+    )
+
+
+def _ses_se(alpha: np.ndarray, variance: np.ndarray, h: int) -> np.ndarray:
+    # ETS(A,N,N) forecast variance
+    steps = np.arange(1, h + 1)[:, None]
+    return np.sqrt(variance * (1 + (steps - 1) * alpha**2))
+
+
+def seasonal_indices(y: np.ndarray, sp: int) -> Optional[np.ndarray]:
+    """
+    Additive seasonal indices of a classical decomposition, (sp, n_series)
+    and summing to zero. None without two full seasons.
+    """
+    n_periods, n_series = y.shape
+    if sp <= 1 or n_periods < 2 * sp:
+        return None
+
+    # Centered moving average, 2 x sp for even periods
+    csum = np.vstack([np.zeros((1, n_series)), np.cumsum(y, axis=0)])
+    trend = (csum[sp:] - csum[:-sp]) / sp
+    if sp % 2 == 0:
+        trend = (trend[1:] + trend[:-1]) / 2
+    offset = sp // 2
+
+    detrended = y[offset : offset + len(trend)] - trend
+    positions = (np.arange(len(trend)) + offset) % sp
+
+    indices = np.vstack(
+        [detrended[positions == j].mean(axis=0) for j in range(sp)]
+    )
+    return indices - indices.mean(axis=0)
+
+
+def ets(y: np.ndarray, h: int, sp: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Simple exponential smoothing of the seasonally adjusted series."""
+    return _smoothed(y, h, sp, theta=False)
+
+
+def theta(y: np.ndarray, h: int, sp: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Theta method: simple exponential smoothing plus half the slope of the
+    linear trend (Hyndman & Billah, 2003), on the seasonally adjusted
+    series.
+    """
+    return _smoothed(y, h, sp, theta=True)
+
+
+def _smoothed(
+    y: np.ndarray, h: int, sp: int, theta: bool
+) -> Tuple[np.ndarray, np.ndarray]:
+    n_periods = y.shape[0]
+    if n_periods < 3:
+        raise ValueError(
+            f"ets and theta need at least 3 periods, got {n_periods}."
+        )
+
+    indices = seasonal_indices(y, sp)
+    if indices is not None:
+        y = y - indices[np.arange(n_periods) % sp]
+
+    alpha, level, variance = _fit_ses(y)
+
+    steps = np.arange(1, h + 1)[:, None]
+    pred = np.repeat(level[None, :], h, axis=0)
+
+    if theta:
+        t = np.arange(n_periods) - (n_periods - 1) / 2
+        slope = t @ (y - y.mean(axis=0)) / (t @ t)
+        pred = pred + slope / 2 * (
+            (steps - 1) + 1 / alpha - (1 - alpha) ** n_periods / alpha
+        )
+
+    if indices is not None:
+        pred = pred + indices[(n_periods + steps[:, 0] - 1) % sp]
+
+    return pred, _ses_se(alpha, variance, h)
+
+
+def forecast_baseline(
+    y: np.ndarray,
+    method: BaselineMethod,
+    h: int,
+    sp: int,
+    coverage: float = 0.95,
+) -> Dict[str, np.ndarray]:
+    """
+    Point forecasts and normal prediction intervals of every column.
+
+    Args:
+        y (np.ndarray): (n_periods, n_series), no missing values.
+        method (str): One of "seasonal_naive", "drift", "ets", "theta".
+        h (int): Forecast horizon.
+        sp (int): Seasonal period, unused by "drift".
+        coverage (float, optional): Interval coverage. Defaults to 0.95.
+
+    Returns:
+        dict: "prediction", "ci_lo" and "ci_hi", each (h, n_series).
+    """
+    if method == "seasonal_naive":
+        pred, se = seasonal_naive(y, h, sp)
+    elif method == "drift":
+        pred, se = drift(y, h)
+    elif method == "ets":
+        pred, se = ets(y, h, sp)
+    elif method == "theta":
+        pred, se = theta(y, h, sp)
+    else:
+        raise ValueError(f"Unknown baseline method '{method}'.")
+
+    z = NormalDist().inv_cdf((1 + coverage) / 2)
+
+    return {
+        "prediction": pred,
+        "ci_lo": pred - z * se,
+        "ci_hi": pred + z * se,
+    }
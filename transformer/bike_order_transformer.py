@@ -1,24 +1,97 @@
 # SQL DATABASES (Module 2): Working with SQLAlchemy ----
+import json
 import os
 from typing import Literal
 import janitor  # type: ignore # isort: skip
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from path import Path
+from helper.profiling import profiled
 from helper.utils import with_db_connection  # isort : skip
 
-from settings import SELECTED_COLUMN_TO_KEEP
+from settings import (
+    CATEGORICAL_COLUMNS,
+    SELECTED_COLUMN_TO_KEEP,
+    TRANSFORM_CACHE_PATH,
+)
 from transformer.data_access import DataAccess
 
+# Join and derived price computed by the database, only the columns that
+# survive SELECTED_COLUMN_TO_KEEP (plus description to split) are read
+ORDER_LINES_QUERY = """
+SELECT
+    ol.order_id,
+    ol.order_line,
+    ol.order_date,
+    b.model,
+    ol.quantity,
+    b.price,
+    b.price * ol.quantity AS total_price,
+    s.bikeshop_name,
+    s.location,
+    b.description
+FROM order_lines AS ol
+LEFT JOIN bikes AS b
+    ON ol.product_id = b.bike_id
+LEFT JOIN bike_shops AS s
+    ON ol.customer_id = s.bikeshop_id
+"""
+
+# Cheap summary of the source tables, the cache is reused while it matches
+SOURCE_STATE_QUERY = """
+SELECT
+    (SELECT COUNT(*) FROM bikes) AS bikes_rows,
+    (SELECT COUNT(*) FROM bike_shops) AS bike_shops_rows,
+    (SELECT COUNT(*) FROM order_lines) AS order_lines_rows,
+    (SELECT MAX(order_id) FROM order_lines) AS max_order_id
+"""
+
+CACHE_METADATA_KEY = b"bike_order_source_state"
+
+
+def _arrow_dtype(arrow_type: pa.DataType):
+    # Dictionary columns stay pandas categoricals, the rest Arrow-backed
+    if pa.types.is_dictionary(arrow_type):
+        return None
+    return pd.ArrowDtype(arrow_type)
+
 
 class BikeOrderTransformer(DataAccess):
     def __init__(self):
         super().__init__()
 
-    def transform_data(self) -> pd.DataFrame:
-        # Collect raw tables
-        bikes_df = self.read_data_from_db(table_name="bikes")
-        order_lines_df = self.read_data_from_db(table_name="order_lines")
-        bike_shop_df = self.read_data_from_db(table_name="bike_shops")
+    @profiled("transform_data", arguments=["method", "use_cache"])
+    def transform_data(
+        self,
+        method: Literal["pandas", "sql"] = "pandas",
+        use_cache: bool = False,
+        cache_path: Path = TRANSFORM_CACHE_PATH,
+    ) -> pd.DataFrame:
+        """
+        Joins and cleans the bikes, order_lines and bike_shops tables.
+
+        Args:
+            method (str): "pandas" joins in memory, "sql" pushes the join
+                and projection into the database. Defaults to "pandas".
+            use_cache (bool): Read the cleaned frame from a parquet cache
+                while the source tables are unchanged (row counts and max
+                order_id), rebuilding it otherwise. Cached frames use
+                categorical dtypes for CATEGORICAL_COLUMNS and Arrow-backed
+                dtypes for the other columns. Defaults to False.
+            cache_path (Path): Location of the parquet cache.
+        """
+        if use_cache:
+            return self._transform_data_cached(method, Path(cache_path))
+
+        if method == "sql":
+            return self._transform_data_sql()
+
+        # Collect raw tables over one connection
+        with self.batch():
+            bikes_df = self.read_data_from_db(table_name="bikes")
+            order_lines_df = self.read_data_from_db(table_name="order_lines")
+            bike_shop_df = self.read_data_from_db(table_name="bike_shops")
 
         # Transform: Join, Clean, Derive
         bike_order_line_joined_df: pd.DataFrame = order_lines_df.merge(
@@ -52,12 +125,82 @@ class BikeOrderTransformer(DataAccess):
 
         return bike_order_cleaned_df
 
+    def _source_state(self) -> dict:
+        state = self.read_data_from_db(
+            table_name="order_lines", query=SOURCE_STATE_QUERY
+        )
+        return {k: int(v) for k, v in state.iloc[0].fillna(0).items()}
+
+    def _transform_data_cached(
+        self, method: Literal["pandas", "sql"], cache_path: Path
+    ) -> pd.DataFrame:
+        state = self._source_state()
+
+        if cache_path.exists():
+            metadata = pq.read_schema(cache_path).metadata or {}
+            cached_state = metadata.get(CACHE_METADATA_KEY)
+            if cached_state is not None and json.loads(cached_state) == state:
+                return pq.read_table(cache_path).to_pandas(
+                    types_mapper=_arrow_dtype
+                )
+
+        df = self.transform_data(method=method)
+        df = df.astype({col: "category" for col in CATEGORICAL_COLUMNS})
+
+        # Source state travels in the parquet schema metadata, so the
+        # freshness check reads only the footer
+        arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+        arrow_table = arrow_table.replace_schema_metadata(
+            {
+                **(arrow_table.schema.metadata or {}),
+                CACHE_METADATA_KEY: json.dumps(state).encode("utf-8"),
+            }
+        )
+
+        cache_path.parent.makedirs_p()
+        pq.write_table(arrow_table, cache_path)
+
+        # Same dtypes as a cache hit
+        return arrow_table.to_pandas(types_mapper=_arrow_dtype)
+
+    def _transform_data_sql(self) -> pd.DataFrame:
+        """Joined, projected read with vectorized string splits."""
+        df = self.read_data_from_db(
+            table_name="order_lines", query=ORDER_LINES_QUERY
+        )
+
+        df = self._split_column(
+            df,
+            "description",
+            " - ",
+            ["category_1", "category_2", "frame_material"],
+        )
+        df = self._split_column(df, "location", ", ", ["city", "state"])
+
+        return df.loc[:, SELECTED_COLUMN_TO_KEEP]
+
+    @staticmethod
+    def _split_column(
+        df: pd.DataFrame, column: str, sep: str, new_column_names: list
+    ) -> pd.DataFrame:
+        # Split the few distinct values once and broadcast them back with
+        # the factorized codes instead of splitting every row
+        codes, uniques = pd.factorize(df[column])
+        parts = pd.Series(uniques, dtype=object).str.split(sep, expand=True)
+
+        for i, name in enumerate(new_column_names):
+            df[name] = pd.api.extensions.take(
+                parts[i].to_numpy(), codes, allow_fill=True
+            )
+
+        return df
+
     @staticmethod
     def save_data(
         df: pd.DataFrame,
         path: Path,
         file_name: str,
-        file_type: Literal["csv", "xlsx", "pkl"] = "csv",
+        file_type: Literal["csv", "xlsx", "pkl", "parquet"] = "csv",
     ):
         if not os.path.exists(path):
             os.mkdir(path=path)
@@ -70,6 +213,8 @@ class BikeOrderTransformer(DataAccess):
             df.to_excel(file_path, index=False)
         elif file_type == "pkl":
             df.to_pickle(file_path)
+        elif file_type == "parquet":
+            df.to_parquet(file_path, index=False)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
         print(f"Saved to: {path}")
@@ -1,14 +1,140 @@
 from __future__ import annotations
 
-from typing import Literal
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from inspect import signature
+from typing import Dict, Iterator, Literal, Sequence, Tuple
 
 import pandas as pd
-from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy import create_engine, inspect
-from sqlalchemy.engine import Engine
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from sqlalchemy import (
+    bindparam,
+    column,
+    create_engine,
+    event,
+    inspect,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.types import DateTime
 
+from helper.profiling import profiled
 from helper.utils import prepare_data, with_db_connection
-from settings import CONN_STRING, SQL_DTYPES
+from settings import (
+    CONN_STRING,
+    ENGINE_OPTIONS,
+    FINGERPRINT_TABLE,
+    SQL_DTYPES,
+    SQLITE_PRAGMAS,
+    TABLE_NAMES_TTL,
+)
+
+# DBAPI placeholder for each paramstyle, used by the bulk insert. Named
+# styles bind the 1-based column position; other paramstyles fall back to
+# DataFrame.to_sql
+PLACEHOLDERS = {
+    "qmark": "?",
+    "numeric": ":{position}",
+    "named": ":p{position}",
+    "format": "%s",
+    "pyformat": "%s",
+}
+
+# DataFrame.to_sql arguments the bulk insert honours
+BULK_KWARGS = {"chunksize"}
+
+
+# create_engine options only some pool classes take, by the name of the
+# pool argument they become
+POOL_CLASS_OPTIONS = {
+    "pool_size": "pool_size",
+    "max_overflow": "max_overflow",
+    "pool_timeout": "timeout",
+    "pool_use_lifo": "use_lifo",
+}
+
+
+# Process-wide engines, one pool per connection string and pool options
+_ENGINES: Dict[Tuple, Engine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+# Table names per engine and when they were read, refreshed on a miss or
+# after TABLE_NAMES_TTL seconds and cleared after writes
+_TABLE_NAMES: "weakref.WeakKeyDictionary[Engine, Tuple[float, set]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _pool_options(conn_string: str, options: dict) -> dict:
+    """Drops the options the pool class of the URL does not accept."""
+    poolclass = options.get("poolclass")
+    if poolclass is None:
+        url = make_url(conn_string)
+        poolclass = url.get_dialect().get_pool_class(url)
+
+    accepted = signature(poolclass.__init__).parameters
+    return {
+        name: value
+        for name, value in options.items()
+        if name not in POOL_CLASS_OPTIONS
+        or POOL_CLASS_OPTIONS[name] in accepted
+    }
+
+
+def get_engine(conn_string: str = CONN_STRING, **engine_options) -> Engine:
+    """
+    Returns the shared engine for a connection string, creating it once.
+
+    Args:
+        conn_string (str): SQLAlchemy URL. Defaults to CONN_STRING.
+        engine_options: Override ENGINE_OPTIONS (pool_size,
+            pool_recycle, ...). Each distinct set of options gets its own
+            engine.
+
+    ENGINE_OPTIONS the pool of the URL does not take are left out, e.g.
+    pool_size and max_overflow for the SingletonThreadPool of "sqlite://".
+    """
+    options = {
+        **_pool_options(conn_string, {**ENGINE_OPTIONS, **engine_options}),
+        **engine_options,
+    }
+    key = (conn_string, tuple(sorted(options.items())))
+
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None:
+            engine = _ENGINES[key] = create_engine(conn_string, **options)
+
+    return engine
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def _disable_pysqlite_begin(dbapi_connection, connection_record) -> None:
+    # pysqlite only opens a transaction before DML, DDL such as the DROP
+    # TABLE of if_exists="replace" would be committed on the spot
+    dbapi_connection.isolation_level = None
+
+
+def _begin_sqlite(conn) -> None:
+    conn.exec_driver_sql("BEGIN")
+
+
+# Listeners of every SQLite engine, the last two make DDL transactional
+SQLITE_LISTENERS = [
+    ("connect", _set_sqlite_pragmas),
+    ("connect", _disable_pysqlite_begin),
+    ("begin", _begin_sqlite),
+]
 
 
 class DataAccess(BaseModel):
@@ -16,10 +142,22 @@ class DataAccess(BaseModel):
     Data Access class for writing and reading forecast-related data.
     """
 
-    engine: Engine = Field(default_factory=lambda: create_engine(CONN_STRING))
+    engine: Engine = Field(default_factory=get_engine)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    # Connection of the open `batch()` block, per thread: connections must
+    # not be shared between the stage threads using one instance
+    _batch: threading.local = PrivateAttr(default_factory=threading.local)
+
+    def model_post_init(self, __context) -> None:
+        if self.engine.dialect.name != "sqlite":
+            return
+
+        for identifier, listener in SQLITE_LISTENERS:
+            if not event.contains(self.engine, identifier, listener):
+                event.listen(self.engine, identifier, listener)
+
     # ----------------------------------------------------------------
     # Validation (performed only ON-DEMAND during write)
     # ----------------------------------------------------------------
@@ -46,11 +184,62 @@ class DataAccess(BaseModel):
                 f"Extra: {sorted(extra)}"
             )
 
+    @property
+    def _batch_conn(self) -> Connection | None:
+        return getattr(self._batch, "conn", None)
+
     def table_exists(self, table_name) -> bool:
-        inspector = inspect(self.engine)
-        return table_name in inspector.get_table_names()
+        read_at, table_names = _TABLE_NAMES.get(self.engine, (0.0, set()))
+
+        # A miss may be a table created elsewhere, a hit a table dropped
+        # elsewhere since the names were read; re-inspect for both
+        if (
+            table_name not in table_names
+            or time.monotonic() - read_at > TABLE_NAMES_TTL
+        ):
+            table_names = set(inspect(self.engine).get_table_names())
+            _TABLE_NAMES[self.engine] = (time.monotonic(), table_names)
+
+        return table_name in table_names
+
+    def invalidate_table_cache(self) -> None:
+        _TABLE_NAMES.pop(self.engine, None)
+
+    @contextmanager
+    def batch(self) -> Iterator[Connection]:
+        """
+        Shares one connection between the reads and writes in the block.
+
+        Example:
+            with db_access.batch():
+                bikes_df = db_access.read_data_from_db(table_name="bikes")
+                shops_df = db_access.read_data_from_db(table_name="bike_shops")
+        """
+        if self._batch_conn is not None:
+            yield self._batch_conn
+            return
+
+        with self.engine.connect() as conn:
+            self._batch.conn = conn
+            try:
+                yield conn
+                if conn.in_transaction():
+                    conn.commit()
+            finally:
+                self._batch.conn = None
+
+    @staticmethod
+    def _begin(conn: Connection):
+        # Inside a batch the connection may already be in a transaction
+        # (reads autobegin one), nest the write in a savepoint then
+        if conn.in_transaction():
+            return conn.begin_nested()
+        return conn.begin()
 
     @with_db_connection
+    @profiled(
+        "write_data_to_db", arguments=["table_name", "if_exists", "bulk"]
+    )
     def write_data_to_db(
         self,
         conn,
@@ -60,13 +249,45 @@ class DataAccess(BaseModel):
         table_name: str = "forecast",
         *,
         prepare: bool = False,
-        if_exists: Literal["fail", "replace", "append"] = "fail",
+        if_exists: Literal[
+            "fail", "replace", "append", "replace_ids", "upsert"
+        ] = "fail",
+        bulk: bool = True,
         **kwargs,
     ) -> None:
+        """
+        Writes forecast rows in a single transaction.
+
+        `if_exists="replace_ids"` deletes the rows of every id present in
+        `data` and appends the new ones, leaving all other ids untouched.
+
+        `if_exists="upsert"` stages `data` in a temporary table and merges
+        it on (`id_column`, `date_column`): existing rows are updated, new
+        ones inserted and rows not in `data` are kept.
+
+        With `bulk=True` pandas only creates the table, the rows are sent
+        as plain tuples through the driver's executemany, skipping the
+        per-row parameter processing of `DataFrame.to_sql`. Only
+        `chunksize` is accepted in `kwargs` then, and for upserts. With
+        `bulk=False` `kwargs` are passed to `DataFrame.to_sql`.
+
+        Raises:
+            ValueError: If `data` is missing or has the wrong columns.
+            TypeError: If `kwargs` holds arguments other than `chunksize`
+                while `bulk=True` or upserting.
+        """
         if data is None:
             raise ValueError("No data provided for writing.")
 
-        df = data.copy()
+        unsupported = set(kwargs) - BULK_KWARGS
+        if unsupported and (bulk or if_exists == "upsert"):
+            raise TypeError(
+                f"Bulk writes and upserts do not support "
+                f"{sorted(unsupported)}, pass bulk=False to forward them "
+                "to DataFrame.to_sql."
+            )
+
+        df = data
 
         # optional preprocessing step
         if prepare:
@@ -77,32 +298,338 @@ class DataAccess(BaseModel):
         # validate dataframe ONLY at write time
         self._validate_dataframe(df, id_column, date_column)
 
+        try:
+            with self._begin(conn):
+                self._write(
+                    conn,
+                    df,
+                    id_column,
+                    date_column,
+                    table_name,
+                    if_exists,
+                    bulk,
+                    **kwargs,
+                )
+        finally:
+            self.invalidate_table_cache()
+
+    def _write(
+        self,
+        conn,
+        df: pd.DataFrame,
+        id_column: str,
+        date_column: str,
+        table_name: str,
+        if_exists: str,
+        bulk: bool,
+        **kwargs,
+    ) -> None:
+        if if_exists == "upsert":
+            self._upsert(
+                conn, df, table_name, id_column, date_column, **kwargs
+            )
+            return
+
+        if if_exists == "replace_ids":
+            self._delete_ids(
+                conn,
+                table_name,
+                id_column,
+                df[id_column].unique().tolist(),
+            )
+            if_exists = "append"
+
         # write to database
-        df.to_sql(
+        if bulk:
+            self._create_table(conn, df, table_name, if_exists)
+            self._insert_rows(
+                conn,
+                df,
+                table_name,
+                date_column,
+                self._date_format(conn, table_name, date_column),
+                **kwargs,
+            )
+        else:
+            df.to_sql(
+                name=table_name,
+                con=conn,
+                if_exists=if_exists,
+                dtype=SQL_DTYPES,
+                index=False,
+                **kwargs,
+            )
+
+        self._create_key_index(conn, table_name, id_column, date_column)
+
+    @staticmethod
+    def _create_table(
+        conn,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: Literal["fail", "replace", "append"],
+    ) -> None:
+        # Let pandas handle fail/replace/append and the typed schema
+        df.head(0).to_sql(
             name=table_name,
             con=conn,
             if_exists=if_exists,
             dtype=SQL_DTYPES,
             index=False,
-            **kwargs,
         )
 
-    @with_db_connection
-    def read_data_from_db(
+    @staticmethod
+    def _create_key_index(
+        conn, table_name: str, id_column: str, date_column: str
+    ) -> None:
+        conn.execute(
+            text(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{table_name}_id_date "
+                f"ON {table_name} ({id_column}, {date_column})"
+            )
+        )
+
+    @staticmethod
+    def _date_format(conn, table_name: str, date_column: str) -> str | None:
+        """
+        Layout of the stored date strings, None when the driver binds
+        datetimes natively.
+        """
+        # Tables written before SQL_DTYPES declared the date column as text
+        # hold pandas' default layout; keys must match it for ON CONFLICT
+        date_type = next(
+            c["type"]
+            for c in inspect(conn).get_columns(table_name)
+            if c["name"] == date_column
+        )
+        if not isinstance(date_type, DateTime):
+            return "%Y-%m-%d %H:%M:%S"
+
+        # SQLite has no date type, SQLAlchemy stores DateTime as this text
+        if conn.dialect.name == "sqlite":
+            return "%Y-%m-%d %H:%M:%S.%f"
+
+        return None
+
+    def _insert_rows(
         self,
         conn,
-        table_name: str | None = None,
-        query: str | None = None,
-        **kwargs,
+        df: pd.DataFrame,
+        table_name: str,
+        date_column: str,
+        date_format: str | None,
+        chunksize: int | None = None,
+    ) -> None:
+        placeholder = PLACEHOLDERS.get(conn.dialect.paramstyle)
+        if placeholder is None:
+            df.to_sql(
+                name=table_name,
+                con=conn,
+                if_exists="append",
+                index=False,
+                chunksize=chunksize,
+            )
+            return
+
+        columns = {
+            c: self._to_db_values(
+                df[c], date_format=date_format if c == date_column else None
+            )
+            for c in df.columns
+        }
+        rows = list(zip(*columns.values()))
+
+        placeholders = [
+            placeholder.format(position=i + 1) for i in range(len(columns))
+        ]
+        if conn.dialect.paramstyle == "named":
+            names = [p[1:] for p in placeholders]
+            rows = [dict(zip(names, row)) for row in rows]
+
+        statement = (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(placeholders)})"
+        )
+
+        chunksize = chunksize or len(rows) or 1
+        for start in range(0, len(rows), chunksize):
+            conn.exec_driver_sql(statement, rows[start : start + chunksize])
+
+    def _upsert(
+        self,
+        conn,
+        df: pd.DataFrame,
+        table_name: str,
+        id_column: str,
+        date_column: str,
+        chunksize: int | None = None,
+    ) -> None:
+        # ON CONFLICT needs the unique key to exist before merging
+        self._create_table(conn, df, table_name, "append")
+        self._create_key_index(conn, table_name, id_column, date_column)
+
+        stage_name = f"stage_{table_name}"
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {stage_name}")
+        conn.exec_driver_sql(
+            f"CREATE TEMPORARY TABLE {stage_name} AS "
+            f"SELECT * FROM {table_name} WHERE 1 = 0"
+        )
+        # The staged keys must be formatted like the stored ones
+        self._insert_rows(
+            conn,
+            df,
+            stage_name,
+            date_column,
+            self._date_format(conn, table_name, date_column),
+            chunksize=chunksize,
+        )
+
+        columns = ", ".join(df.columns)
+        updates = ", ".join(
+            f"{c} = excluded.{c}"
+            for c in df.columns
+            if c not in (id_column, date_column)
+        )
+        # WHERE true keeps SQLite from parsing ON CONFLICT as a join clause
+        conn.exec_driver_sql(
+            f"INSERT INTO {table_name} ({columns}) "
+            f"SELECT {columns} FROM {stage_name} WHERE true "
+            f"ON CONFLICT ({id_column}, {date_column}) "
+            f"DO UPDATE SET {updates}"
+        )
+        conn.exec_driver_sql(f"DROP TABLE {stage_name}")
+
+    @staticmethod
+    def _to_db_values(
+        values: pd.Series, date_format: str | None = None
+    ) -> list:
+        if date_format is not None:
+            # Format each distinct date once instead of once per row, in
+            # the layout the target column stores
+            codes, dates = pd.factorize(values)
+            formatted = pd.DatetimeIndex(dates).strftime(date_format)
+            return pd.api.extensions.take(
+                formatted.to_numpy(dtype=object),
+                codes,
+                allow_fill=True,
+                fill_value=None,
+            ).tolist()
+
+        if values.hasnans:
+            return values.astype(object).where(values.notna(), None).tolist()
+
+        return values.tolist()
+
+    def _delete_ids(self, conn, table_name: str, id_column: str, ids) -> None:
+        if not ids or not self.table_exists(table_name):
+            return
+
+        statement = text(
+            f"DELETE FROM {table_name} WHERE {id_column} IN :ids"
+        ).bindparams(bindparam("ids", expanding=True))
+        conn.execute(statement, {"ids": ids})
+
+    def read_fingerprints(
+        self, table_name: str = FINGERPRINT_TABLE
     ) -> pd.DataFrame:
+        """Stored series fingerprints, empty when none were written yet."""
+        if not self.table_exists(table_name):
+            return pd.DataFrame(columns=["id", "n_rows", "data_hash"])
+
+        return self.read_data_from_db(table_name=table_name)  # type: ignore
+
+    @with_db_connection
+    def write_fingerprints(
+        self,
+        conn,
+        fingerprints: pd.DataFrame,
+        table_name: str = FINGERPRINT_TABLE,
+    ) -> None:
+        """Replaces the stored fingerprints of the ids in `fingerprints`."""
+        df = fingerprints.loc[:, ["id", "n_rows", "data_hash"]]
+
+        with self._begin(conn):
+            self._delete_ids(conn, table_name, "id", df["id"].tolist())
+            df.to_sql(
+                name=table_name, con=conn, if_exists="append", index=False
+            )
+
+        self.invalidate_table_cache()
+
+    def _build_query(
+        self,
+        table_name: str | None,
+        query: str | None,
+        columns: Sequence[str] | None,
+        where: str | None,
+    ):
         # Ensure table exists before reading
         if not self.table_exists(table_name):
             raise ValueError(
                 f"Table '{table_name}' does not exist in the database."
             )
 
-        # Default query: select all
-        if query is None:
-            query = f"SELECT * FROM {table_name}"  # type: ignore
+        if query is not None:
+            return query
+
+        # Default query: select all, optionally projected and filtered
+        if columns is None:
+            statement = select(text("*")).select_from(table(table_name))
+        else:
+            statement = select(*[column(c) for c in columns]).select_from(
+                table(table_name)
+            )
+
+        if where is not None:
+            statement = statement.where(text(where))
+
+        return statement
+
+    @with_db_connection
+    def read_data_from_db(
+        self,
+        conn,
+        table_name: str | None = None,
+        query: str | None = None,
+        columns: Sequence[str] | None = None,
+        where: str | None = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Reads a table or query into a single DataFrame.
+
+        Args:
+            table_name (str): Table to read.
+            query (str, optional): Raw SQL, overrides `columns` and `where`.
+            columns (list[str], optional): Columns to select. Defaults to all.
+            where (str, optional): SQL predicate, bind values via
+                `params`, e.g. where="order_id > :last_id".
+            kwargs: Passed to pandas.read_sql (params, dtype, parse_dates).
+        """
+        statement = self._build_query(table_name, query, columns, where)
 
-        return pd.read_sql(query, con=conn, **kwargs)
+        return pd.read_sql(statement, con=conn, **kwargs)
+
+    def iter_data_from_db(
+        self,
+        table_name: str | None = None,
+        query: str | None = None,
+        columns: Sequence[str] | None = None,
+        where: str | None = None,
+        chunksize: int = 100_000,
+        **kwargs,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Streams a table or query as DataFrame chunks of `chunksize` rows.
+
+        Uses a server-side cursor so only one chunk is held in memory.
+        Arguments match `read_data_from_db`; pass `dtype` to get the same
+        column types on every chunk.
+        """
+        statement = self._build_query(table_name, query, columns, where)
+
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True)
+            yield from pd.read_sql(
+                statement, con=conn, chunksize=chunksize, **kwargs
+            )
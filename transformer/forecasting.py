@@ -1,20 +1,297 @@
+import time
 import warnings
-from typing import Annotated, Literal
+from datetime import datetime, timedelta
+from typing import (
+    Annotated,
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
 
+import joblib
 import numpy as np
 import pandas as pd
-from pydantic import BaseModel, ConfigDict, Field, StrictFloat, model_validator
-from sktime.forecasting.arima import AutoARIMA
+from joblib import Parallel, delayed
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    StrictFloat,
+    model_validator,
+)
+from sktime.forecasting.arima import ARIMA, AutoARIMA
 from tqdm import tqdm
 
+from helper.profiling import emit, frame_stats, measure, profile
+from helper.utils import fingerprint_series
+from transformer.baselines import BaselineMethod, forecast_baseline
+from transformer.model_store import CachedModel, ModelStore
+
 warnings.filterwarnings(
     "ignore", message="'force_all_finite'", category=FutureWarning
 )
 
+# Maps the Forecaster backend names onto joblib backends
+JOBLIB_BACKENDS = {
+    "threads": "threading",
+    "processes": "loky",
+}
+
+
+class FitOptions(BaseModel):
+    """Per-series fitting settings shipped to the workers."""
+
+    h: int
+    sp: int
+    alpha: float
+    suppress_warnings: bool
+    model_store: Optional[ModelStore] = None
+    store_namespace: str = ""
+    store_config: str = ""
+    warm_start: bool = False
+    search_max_age: timedelta = timedelta(days=7)
+    degradation_tolerance: float = 0.1
+
+
+# Limits of the restricted AutoARIMA search, applied on top of the
+# AutoARIMA arguments passed to `Forecaster.forecast`. Starting the
+# stepwise search from the empty model instead of (2, d, 2)(1, D, 1)
+# roughly halves the fits per series
+RESTRICTED_ARIMA_KWARGS = {
+    "start_p": 0,
+    "start_q": 0,
+    "max_p": 2,
+    "max_q": 2,
+    "start_P": 0,
+    "start_Q": 0,
+    "max_P": 1,
+    "max_Q": 1,
+    "max_order": 3,
+}
+
+ROUTES = ["baseline", "arima_restricted", "arima_full"]
+
+
+class RoutingPolicy(BaseModel):
+    """
+    How `Forecaster(method="auto")` picks the engine of each series.
+
+    Args:
+        min_seasons (int, optional): Series with fewer seasons since their
+            first non-zero period go to the baseline. Defaults to 4.
+        max_zero_fraction (float, optional): Series with more zero periods
+            since their first non-zero one go to the baseline.
+            Defaults to 0.3.
+        full_search_share (float, optional): Remaining series with at
+            least this share of the total get the full stepwise AutoARIMA
+            search, the others the restricted one. Defaults to 0.05.
+        baseline_method (str, optional): Engine of the baseline route.
+            Defaults to "ets".
+        restricted_arima (dict, optional): AutoARIMA arguments of the
+            restricted search. Defaults to RESTRICTED_ARIMA_KWARGS.
+    """
+
+    min_seasons: Annotated[int, Field(strict=True, ge=0)] = 4
+    max_zero_fraction: Annotated[float, Field(ge=0, le=1)] = 0.3
+    full_search_share: Annotated[float, Field(ge=0, le=1)] = 0.05
+    baseline_method: BaselineMethod = "ets"
+    restricted_arima: Dict[str, Any] = Field(
+        default_factory=lambda: dict(RESTRICTED_ARIMA_KWARGS)
+    )
+
+    def classify(
+        self, data: pd.DataFrame, sp: int, total: Optional[float] = None
+    ) -> pd.DataFrame:
+        """
+        Length, zero fraction, revenue share and route of each column.
+
+        Args:
+            data (DataFrame): Series as columns.
+            sp (int): The seasonal period.
+            total (float, optional): Revenue the shares are taken of, e.g.
+                of the whole level when `data` holds only some of its
+                series. Defaults to the total of `data`.
+        """
+        values = np.nan_to_num(data.to_numpy(dtype=float))
+        n_periods = values.shape[0]
+
+        # Leading zeros are periods before a shop or product existed
+        nonzero = values != 0
+        first = np.where(
+            nonzero.any(axis=0), nonzero.argmax(axis=0), n_periods
+        )
+        length = n_periods - first
+
+        active = np.arange(n_periods)[:, None] >= first
+        zero_fraction = np.divide(
+            (active & ~nonzero).sum(axis=0),
+            length,
+            out=np.ones(len(length)),
+            where=length > 0,
+        )
+
+        totals = values.sum(axis=0)
+        if total is None:
+            total = totals.sum()
+        revenue_share = totals / total if total else np.zeros(len(totals))
+
+        route = np.select(
+            [
+                (length < self.min_seasons * sp)
+                | (zero_fraction > self.max_zero_fraction),
+                revenue_share >= self.full_search_share,
+            ],
+            ["baseline", "arima_full"],
+            default="arima_restricted",
+        )
+
+        return pd.DataFrame(
+            {
+                "length": length,
+                "zero_fraction": zero_fraction.round(3),
+                "revenue_share": revenue_share.round(4),
+                "route": route,
+            },
+            index=data.columns,
+        )
+
+
+def _aic_per_obs(model, y: pd.Series) -> float:
+    return float(model.get_fitted_params()["aic"]) / len(y)
+
+
+def _search_model(
+    y: pd.Series, options: FitOptions, *args, **kwargs
+) -> CachedModel:
+    """Runs the full AutoARIMA order search."""
+    model = AutoARIMA(
+        sp=options.sp,
+        suppress_warnings=options.suppress_warnings,
+        *args,
+        **kwargs,
+    )
+
+    model.fit(y)
+
+    params = model.get_fitted_params()
+    return CachedModel(
+        model=model,
+        order=params["order"],
+        seasonal_order=params["seasonal_order"],
+        aic_per_obs=_aic_per_obs(model, y),
+        searched_at=datetime.now(),
+    )
+
+
+def _warm_model(
+    y: pd.Series, cached: CachedModel, options: FitOptions
+) -> CachedModel | None:
+    """
+    Refits with the cached orders fixed. Returns None when the search is
+    due or the fit is clearly worse than the one the orders came from.
+    """
+    if cached.search_due(options.search_max_age):
+        return None
+
+    model = ARIMA(
+        order=cached.order,
+        seasonal_order=cached.seasonal_order,
+        suppress_warnings=options.suppress_warnings,
+    )
+    model.fit(y)
+
+    aic_per_obs = _aic_per_obs(model, y)
+    threshold = cached.aic_per_obs + options.degradation_tolerance * abs(
+        cached.aic_per_obs
+    )
+    if aic_per_obs > threshold:
+        return None
+
+    return cached.model_copy(
+        update={"model": model, "aic_per_obs": aic_per_obs}
+    )
+
+
+def _fit_model(
+    column: Hashable, y: pd.Series, options: FitOptions, *args, **kwargs
+):
+    store = options.model_store
+    if store is None:
+        return _search_model(y, options, *args, **kwargs).model
+
+    series_id = (options.store_namespace, column)
+    fingerprint = fingerprint_series(y)
+
+    cached = store.get(series_id, options.store_config, fingerprint)
+    if cached is not None:
+        return cached.model
+
+    entry = None
+    if options.warm_start:
+        latest = store.latest(series_id, options.store_config)
+        if latest is not None:
+            entry = _warm_model(y, latest, options)
+
+    if entry is None:
+        entry = _search_model(y, options, *args, **kwargs)
+
+    store.put(series_id, options.store_config, fingerprint, entry)
+
+    return entry.model
+
+
+def _fit_series(
+    column: Hashable, y: pd.Series, options: FitOptions, *args, **kwargs
+) -> pd.DataFrame:
+    """Fits a single series and returns value, prediction and CI."""
+    model = _fit_model(column, y, options, *args, **kwargs)
+
+    fh = np.arange(1, options.h + 1)
+    pred = model.predict(fh=fh)
+    pred_interval = model.predict_interval(fh=fh, coverage=options.alpha)
+    pred_interval.index = pred.index  # Align indices
+
+    result_df = pd.concat([y, pred, pred_interval], axis=1)
+    result_df.columns = ["value", "prediction", "ci_lo", "ci_hi"]
+
+    return result_df
+
+
+def _fit_chunk(
+    chunk: List[Tuple[Hashable, pd.Series]],
+    options: FitOptions,
+    *args,
+    **kwargs,
+) -> List[Tuple[Hashable, pd.DataFrame | None, str | None, dict]]:
+    """
+    Fits every series of a chunk, capturing failures per series so one
+    bad column does not abort the whole batch. Also returns the resource
+    usage of each fit, measured in the worker that ran it.
+    """
+    fitted = []
+    for column, y in chunk:
+        result_df, error = None, None
+
+        # Thread CPU time, other series may be fitting in sibling threads
+        with measure(cpu_clock=time.thread_time) as usage:
+            try:
+                result_df = _fit_series(column, y, options, *args, **kwargs)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+
+        fitted.append((column, result_df, error, usage))
+
+    return fitted
+
 
 class Forecaster(BaseModel):
     """
-    Generates ARIMA forecasts for one or more time series.
+    Generates ARIMA or baseline forecasts for one or more time series.
     Args:
         data (Pandas Data Frame):
             Data must be in wide format.
@@ -28,15 +305,60 @@ class Forecaster(BaseModel):
             Contols the confidence interval.
             alpha = 95%
             Defaults to 0.95%
+        method (str, optional):
+            "arima" fits an AutoARIMA per series. "seasonal_naive",
+            "drift", "ets" and "theta" fit all series at once with the
+            vectorized baselines of transformer.baselines, which need
+            series without missing values and ignore `backend`,
+            `model_store` and the AutoARIMA arguments. "auto" picks one
+            of those engines per series with `routing`, see `routes`.
+            Defaults to "arima".
+        routing (RoutingPolicy, optional):
+            Thresholds of the "auto" method. Short or sparse series get
+            the baseline, large ones the full AutoARIMA search and the
+            rest a restricted one.
+        revenue_total (float, optional):
+            Revenue the routing shares are taken of. Pass the total of the
+            whole level when `data` holds only some of its series, so a
+            series keeps its route and cached models. Defaults to the
+            total of `data`.
         suppress_warnings (bool, optional):
             Suppresses ARIMA feedback during automated model training.
             Defaults to True.
+        backend (str, optional):
+            One of "serial", "threads" or "processes". Controls how the
+            series are fitted. Defaults to "serial".
+        n_jobs (int, optional):
+            Number of workers for the "threads" and "processes" backends.
+            -1 uses all cores. Defaults to 1.
+        chunk_size (int, optional):
+            Number of series handed to a worker per task. Defaults to 1.
+        model_store (ModelStore, optional):
+            Caches fitted models on disk. A series whose data and fit
+            settings (h, sp, alpha, suppress_warnings and the AutoARIMA
+            arguments) did not change is predicted from the cached model
+            without refitting. Defaults to None.
+        store_namespace (str, optional):
+            Keeps the cached models of frames sharing a `model_store`
+            apart, e.g. the levels of a hierarchy. Defaults to the names
+            of the column levels of `data`.
+        warm_start (bool, optional):
+            Refit changed series with the cached (p,d,q)(P,D,Q) orders
+            fixed instead of rerunning the stepwise search. Requires
+            `model_store`. Defaults to False.
+        search_max_age_days (int, optional):
+            Age after which warm starts fall back to a full search.
+            Defaults to 7.
+        degradation_tolerance (float, optional):
+            Relative increase of AIC per observation over the cached fit
+            that triggers a full search. Defaults to 0.1.
         args: Passed to sktime.forecasting.arima.AutoARIMA
         kwargs: Passed to sktime.forecasting.arima.AutoARIMA
     Returns:
         Pandas Data Frame:
             - A single time series contains columns: value, prediction, ci_lo, and ci_hi
             - Multiple time series will be returned stacked by group
+            - Series that fail to fit are left out and reported in `errors`
     """
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -45,7 +367,24 @@ class Forecaster(BaseModel):
 
     sp: Literal[3, 6, 12, 24]
     alpha: Annotated[StrictFloat, Field(strict=True, gt=0, lt=1)] = 0.95
+    method: Literal[
+        "arima", "auto", "seasonal_naive", "drift", "ets", "theta"
+    ] = "arima"
+    routing: RoutingPolicy = Field(default_factory=RoutingPolicy)
+    revenue_total: Optional[float] = None
     suppress_warnings: bool = True
+    backend: Literal["serial", "threads", "processes"] = "serial"
+    n_jobs: Annotated[int, Field(strict=True)] = 1
+    chunk_size: Annotated[int, Field(strict=True, gt=0)] = 1
+    model_store: Optional[ModelStore] = None
+    store_namespace: Optional[str] = None
+    warm_start: bool = False
+    search_max_age_days: Annotated[int, Field(strict=True, ge=0)] = 7
+    degradation_tolerance: Annotated[float, Field(ge=0)] = 0.1
+
+    _errors: Dict[Hashable, str] = PrivateAttr(default_factory=dict)
+    _seconds: Dict[Hashable, float] = PrivateAttr(default_factory=dict)
+    _routes: Optional[pd.DataFrame] = PrivateAttr(default=None)
 
     @model_validator(mode="after")
     def validate_fields(self):
@@ -58,36 +397,307 @@ class Forecaster(BaseModel):
         if self.data.shape[0] == 0:
             raise ValueError("Input 'data' must have at least one row.")
 
+        if self.n_jobs == 0:
+            raise ValueError("Input 'n_jobs' must not be 0.")
+
+        if self.warm_start and self.model_store is None:
+            raise ValueError("Input 'warm_start' requires a 'model_store'.")
+
         return self
 
-    def forecast(self, *args, **kwargs):
+    @property
+    def errors(self) -> Dict[Hashable, str]:
+        """Series that failed during the last `forecast` call."""
+        return self._errors
+
+    @property
+    def routes(self) -> Optional[pd.DataFrame]:
+        """
+        Per series of the last `forecast` call: length, zero fraction,
+        revenue share, route taken, fitting seconds and status.
+        """
+        return self._routes
+
+    def _chunks(
+        self, data: pd.DataFrame
+    ) -> List[List[Tuple[Hashable, pd.Series]]]:
+        series = [(column, data[column]) for column in data.columns]
+        return [
+            series[i : i + self.chunk_size]
+            for i in range(0, len(series), self.chunk_size)
+        ]
+
+    def _store_namespace(self) -> str:
+        if self.store_namespace is not None:
+            return self.store_namespace
+
+        return "/".join(str(name) for name in self.data.columns.names)
+
+    def _store_config(self, route: str, *args, **kwargs) -> str:
+        """
+        Hash of every setting a cached model depends on. The route keeps
+        the models of the restricted and the full search apart, on top of
+        their different AutoARIMA arguments.
+        """
+        return joblib.hash(
+            {
+                "route": route,
+                "h": self.h,
+                "sp": self.sp,
+                "alpha": self.alpha,
+                "suppress_warnings": self.suppress_warnings,
+                "args": args,
+                "kwargs": kwargs,
+            }
+        )[:16]
+
+    def _run_chunks(self, data: pd.DataFrame, route: str, *args, **kwargs):
+        chunks = self._chunks(data)
+        options = FitOptions(
+            h=self.h,
+            sp=self.sp,
+            alpha=self.alpha,
+            suppress_warnings=self.suppress_warnings,
+            model_store=self.model_store,
+            store_namespace=self._store_namespace(),
+            store_config=self._store_config(route, *args, **kwargs),
+            warm_start=self.warm_start,
+            search_max_age=timedelta(days=self.search_max_age_days),
+            degradation_tolerance=self.degradation_tolerance,
+        )
+
+        if self.backend == "serial":
+            return (
+                _fit_chunk(chunk, options, *args, **kwargs) for chunk in chunks
+            )
+
+        # Generator output keeps submission order, so results are
+        # deterministic regardless of which worker finishes first
+        return Parallel(
+            n_jobs=self.n_jobs,
+            backend=JOBLIB_BACKENDS[self.backend],
+            return_as="generator",
+        )(
+            delayed(_fit_chunk)(chunk, options, *args, **kwargs)
+            for chunk in chunks
+        )
+
+    def _forecast_arima(
+        self, data: pd.DataFrame, route: str, *args, **kwargs
+    ) -> pd.DataFrame | None:
         results = {}
 
-        for column in tqdm(
-            self.data.columns, desc="Forecasting", mininterval=0
-        ):
-            y = self.data[column]
+        with tqdm(
+            total=data.shape[1], desc="Forecasting", mininterval=0
+        ) as progress:
+            for fitted in self._run_chunks(data, route, *args, **kwargs):
+                for column, result_df, error, usage in fitted:
+                    if error is None:
+                        results[column] = result_df
+                    else:
+                        self._errors[column] = error
+                    self._seconds[column] = usage["wall_s"]
+
+                    emit(
+                        "Forecaster.forecast.series",
+                        series=column,
+                        route=route,
+                        status="ok" if error is None else "error",
+                        rows_in=len(data),
+                        **usage,
+                        **frame_stats(result_df, suffix="_out"),
+                    )
+                progress.update(len(fitted))
+
+        if not results:
+            return None
 
-            model = AutoARIMA(
-                sp=self.sp,
-                suppress_warnings=self.suppress_warnings,
-                *args,
-                **kwargs,
+        return pd.concat(results, axis=0)
+
+    def _future_index(self) -> pd.Index:
+        index = self.data.index
+        if isinstance(index, pd.PeriodIndex):
+            return pd.period_range(
+                index[-1] + 1, periods=self.h, freq=index.freq
+            )
+        if isinstance(index, pd.DatetimeIndex) and index.freq is not None:
+            return pd.date_range(
+                index[-1], periods=self.h + 1, freq=index.freq
+            )[1:]
+
+        raise ValueError(
+            "Baseline methods need a PeriodIndex or a DatetimeIndex with "
+            "a frequency."
+        )
+
+    def _baseline_frame(
+        self, columns: pd.Index, y: np.ndarray, method: BaselineMethod
+    ) -> pd.DataFrame:
+        """
+        Fits all series at once, laid out like the concatenated per-series
+        frames of the ARIMA path.
+        """
+        forecasts = forecast_baseline(
+            y, method, h=self.h, sp=self.sp, coverage=self.alpha
+        )
+
+        n_periods, n_series = y.shape
+        index = self.data.index.append(self._future_index())
+
+        history = np.full((n_periods, n_series), np.nan)
+        values = {
+            "value": np.vstack([y, np.full((self.h, n_series), np.nan)]),
+            **{
+                name: np.vstack([history, forecast])
+                for name, forecast in forecasts.items()
+            },
+        }
+
+        # Series after series, as pd.concat stacks the per-series frames
+        keys = columns.repeat(len(index))
+        key_levels = (
+            [keys.get_level_values(i) for i in range(keys.nlevels)]
+            if isinstance(keys, pd.MultiIndex)
+            else [keys]
+        )
+        row_index = pd.MultiIndex.from_arrays(
+            [*key_levels, index.take(np.tile(np.arange(len(index)), n_series))]
+        )
+
+        return pd.DataFrame(
+            {name: array.ravel(order="F") for name, array in values.items()},
+            index=row_index,
+        )
+
+    def _forecast_baseline(
+        self, data: pd.DataFrame, method: BaselineMethod
+    ) -> pd.DataFrame | None:
+        """
+        Baseline forecasts of the series without missing values, the
+        others are reported in `errors`.
+        """
+        y = data.to_numpy(dtype=float)
+
+        complete = ~np.isnan(y).any(axis=0)
+        for column in data.columns[~complete]:
+            self._errors[column] = "ValueError: Series has missing values."
+
+        columns = data.columns[complete]
+        forecast_df, shared = None, {}
+        if not columns.empty:
+            with measure() as usage:
+                try:
+                    forecast_df = self._baseline_frame(
+                        columns, y[:, complete], method
+                    )
+                except ValueError as e:
+                    self._errors.update(
+                        {c: f"ValueError: {e}" for c in columns}
+                    )
+
+            # The fit is shared, charge every series an equal part of it
+            n_series = len(columns)
+            shared = {
+                "wall_s": round(usage["wall_s"] / n_series, 6),
+                "cpu_s": round(usage["cpu_s"] / n_series, 6),
+                "peak_rss_mb": usage["peak_rss_mb"],
+                **{
+                    name: value // n_series
+                    for name, value in frame_stats(
+                        forecast_df, suffix="_out"
+                    ).items()
+                },
+            }
+            self._seconds.update({c: shared["wall_s"] for c in columns})
+
+        for column in data.columns:
+            emit(
+                "Forecaster.forecast.series",
+                series=column,
+                route="baseline",
+                status="error" if column in self._errors else "ok",
+                rows_in=len(data),
+                **(shared if column in columns else {}),
             )
 
-            model.fit(y)
+        return forecast_df
 
-            fh = np.arange(1, self.h + 1)
-            pred = model.predict(fh=fh)
-            pred_interval = model.predict_interval(coverage=self.alpha)
-            pred_interval.index = pred.index  # Align indices
+    def _route(self) -> pd.DataFrame:
+        routes_df = self.routing.classify(
+            self.data, self.sp, total=self.revenue_total
+        )
 
-            result_df = pd.concat([y, pred, pred_interval], axis=1)
-            result_df.columns = ["value", "prediction", "ci_lo", "ci_hi"]
+        if self.method == "arima":
+            routes_df["route"] = "arima_full"
+        elif self.method != "auto":
+            routes_df["route"] = "baseline"
 
-            results[column] = result_df
+        return routes_df
+
+    def forecast(self, *args, **kwargs):
+        self._errors = {}
+        self._seconds = {}
+
+        routes_df = self._route()
+        baseline_method = (
+            self.routing.baseline_method
+            if self.method in ("arima", "auto")
+            else self.method
+        )
+
+        with profile(
+            "Forecaster.forecast",
+            method=self.method,
+            backend=self.backend,
+            n_series=self.data.shape[1],
+            routes=routes_df["route"].value_counts().to_dict(),
+            **frame_stats(self.data, suffix="_in"),
+        ):
+            forecast_dfs = []
+            for route in ROUTES:
+                data = self.data.loc[:, (routes_df["route"] == route).values]
+                if data.shape[1] == 0:
+                    continue
+
+                if route == "baseline":
+                    forecast_df = self._forecast_baseline(
+                        data, baseline_method
+                    )
+                elif route == "arima_restricted":
+                    forecast_df = self._forecast_arima(
+                        data,
+                        route,
+                        *args,
+                        **{**kwargs, **self.routing.restricted_arima},
+                    )
+                else:
+                    forecast_df = self._forecast_arima(
+                        data, route, *args, **kwargs
+                    )
+
+                if forecast_df is not None:
+                    forecast_dfs.append(forecast_df)
+
+        self._routes = routes_df.assign(
+            seconds=[self._seconds.get(c) for c in routes_df.index],
+            status=[
+                "error" if c in self._errors else "ok" for c in routes_df.index
+            ],
+        )
+
+        if not forecast_dfs:
+            raise RuntimeError(
+                f"All series failed to forecast: {self._errors}"
+            )
+
+        combined_df = pd.concat(forecast_dfs, axis=0)
+        if len(forecast_dfs) > 1:
+            # Back to the column order of `data`
+            position = self.data.columns.get_indexer(
+                combined_df.index.droplevel(-1)
+            )
+            combined_df = combined_df.iloc[np.argsort(position, kind="stable")]
 
-        combined_df = pd.concat(results, axis=0)
         combined_df.index.names = [
             *self.data.columns.names,
             *self.data.index.names,
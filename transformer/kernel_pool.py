@@ -0,0 +1,150 @@
+import os
+import queue
+from contextlib import contextmanager
+from typing import Annotated, Iterator, List
+
+from jupyter_client.manager import AsyncKernelManager
+from jupyter_core.utils import run_sync
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from helper.logger import Log
+
+log = Log(log_dir="logs/run_reports", log_name="run_reports.log").get_logger()
+
+# Imported once per kernel and kept in sys.modules across reports
+WARM_IMPORTS = """
+import pandas as pd
+import numpy as np
+import plotnine
+import mizani.formatters
+import my_pandas_extension.plot_forecast
+"""
+
+
+class KernelPool(BaseModel):
+    """
+    Small pool of started kernels with the report libraries pre-imported.
+
+    Args:
+        size (int, optional): Number of kernels kept alive.
+        kernel_name (str, optional): Jupyter kernel spec to start.
+        warm_imports (str, optional): Code run once when a kernel starts.
+        startup_timeout (int, optional): Seconds to wait for a kernel.
+
+    Kernels are handed to papermill through `acquire()` and their
+    namespace is reset when they are returned, so every report starts
+    from a clean namespace without paying for interpreter startup and
+    the pandas / plotnine imports again. A kernel that died, cannot be
+    reset or ran a failed report is replaced by a fresh one.
+
+    Use as a context manager so the kernels are shut down afterwards:
+
+        with KernelPool(size=2) as pool:
+            RunReport(...).execute(kernel_pool=pool)
+    """
+
+    size: Annotated[int, Field(strict=True, gt=0)] = 1
+    kernel_name: str = "python3"
+    warm_imports: str = WARM_IMPORTS
+    startup_timeout: Annotated[int, Field(strict=True, gt=0)] = 60
+
+    _managers: List[AsyncKernelManager] = PrivateAttr(default_factory=list)
+    _idle: queue.Queue = PrivateAttr(default_factory=queue.Queue)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def __enter__(self) -> "KernelPool":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def start(self) -> "KernelPool":
+        while len(self._managers) < self.size:
+            km = AsyncKernelManager(kernel_name=self.kernel_name)
+            self._start_kernel(km)
+            self._managers.append(km)
+            self._idle.put(km)
+
+        log.info(f"Kernel pool ready with {self.size} warm kernel(s)")
+
+        return self
+
+    def _start_kernel(self, km: AsyncKernelManager) -> None:
+        run_sync(km.start_kernel)(cwd=os.getcwd())
+        self._run(km, self.warm_imports)
+
+    def _run(self, km: AsyncKernelManager, code: str) -> None:
+        kc = km.client()
+        kc.start_channels()
+        try:
+            run_sync(kc.wait_for_ready)(timeout=self.startup_timeout)
+            reply = run_sync(kc.execute_interactive)(
+                code,
+                silent=True,
+                store_history=False,
+                timeout=self.startup_timeout,
+            )
+        finally:
+            kc.stop_channels()
+
+        if reply["content"]["status"] != "ok":
+            raise RuntimeError(
+                f"Kernel setup failed: {reply['content'].get('evalue')}"
+            )
+
+    def _reset(self, km: AsyncKernelManager) -> AsyncKernelManager:
+        """Clears the user namespace and restores the working directory."""
+        try:
+            if not run_sync(km.is_alive)():
+                raise RuntimeError("kernel died")
+
+            self._run(
+                km,
+                f"%reset -f\nimport os\nos.chdir({os.getcwd()!r})\n"
+                + self.warm_imports,
+            )
+
+        except Exception as e:
+            log.warning(f"Restarting pooled kernel: {e}")
+            return self._replace(km)
+
+        return km
+
+    def _replace(self, km: AsyncKernelManager) -> AsyncKernelManager:
+        """Shuts a kernel down and starts a fresh one in its place."""
+        # papermill leaves its client connected to a lent kernel, restarting
+        # on the same ports can then hang until the startup timeout
+        run_sync(km.shutdown_kernel)(now=True)
+        fresh = AsyncKernelManager(kernel_name=self.kernel_name)
+        self._managers[self._managers.index(km)] = fresh
+        self._start_kernel(fresh)
+
+        return fresh
+
+    @contextmanager
+    def acquire(self) -> Iterator[AsyncKernelManager]:
+        """Lends a warm kernel manager, to be passed to papermill as `km`."""
+        if not self._managers:
+            self.start()
+
+        km = self._idle.get()
+        try:
+            yield km
+        except Exception:
+            # A failed or timed out notebook can leave the kernel busy,
+            # resetting it would first wait for the cell to finish
+            log.warning("Restarting pooled kernel after a failed report")
+            km = self._replace(km)
+            raise
+        else:
+            km = self._reset(km)
+        finally:
+            self._idle.put(km)
+
+    def shutdown(self) -> None:
+        for km in self._managers:
+            run_sync(km.shutdown_kernel)(now=True)
+
+        self._managers.clear()
+        self._idle = queue.Queue()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Annotated, Any, Hashable, List, Tuple
+
+import joblib
+from path import Path
+from pydantic import BaseModel, ConfigDict, Field
+
+from settings import MODEL_STORE_PATH
+
+
+class CachedModel(BaseModel):
+    """
+    A fitted forecaster together with the ARIMA orders it was built from.
+    """
+
+    model: Any
+    order: Tuple[int, ...]
+    seasonal_order: Tuple[int, ...]
+    aic_per_obs: float
+    searched_at: datetime
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def search_due(self, max_age: timedelta) -> bool:
+        """True when the stepwise order search is older than `max_age`."""
+        return datetime.now() - self.searched_at > max_age
+
+
+class ModelStore(BaseModel):
+    """
+    On-disk store of fitted forecasters keyed by series id, fit
+    configuration and data fingerprint.
+
+    The series id should tell apart series of different frames sharing a
+    store, e.g. ("category_1", "Mountain"), and the configuration key
+    every setting the fit depends on, see `Forecaster`.
+
+    Args:
+        path (Path, optional): Directory holding the cached models.
+        max_entries (int, optional): Maximum number of cached models.
+        max_bytes (int, optional): Maximum total size of the store.
+
+    Entries are evicted least-recently-used first once either limit is
+    exceeded. Reads refresh the modification time of an entry.
+    """
+
+    path: Path = Field(default=Path(MODEL_STORE_PATH))
+    max_entries: Annotated[int, Field(strict=True, gt=0)] = 5_000
+    max_bytes: Annotated[int, Field(strict=True, gt=0)] = 2 * 1024**3
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def model_post_init(self, __context) -> None:
+        self.path = Path(self.path)
+        self.path.makedirs_p()
+
+    @staticmethod
+    def _series_key(series_id: Hashable, config: str) -> str:
+        digest = hashlib.sha1(repr(series_id).encode("utf-8")).hexdigest()
+        return f"{digest[:16]}_{config}"
+
+    def _entry_path(
+        self, series_id: Hashable, config: str, fingerprint: str
+    ) -> Path:
+        return (
+            self.path / f"{self._series_key(series_id, config)}_{fingerprint}"
+        )
+
+    def _load(self, file_path: Path) -> CachedModel | None:
+        try:
+            entry = joblib.load(file_path)
+            os.utime(file_path)
+        except (FileNotFoundError, EOFError):
+            # Evicted or half-written by a concurrent worker
+            return None
+
+        return entry
+
+    def get(
+        self, series_id: Hashable, config: str, fingerprint: str
+    ) -> CachedModel | None:
+        """Model fitted on exactly this data and configuration, if cached."""
+        return self._load(self._entry_path(series_id, config, fingerprint))
+
+    def latest(self, series_id: Hashable, config: str) -> CachedModel | None:
+        """
+        Most recently stored model of a series under this configuration,
+        whatever its data.
+        """
+        candidates = sorted(
+            self.path.files(f"{self._series_key(series_id, config)}_*"),
+            key=lambda f: f.mtime,
+            reverse=True,
+        )
+        for file_path in candidates:
+            entry = self._load(file_path)
+            if entry is not None:
+                return entry
+
+        return None
+
+    def put(
+        self,
+        series_id: Hashable,
+        config: str,
+        fingerprint: str,
+        entry: CachedModel,
+    ) -> None:
+        # Only the newest fit of a series and configuration is worth keeping
+        series_key = self._series_key(series_id, config)
+        for stale in self.path.files(f"{series_key}_*"):
+            stale.remove_p()
+
+        file_path = self._entry_path(series_id, config, fingerprint)
+        tmp_path = file_path + f".{os.getpid()}.tmp"
+        joblib.dump(entry, tmp_path)
+        os.replace(tmp_path, file_path)
+
+        self.evict()
+
+    def evict(self) -> List[Path]:
+        """Removes least recently used entries until within limits."""
+        entries = []
+        for file_path in self.path.files():
+            if file_path.suffix == ".tmp":
+                continue
+            try:
+                entries.append((file_path.mtime, file_path.size, file_path))
+            except FileNotFoundError:
+                continue
+
+        entries.sort(key=lambda x: x[0])
+        total_bytes = sum(size for _, size, _ in entries)
+
+        evicted = []
+        while entries and (
+            len(entries) > self.max_entries or total_bytes > self.max_bytes
+        ):
+            _, size, file_path = entries.pop(0)
+            file_path.remove_p()
+            total_bytes -= size
+            evicted.append(file_path)
+
+        return evicted
+
+    def clear(self) -> None:
+        for file_path in self.path.files():
+            file_path.remove_p()
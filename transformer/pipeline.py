@@ -0,0 +1,299 @@
+import contextvars
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Annotated, Any, Callable, Dict, List, Optional
+
+import joblib
+from path import Path
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
+
+from helper.logger import Log
+from settings import (
+    PIPELINE_CHECKPOINT_PATH,
+    PIPELINE_KEEP_RUNS,
+    PIPELINE_RESUME_MAX_AGE,
+)
+
+log = Log(log_dir="logs/pipeline", log_name="pipeline.log").get_logger()
+
+
+class Stage(BaseModel):
+    """
+    One step of a pipeline.
+
+    Args:
+        name (str): Unique stage name, also the checkpoint file name.
+        func (callable): Called with the outputs of `depends_on` as
+            keyword arguments named after those stages.
+        depends_on (list[str], optional): Stages that must finish first.
+    """
+
+    name: str
+    func: Callable[..., Any]
+    depends_on: List[str] = Field(default_factory=list)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+class Pipeline(BaseModel):
+    """
+    Runs stages in dependency order, independent stages concurrently, and
+    checkpoints every stage output so a failed run resumes where it
+    stopped.
+
+    Args:
+        stages (list[Stage]): The stages, in any order.
+        checkpoint_dir (Path, optional): Parent directory of the run
+            directories.
+        run_id (str, optional): Run to create or resume. Defaults to the
+            latest unfinished run when `resume` is True, otherwise a new
+            timestamped run.
+        resume (bool, optional): Reuse finished stages of an unfinished
+            run. Defaults to True.
+        resume_max_age (timedelta, optional): Unfinished runs started
+            longer ago are not picked up by `resume`, an explicit `run_id`
+            is always resumed.
+        keep_runs (int, optional): Run directories kept once a run
+            finishes, the oldest are deleted.
+        max_workers (int, optional): Stages running at the same time.
+
+    Each run directory holds one joblib file per finished stage and a
+    `state.json` with the status and duration of every stage. A failing
+    stage does not stop stages that do not depend on it.
+
+    Raises:
+        ValueError: If stage names repeat, a dependency is unknown or the
+            dependencies form a cycle.
+    """
+
+    stages: List[Stage]
+    checkpoint_dir: Path = Field(default=Path(PIPELINE_CHECKPOINT_PATH))
+    run_id: Optional[str] = None
+    resume: bool = True
+    resume_max_age: timedelta = PIPELINE_RESUME_MAX_AGE
+    keep_runs: Annotated[int, Field(strict=True, gt=0)] = PIPELINE_KEEP_RUNS
+    max_workers: Annotated[int, Field(strict=True, gt=0)] = 4
+
+    _state: Dict[str, dict] = PrivateAttr(default_factory=dict)
+    _outputs: Dict[str, Any] = PrivateAttr(default_factory=dict)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @model_validator(mode="after")
+    def validate_stages(self):
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique.")
+
+        for stage in self.stages:
+            missing = set(stage.depends_on) - set(names)
+            if missing:
+                raise ValueError(
+                    f"Stage '{stage.name}' depends on unknown {missing}."
+                )
+
+        # Kahn's algorithm, whatever is left unsorted lies on a cycle
+        depends_on = {
+            stage.name: set(stage.depends_on) for stage in self.stages
+        }
+        while True:
+            free = {name for name, deps in depends_on.items() if not deps}
+            if not free:
+                break
+            depends_on = {
+                name: deps - free
+                for name, deps in depends_on.items()
+                if name not in free
+            }
+
+        if depends_on:
+            raise ValueError(
+                f"Stages {sorted(depends_on)} depend on each other in a cycle."
+            )
+
+        return self
+
+    def model_post_init(self, __context) -> None:
+        self.checkpoint_dir = Path(self.checkpoint_dir)
+
+        if self.run_id is None:
+            self.run_id = (self.resume and self._unfinished_run()) or (
+                datetime.now().strftime("%Y%m%dT%H%M%S")
+            )
+
+        self.run_dir.makedirs_p()
+        self._state = self._read_state() if self.resume else {}
+
+    @property
+    def run_dir(self) -> Path:
+        return self.checkpoint_dir / self.run_id
+
+    def _runs(self) -> List[Path]:
+        """Run directories, newest first."""
+        if not self.checkpoint_dir.exists():
+            return []
+
+        return sorted(
+            self.checkpoint_dir.dirs(), key=self._started_at, reverse=True
+        )
+
+    @staticmethod
+    def _started_at(run_dir: Path) -> datetime:
+        # The first checkpoint is written by the first stage, the state
+        # file is rewritten on every change
+        paths = run_dir.files("*.joblib") or run_dir.files() or [run_dir]
+        return datetime.fromtimestamp(min(path.mtime for path in paths))
+
+    def _unfinished_run(self) -> Optional[str]:
+        for run_dir in self._runs():
+            state_path = run_dir / "state.json"
+            if not state_path.exists():
+                continue
+
+            state = json.loads(state_path.read_text())
+            if all(entry["status"] == "done" for entry in state.values()):
+                # Stop at the latest finished run
+                return None
+
+            age = datetime.now() - self._started_at(run_dir)
+            if age > self.resume_max_age:
+                log.warning(
+                    f"[{run_dir.name}] unfinished but started {age} ago, "
+                    "starting a new run"
+                )
+                return None
+
+            return run_dir.name
+
+        return None
+
+    def _prune_runs(self) -> None:
+        for run_dir in self._runs()[self.keep_runs :]:
+            if run_dir != self.run_dir:
+                log.info(f"[{self.run_id}] deleting old run {run_dir.name}")
+                run_dir.rmtree_p()
+
+    def _read_state(self) -> Dict[str, dict]:
+        state_path = self.run_dir / "state.json"
+        if not state_path.exists():
+            return {}
+
+        state = json.loads(state_path.read_text())
+
+        # A stage only counts as done while its checkpoint is still there
+        return {
+            name: entry
+            for name, entry in state.items()
+            if entry["status"] != "done" or self._checkpoint(name).exists()
+        }
+
+    def _write_state(self) -> None:
+        state_path = self.run_dir / "state.json"
+        tmp_path = state_path + f".{os.getpid()}.tmp"
+        Path(tmp_path).write_text(json.dumps(self._state, indent=2))
+        os.replace(tmp_path, state_path)
+
+    def _checkpoint(self, name: str) -> Path:
+        return self.run_dir / f"{name}.joblib"
+
+    def _is_done(self, name: str) -> bool:
+        return self._state.get(name, {}).get("status") == "done"
+
+    def output(self, name: str) -> Any:
+        """Output of a finished stage, loaded from its checkpoint if needed."""
+        if name not in self._outputs:
+            self._outputs[name] = joblib.load(self._checkpoint(name))
+
+        return self._outputs[name]
+
+    def _run_stage(self, stage: Stage) -> Any:
+        inputs = {name: self.output(name) for name in stage.depends_on}
+        result = stage.func(**inputs)
+
+        checkpoint = self._checkpoint(stage.name)
+        tmp_path = checkpoint + f".{os.getpid()}.tmp"
+        joblib.dump(result, tmp_path)
+        os.replace(tmp_path, checkpoint)
+
+        return result
+
+    def run(self) -> Dict[str, dict]:
+        """Runs every unfinished stage and returns the per-stage state."""
+        stages = {stage.name: stage for stage in self.stages}
+        pending = {name for name in stages if not self._is_done(name)}
+
+        for name in sorted(set(stages) - pending):
+            log.info(f"[{self.run_id}] {name}: done in an earlier run")
+
+        # Failures of this run; earlier failures are retried
+        failed = set()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Stages whose dependencies failed can never run
+                for name in list(pending):
+                    if failed.intersection(stages[name].depends_on):
+                        pending.discard(name)
+                        failed.add(name)
+                        self._state[name] = {"status": "blocked"}
+                        log.warning(f"[{self.run_id}] {name}: blocked")
+
+                ready = [
+                    name
+                    for name in sorted(pending)
+                    if all(
+                        self._is_done(dep) for dep in stages[name].depends_on
+                    )
+                ]
+                for name in ready:
+                    pending.discard(name)
+                    log.info(f"[{self.run_id}] {name}: started")
+                    self._state[name] = {"status": "running"}
+                    # Stage threads see the caller's context vars, e.g.
+                    # profiling or trusted mode turned on around `run`
+                    future = executor.submit(
+                        contextvars.copy_context().run,
+                        self._run_stage,
+                        stages[name],
+                    )
+                    running[future] = (name, time.perf_counter())
+
+                self._write_state()
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, start = running.pop(future)
+                    seconds = round(time.perf_counter() - start, 2)
+
+                    try:
+                        self._outputs[name] = future.result()
+                        self._state[name] = {
+                            "status": "done",
+                            "seconds": seconds,
+                        }
+                        log.info(f"[{self.run_id}] {name}: done in {seconds}s")
+                    except Exception as e:
+                        failed.add(name)
+                        self._state[name] = {
+                            "status": "failed",
+                            "seconds": seconds,
+                            "error": f"{type(e).__name__}: {e}",
+                        }
+                        log.exception(f"[{self.run_id}] {name}: failed")
+
+            self._write_state()
+
+        self._prune_runs()
+
+        return self._state
+
+    @property
+    def succeeded(self) -> bool:
+        return all(self._is_done(stage.name) for stage in self.stages)
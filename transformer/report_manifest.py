@@ -0,0 +1,68 @@
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+from path import Path
+from pydantic import BaseModel, ConfigDict, Field
+
+from settings import REPORT_MANIFEST_PATH
+
+
+class ReportManifest(BaseModel):
+    """
+    Records the input hash each report output was last built from.
+
+    Args:
+        path (Path, optional): Directory holding one JSON entry per report.
+
+    An entry maps a stage ("execute", "html", "pdf") to the hash of the
+    template, parameters and report data it was produced from. A stage is
+    up to date when its hash matches and its output file still exists.
+    Entries are separate files so reports rendered by concurrent workers
+    never write the same file.
+    """
+
+    path: Path = Field(default=Path(REPORT_MANIFEST_PATH))
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def model_post_init(self, __context) -> None:
+        self.path = Path(self.path)
+        self.path.makedirs_p()
+
+    def _entry_path(self, report_name: str) -> Path:
+        return self.path / f"{report_name}.json"
+
+    def read(self, report_name: str) -> dict:
+        try:
+            return json.loads(self._entry_path(report_name).read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def is_current(
+        self, report_name: str, stage: str, input_hash: str, output: Path
+    ) -> bool:
+        stage_entry: Optional[dict] = self.read(report_name).get(stage)
+
+        return (
+            stage_entry is not None
+            and stage_entry["input_hash"] == input_hash
+            and Path(output).exists()
+        )
+
+    def record(self, report_name: str, stage: str, input_hash: str) -> None:
+        entry = self.read(report_name)
+        entry[stage] = {
+            "input_hash": input_hash,
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+        file_path = self._entry_path(report_name)
+        tmp_path = file_path + f".{os.getpid()}.tmp"
+        Path(tmp_path).write_text(json.dumps(entry, indent=2))
+        os.replace(tmp_path, file_path)
+
+    def clear(self) -> None:
+        for file_path in self.path.files("*.json"):
+            file_path.remove_p()
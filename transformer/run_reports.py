@@ -1,7 +1,16 @@
-from pydantic import BaseModel, ConfigDict, Field, model_validator
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 import pandas as pd
 from path import Path
-from typing import Literal
+from typing import Annotated, List, Literal, Optional
 import papermill as pm  # type: ignore
 from traitlets.config import Config
 from settings import make_nbconvert_config
@@ -9,6 +18,10 @@ from nbconvert.writers import FilesWriter
 from nbconvert.exporters import HTMLExporter, PDFExporter
 from nbconvert.preprocessors import TagRemovePreprocessor
 from helper.logger import Log
+from helper.profiling import current_mode, frame_stats, profile, profiling
+from helper.utils import fingerprint_frame
+from transformer.kernel_pool import KernelPool
+from transformer.report_manifest import ReportManifest
 
 log = Log(
         log_dir="logs/run_reports", log_name="run_reports.log"
@@ -29,6 +42,15 @@ class RunReport(BaseModel):
     config: Config = make_nbconvert_config()
     file_name: str = None  # type: ignore
     file_dir_path: str = None  # type: ignore
+    data_dir_path: Path = Field(default=Path("reports/output/data"))
+    data_path: Path = None  # type: ignore
+    manifest: ReportManifest = Field(default_factory=ReportManifest)
+    force: bool = False
+    execution_timeout: Optional[float] = None
+
+    _input_hash: str = PrivateAttr(default=None)  # type: ignore
+    _executed: bool = PrivateAttr(default=False)
+    _converted: bool = PrivateAttr(default=False)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
@@ -45,6 +67,9 @@ class RunReport(BaseModel):
                 f"sales_report_{self.report_info.lower().replace(' ', '_')}"
         )
 
+        if self.data_path is None:
+            self.data_path = Path(self.data_dir_path) / f"{self.file_name}.parquet"
+
         if self.format == "html":
             self.config.HTMLExporter.preprocessors = [TagRemovePreprocessor()]
             self.file_dir_path = Path("reports/report_Html/")
@@ -76,26 +101,99 @@ class RunReport(BaseModel):
 
         return list(return_ids)
 
+    @property
+    def skipped(self) -> bool:
+        """True when neither execution nor export had to run."""
+        return not (self._executed or self._converted)
+
+    def input_hash(self) -> str:
+        """Hash of the template, parameters and data behind this report."""
+        if self._input_hash is None:
+            ids = self._prepare_ids()
+
+            digest = hashlib.sha1(Path(self.template_path).read_bytes())
+            digest.update(
+                json.dumps({"ids": ids, "title": self.title}).encode("utf-8")
+            )
+            digest.update(
+                fingerprint_frame(
+                    self.data[self.data["id"].isin(ids)].reset_index(drop=True)
+                ).encode("utf-8")
+            )
+            self._input_hash = digest.hexdigest()
+
+        return self._input_hash
+
+    def _is_current(self, stage: str, output: Path) -> bool:
+        if self.force:
+            return False
+
+        return self.manifest.is_current(
+            self.file_name, stage, self.input_hash(), output
+        )
+
+    def write_report_data(self, ids: list) -> Path:
+        """Writes only the rows of this report's ids for the notebook."""
+        log.info(f"Writing report data to {self.data_path}")
+
+        report_df = self.data[self.data["id"].isin(ids)]
+
+        Path(self.data_path).parent.makedirs_p()
+        report_df.to_parquet(self.data_path, index=False)
+
+        return Path(self.data_path).absolute()
+
     def build_param(self):
         log.info("Build Parameters")
 
+        ids = list(self._prepare_ids())
+
         params = {
-                "ids"  : list(self._prepare_ids()),
-                "data" : self.data.to_json(),
-                "title": self.title,
+                "ids"      : ids,
+                "data_path": str(self.write_report_data(ids)),
+                "title"    : self.title,
         }
         return params
 
-    def execute(self):
-        log.info("Papermill is executing")
-        params = self.build_param()
+    def execute(self, kernel_pool: KernelPool = None):  # type: ignore
+        with profile(
+                "RunReport.execute",
+                report=self.file_name,
+                pooled=kernel_pool is not None,
+                **frame_stats(self.data, suffix="_in"),
+        ) as record:
+            record["skipped"] = self._is_current("execute", self.output_path)
+            if record["skipped"]:
+                log.info(f"{self.file_name} inputs unchanged, skipping execution")
+                return self
 
-        pm.execute_notebook(
-                input_path=self.template_path,
-                output_path=self.output_path,
-                parameters=params,
-                report_mode=True,
-        )
+            log.info("Papermill is executing")
+            params = self.build_param()
+
+            if kernel_pool is None:
+                # On a cell timeout papermill still shuts its kernel down
+                pm.execute_notebook(
+                        input_path=self.template_path,
+                        output_path=self.output_path,
+                        parameters=params,
+                        report_mode=True,
+                        execution_timeout=self.execution_timeout,
+                )
+            else:
+                # papermill forwards `km` to the notebook client, which leaves
+                # a kernel it does not own running after the notebook is done
+                with kernel_pool.acquire() as km:
+                    pm.execute_notebook(
+                            input_path=self.template_path,
+                            output_path=self.output_path,
+                            parameters=params,
+                            report_mode=True,
+                            km=km,
+                            execution_timeout=self.execution_timeout,
+                    )
+
+            self.manifest.record(self.file_name, "execute", self.input_hash())
+            self._executed = True
 
         return self
 
@@ -109,6 +207,12 @@ class RunReport(BaseModel):
         return self
 
     def convert(self) -> str:
+        exported_path = Path(self.file_dir_path) / f"{self.file_name}.{self.format}"
+
+        if self._is_current(self.format, exported_path):
+            log.info(f"{exported_path} is up to date, skipping export")
+            return f"File already up to date at {exported_path}"
+
         log.info(f"Converting IPYNB format to {self.format}")
         if self.format == "html":
             (body, resources) = HTMLExporter(config=self.config).from_filename(
@@ -121,4 +225,282 @@ class RunReport(BaseModel):
 
         self.filewriter(body, resources)
 
+        self.manifest.record(self.file_name, self.format, self.input_hash())
+        self._converted = True
+
         return f"File Converted Successfully to {self.format} and saved to {self.file_dir_path}"  # type: ignore
+
+
+REPORT_INFOS = ["Total Revenue", "Category 1", "Category 2", "Bikeshop"]
+
+# Seconds a timed out worker gets to shut its kernel down before it is
+# terminated, terminating it earlier would leave the kernel running
+TIMEOUT_GRACE_S = 30
+
+
+def _render_report(
+    report_kwargs: dict, results, kernel_pool: KernelPool = None  # type: ignore
+) -> None:
+    """Executes and converts one report, timing both."""
+    report_info = report_kwargs["report_info"]
+    summary = {"report_info": report_info, "status": "ok", "error": None}
+
+    try:
+        start = time.perf_counter()
+        report = RunReport(**report_kwargs).execute(kernel_pool=kernel_pool)
+        summary["execute_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report.convert()
+        summary["convert_s"] = time.perf_counter() - start
+
+        if report.skipped:
+            summary["status"] = "skipped"
+    except Exception as e:
+        # nbclient raises a TimeoutError subclass for a cell timeout
+        summary["status"] = (
+            "timeout" if isinstance(e, TimeoutError) else "failed"
+        )
+        # Notebook errors carry the full traceback, keep the final line
+        message = str(e).strip().splitlines()
+        summary["error"] = f"{type(e).__name__}: {message[-1] if message else ''}"
+
+    results.put(summary)
+
+
+def _exit_on_sigterm(signum, frame) -> None:
+    # Unwinds the worker so its pooled kernel is shut down on terminate()
+    sys.exit(128 + signum)
+
+
+def _render_worker(
+    tasks, results, warm_kernels: bool, profile_mode: str
+) -> None:
+    """
+    Process target: renders reports from `tasks` until it gets None,
+    reusing one warm kernel for all of them. `profile_mode` is the
+    profiling mode of the parent, which a spawned process does not see.
+    """
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+    # Started on the first report that is not skipped
+    kernel_pool = KernelPool(size=1) if warm_kernels else None
+    try:
+        with profiling(
+            enabled=profile_mode != "0", deep=profile_mode == "deep"
+        ):
+            while (report_kwargs := tasks.get()) is not None:
+                results.put(
+                    {
+                        "event": "started",
+                        "pid": os.getpid(),
+                        "report_info": report_kwargs["report_info"],
+                    }
+                )
+                _render_report(
+                    report_kwargs, results, kernel_pool=kernel_pool
+                )
+    finally:
+        if kernel_pool is not None:
+            kernel_pool.shutdown()
+        # The log handlers write from a queue, which a process target
+        # does not flush on exit
+        log.complete()
+
+
+class ReportBatch(BaseModel):
+    """
+    Renders several reports concurrently on `n_jobs` worker processes.
+
+    Args:
+        data (DataFrame): Forecast table, split per report before it is
+            shipped to the workers.
+        report_infos (list, optional): Reports to render. Defaults to all.
+        format (str, optional): "html" or "pdf". Defaults to "html".
+        n_jobs (int, optional): Reports rendered at the same time.
+        timeout (float, optional): Seconds a notebook cell may run before
+            papermill stops the report. Workers still on the same report
+            TIMEOUT_GRACE_S seconds later are terminated. Defaults to 600.
+        force (bool, optional): Rebuild reports whose inputs are unchanged.
+        warm_kernels (bool, optional): Each worker keeps one kernel with
+            the report libraries imported (see `KernelPool`) and renders
+            its following reports on it, instead of starting a kernel per
+            report. Defaults to True.
+
+    A failing or timed out report is recorded in the summary and does not
+    stop the others. A terminated worker is replaced while reports are
+    left.
+    """
+
+    data: pd.DataFrame
+    report_infos: List[
+        Literal["Total Revenue", "Category 1", "Category 2", "Bikeshop"]
+    ] = Field(default_factory=lambda: list(REPORT_INFOS))
+    format: Literal["html", "pdf"] = "html"
+    n_jobs: Annotated[int, Field(strict=True, gt=0)] = 4
+    timeout: Annotated[float, Field(gt=0)] = 600
+    force: bool = False
+    warm_kernels: bool = True
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def _report_kwargs(self, report_info: str) -> dict:
+        return {
+            "data": self.data[self.data["id"].str.startswith(report_info)],
+            "report_info": report_info,
+            "format": self.format,
+            "force": self.force,
+            "execution_timeout": self.timeout,
+        }
+
+    def run(self) -> pd.DataFrame:
+        """Renders all reports and returns the per-report stage timings."""
+        ctx = multiprocessing.get_context("spawn")
+        tasks = ctx.Queue()
+        results = ctx.Queue()
+
+        for report_info in self.report_infos:
+            tasks.put(self._report_kwargs(report_info))
+
+        n_workers = min(self.n_jobs, len(self.report_infos))
+        # One stop marker per worker, a replaced worker takes over the
+        # marker of the one it replaces
+        for _ in range(n_workers):
+            tasks.put(None)
+
+        # Worker process -> report it is rendering and when it started
+        workers = {}
+        n_started = 0
+        summaries = {}
+        batch_start = time.perf_counter()
+
+        def start_worker() -> None:
+            process = ctx.Process(
+                target=_render_worker,
+                args=(tasks, results, self.warm_kernels, current_mode()),
+            )
+            process.start()
+            workers[process] = (None, None)
+
+        def finish(report_info: str, summary: dict, start: float) -> None:
+            elapsed = time.perf_counter() - start
+            summaries[report_info] = {**summary, "total_s": elapsed}
+            log.info(f"{report_info}: {summary['status']} in {elapsed:.1f}s")
+
+        def collect(block_s: float = 0.0) -> None:
+            nonlocal n_started
+            try:
+                while True:
+                    message = results.get(timeout=block_s)
+                    block_s = 0.0
+                    report_info = message["report_info"]
+
+                    if message.get("event") == "started":
+                        n_started += 1
+                        log.info(f"Rendering {report_info}")
+                        process = next(
+                            p for p in workers if p.pid == message["pid"]
+                        )
+                        workers[process] = (report_info, time.perf_counter())
+                        continue
+
+                    for process, (current, start) in workers.items():
+                        if current == report_info:
+                            finish(report_info, message, start)
+                            workers[process] = (None, None)
+                            break
+            except queue.Empty:
+                pass
+
+        for _ in range(n_workers):
+            start_worker()
+
+        while workers:
+            collect(block_s=0.2)
+
+            for process, (report_info, start) in list(workers.items()):
+                if report_info is not None and process.is_alive() and (
+                    time.perf_counter() - start
+                    > self.timeout + TIMEOUT_GRACE_S
+                ):
+                    # The worker shuts its kernel down on SIGTERM
+                    process.terminate()
+                    process.join(timeout=TIMEOUT_GRACE_S)
+                    if process.is_alive():
+                        process.kill()
+                        process.join()
+                    finish(
+                        report_info,
+                        {
+                            "report_info": report_info,
+                            "status": "timeout",
+                            "error": f"Exceeded {self.timeout}s",
+                        },
+                        start,
+                    )
+                elif not process.is_alive():
+                    process.join()
+                    collect(block_s=1.0)
+                    report_info, start = workers[process]
+                    if report_info is not None:
+                        finish(
+                            report_info,
+                            {
+                                "report_info": report_info,
+                                "status": "failed",
+                                "error": f"Exit code {process.exitcode}",
+                            },
+                            start,
+                        )
+                else:
+                    continue
+
+                del workers[process]
+                if process.exitcode != 0 and n_started < len(
+                    self.report_infos
+                ):
+                    start_worker()
+
+        summary_df = pd.DataFrame(
+            [summaries[report_info] for report_info in self.report_infos],
+            columns=[
+                "report_info",
+                "status",
+                "execute_s",
+                "convert_s",
+                "total_s",
+                "error",
+            ],
+        )
+
+        log.info(
+            f"Rendered {len(summary_df)} reports in "
+            f"{time.perf_counter() - batch_start:.1f}s "
+            f"({(summary_df['status'] == 'ok').sum()} ok, "
+            f"{(summary_df['status'] == 'skipped').sum()} skipped)"
+        )
+
+        return summary_df
+
+
+if __name__ == "__main__":
+    from transformer.data_access import DataAccess
+
+    parser = argparse.ArgumentParser(description="Render the sales reports.")
+    parser.add_argument(
+        "--format", choices=["html", "pdf"], default="html", help="Export format"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild reports even when their inputs are unchanged",
+    )
+    args = parser.parse_args()
+
+    forecast_df = DataAccess().read_data_from_db(table_name="forecast")  # type: ignore
+
+    print(
+        ReportBatch(
+            data=forecast_df, format=args.format, force=args.force
+        ).run()
+    )
@@ -1,152 +1,366 @@
 # Library
+import argparse
+import sys
 import warnings
+from contextlib import nullcontext
+from typing import List, Literal, Optional
 
+import joblib
 import pandas as pd
+from pydantic import BaseModel, Field
 
 from helper.logger import Log
+from helper.profiling import profiling
 from transformer.bike_order_transformer import BikeOrderTransformer
-from transformer.forecasting import Forecaster
 from transformer.data_access import DataAccess
+from transformer.forecasting import Forecaster, RoutingPolicy
+from transformer.model_store import ModelStore
+from transformer.pipeline import Pipeline, Stage
+from transformer.run_reports import ReportBatch
 
-from my_pandas_extension.timeseries_func import summarize_by_time  # isort: skip
-from helper.utils import prepare_data  # isort: skip
+from my_pandas_extension.timeseries_func import summarize_hierarchy  # isort: skip
+from helper.utils import fingerprint_wide_frame, prepare_data  # isort: skip
 
 warnings.filterwarnings(
     "ignore", message="'force_all_finite'", category=FutureWarning
 )
 
-db_access = DataAccess()
-
 log = Log(
     log_dir="logs/update_database", log_name="update_database.log"
 ).get_logger()
 
 
-bike_order_line_df = BikeOrderTransformer().transform_data()  # type: ignore
-
-bike_order_line_df["order_date"] = pd.to_datetime(
-    bike_order_line_df["order_date"]
-)
-
-
-# 1.0 SUMMARIZE AND FORECAST
-
-
-# 1.1 Total Revenue
-
-log.info("Forecast 1/4: Forecasting Total Revenue...\n")
-
-total_revenue_m_df = bike_order_line_df.summarize_by_time(
-    date_column="order_date",
-    value_column=["total_price"],
-    rules="MS",
-    time_format="period",
-)
-
-forecast_df = Forecaster(data=total_revenue_m_df, h=12, sp=12).forecast()
-
-forecast_df = forecast_df.assign(id="Total Revenue").prepare_data(
-    id_column="id", date_column="order_date"
-)
-
-log.info("Forecast 1/4: Forecasting Total Revenue Complete\n")
-
-
-# 1.2 Revenue by Category 1
-
-log.info("Forecast 2/4: Forecasting Category 1...\n")
-
-revenue_by_category_1_m_df = bike_order_line_df.summarize_by_time(
-    date_column="order_date",
-    value_column=["total_price"],
-    groups=["category_1"],
-    rules="MS",
-    time_format="period",
-)
+class ForecastLevel(BaseModel):
+    """One level of the revenue hierarchy and how it is forecast."""
+
+    name: str
+    group: Optional[str]
+    id_format: str
+    rule: Literal["MS", "Q"]
+    h: int
+    sp: Literal[3, 6, 12, 24]
+    alpha: float = 0.95
+    backend: Literal["serial", "threads", "processes"] = "serial"
+    n_jobs: int = 1
+    method: Literal["arima", "auto"] = "arima"
+    routing: RoutingPolicy = Field(default_factory=RoutingPolicy)
+
+    def config_hash(self) -> str:
+        """Hash of every setting the forecasts depend on, not how they run."""
+        return joblib.hash(self.model_dump(exclude={"backend", "n_jobs"}))
+
+
+FORECAST_LEVELS: List[ForecastLevel] = [
+    ForecastLevel(
+        name="total_revenue",
+        group=None,
+        id_format="Total Revenue",
+        rule="MS",
+        h=12,
+        sp=12,
+    ),
+    ForecastLevel(
+        name="category_1",
+        group="category_1",
+        id_format="Category 1: {}",
+        rule="MS",
+        h=12,
+        sp=12,
+    ),
+    ForecastLevel(
+        name="category_2",
+        group="category_2",
+        id_format="Category 2: {}",
+        rule="MS",
+        h=12,
+        sp=12,
+    ),
+    ForecastLevel(
+        name="bikeshop",
+        group="bikeshop_name",
+        id_format="Bikeshop: {}",
+        rule="Q",
+        h=4,
+        sp=3,
+        backend="processes",
+        n_jobs=-1,
+        # Many small, short-lived shops, route them by size
+        method="auto",
+    ),
+]
+
+SUMMARY_COLUMNS = [
+    "order_date",
+    "total_price",
+    *(level.group for level in FORECAST_LEVELS if level.group),
+]
 
+db_access = DataAccess()
 
-forecast_by_cat1_df = Forecaster(
-    data=revenue_by_category_1_m_df, h=12, sp=12
-).forecast()
-
-forecast_by_cat1_df = forecast_by_cat1_df.prepare_data(
-    id_column="category_1", date_column="order_date"
-).assign(id=lambda x: "Category 1: " + x["id"])
+# Fitted models and their ARIMA orders, reused across nightly runs
+model_store = ModelStore()
 
 
-log.info("Forecast 2/4: Forecasting Total Revenue Complete\n")
+# 1.0 EXTRACT AND TRANSFORM
 
-# 1.3 Revenue by Category 2
 
-log.info("Forecast 3/4: Forecasting Category 1...\n")
+def extract() -> dict:
+    """Cleaned order lines and the fingerprints of the stored forecasts."""
+    return {
+        "order_lines": BikeOrderTransformer().transform_data(  # type: ignore
+            method="sql", use_cache=True
+        ),
+        "fingerprints": db_access.read_fingerprints().set_index("id"),
+    }
 
 
-revenue_by_category_2_m_df = bike_order_line_df.summarize_by_time(
-    date_column="order_date",
-    value_column=["total_price"],
-    groups=["category_2"],
-    rules="MS",
-    time_format="period",
-)
+def transform(extract: dict) -> pd.DataFrame:
+    """Keeps the columns the hierarchy needs and parses the order date."""
+    order_lines_df = extract["order_lines"].loc[:, SUMMARY_COLUMNS]
+    order_lines_df["order_date"] = pd.to_datetime(order_lines_df["order_date"])
 
+    return order_lines_df
 
-forecast_by_cat2_df = Forecaster(
-    data=revenue_by_category_2_m_df, h=12, sp=12
-).forecast()
 
-forecast_by_cat2_df = forecast_by_cat2_df.prepare_data(
-    id_column="category_2", date_column="order_date"
-).assign(id=lambda x: "Category 2: " + x["id"])
+# 2.0 SUMMARIZE
 
-log.info("Forecast 3/4: Forecasting Total Revenue Complete\n")
 
-# 1.4 Revenue by Customer
+def summarize(transform: pd.DataFrame) -> dict:
+    """All levels from one pass over the order lines."""
+    level_dfs = transform.summarize_hierarchy(
+        date_column="order_date",
+        value_column=["total_price"],
+        grouping_sets=[
+            [level.group] if level.group else None for level in FORECAST_LEVELS
+        ],
+        rules=[level.rule for level in FORECAST_LEVELS],
+        time_format="period",
+    )
 
-log.info("Forecast 4/4: Forecasting Revenue by Customer...\n")
+    return {
+        level.name: level_df
+        for level, level_df in zip(FORECAST_LEVELS, level_dfs)
+    }
 
 
-revenue_by_bikeshop_Q_df = bike_order_line_df.summarize_by_time(
-    date_column="order_date",
-    value_column=["total_price"],
-    groups=["bikeshop_name"],
-    rules="Q",
-    time_format="period",
-)
-forecast_by_bikeshop_df = Forecaster(
-    data=revenue_by_bikeshop_Q_df, h=4, sp=3
-).forecast()
+# 3.0 FORECAST
 
 
-forecast_by_bikeshop_df = forecast_by_bikeshop_df.prepare_data(
-    id_column="bikeshop_name", date_column="order_date"
-).assign(id=lambda x: "Bikeshop: " + x["id"])
+def select_changed(
+    fingerprints_df: pd.DataFrame, stored_fingerprints_df: pd.DataFrame
+) -> list:
+    """Columns whose row count or content changed since the last run."""
+    stored_n_rows = fingerprints_df["id"].map(stored_fingerprints_df["n_rows"])
+    stored_hash = fingerprints_df["id"].map(
+        stored_fingerprints_df["data_hash"]
+    )
 
-log.info("Forecast 4/4: Forecasting Total Revenue by Customer Complete\n")
+    changed = (fingerprints_df["n_rows"] != stored_n_rows) | (
+        fingerprints_df["data_hash"] != stored_hash
+    )
 
+    return fingerprints_df.index[changed].tolist()
 
-# 2.0 UPDATE DATABASE
 
-log.info("updating database")
+def forecast_level(level: ForecastLevel, summarize: dict, extract: dict):
+    """Refits only the changed series of one level."""
+    level_df = summarize[level.name]
 
+    # A new horizon or model refits the level even if its data is unchanged
+    fingerprints_df = fingerprint_wide_frame(
+        level_df, id_format=level.id_format, config=level.config_hash()
+    )
+    changed = select_changed(fingerprints_df, extract["fingerprints"])
 
-all_forecasts_df = pd.concat(
-    [
-        forecast_df,
-        forecast_by_cat1_df,
-        forecast_by_cat2_df,
-        forecast_by_bikeshop_df,
-    ],
-    axis=0,
-)
+    log.info(f"{level.name}: {len(changed)} of {level_df.shape[1]} changed")
 
-all_forecasts_df
+    if not changed:
+        return {"forecast": None, "fingerprints": fingerprints_df}
 
-# 2.1 Writing database
+    forecaster = Forecaster(
+        data=level_df.loc[:, changed],
+        h=level.h,
+        sp=level.sp,
+        alpha=level.alpha,
+        backend=level.backend,
+        n_jobs=level.n_jobs,
+        method=level.method,
+        routing=level.routing,
+        # Routes by the share of the whole level, not of the changed series
+        revenue_total=float(level_df.sum().sum()),
+        model_store=model_store,
+        store_namespace=level.name,
+        warm_start=True,
+    )
+    forecast_df = forecaster.forecast()
 
-db_access.write_data_to_db(  # type: ignore
-    data=all_forecasts_df,
-    table_name="forecast",
-    if_exists="replace",
-    id_column="id",
-    date_column="date",
-)
+    route_seconds = forecaster.routes.groupby("route")["seconds"].agg(
+        ["size", "sum"]
+    )
+    for route, n_series, seconds in route_seconds.itertuples():
+        log.info(f"{level.name}: {route} {n_series} series in {seconds:.1f}s")
+
+    for column, error in forecaster.errors.items():
+        log.warning(f"{level.name}: {column} failed: {error}")
+
+    if level.group is None:
+        forecast_df = forecast_df.assign(id=level.id_format).prepare_data(
+            id_column="id", date_column="order_date"
+        )
+    else:
+        forecast_df = forecast_df.prepare_data(
+            id_column=level.group, date_column="order_date"
+        ).assign(id=lambda x: x["id"].map(level.id_format.format))
+
+    return {"forecast": forecast_df, "fingerprints": fingerprints_df}
+
+
+# 4.0 UPDATE DATABASE
+
+
+def write(**forecasts: dict) -> pd.DataFrame:
+    """Upserts the new forecasts and records their fingerprints."""
+    forecast_dfs = [
+        result["forecast"]
+        for result in forecasts.values()
+        if result["forecast"] is not None
+    ]
+
+    if not forecast_dfs:
+        log.info("No series changed, database is up to date")
+        return pd.DataFrame(columns=["id"])
+
+    all_forecasts_df = pd.concat(forecast_dfs, axis=0)
+
+    db_access.write_data_to_db(  # type: ignore
+        data=all_forecasts_df,
+        table_name="forecast",
+        if_exists="upsert",
+        id_column="id",
+        date_column="date",
+    )
+
+    # Record fingerprints only for the ids that were actually written
+    all_fingerprints_df = pd.concat(
+        [result["fingerprints"] for result in forecasts.values()], axis=0
+    )
+    all_fingerprints_df = all_fingerprints_df[
+        all_fingerprints_df["id"].isin(all_forecasts_df["id"])
+    ]
+
+    db_access.write_fingerprints(fingerprints=all_fingerprints_df)  # type: ignore
+
+    return all_forecasts_df[["id"]].drop_duplicates()
+
+
+# 5.0 REPORTS
+
+
+def report(write: pd.DataFrame, format: Literal["html", "pdf"] = "html"):
+    """Renders the reports, skipping those whose inputs are unchanged."""
+    forecast_df = db_access.read_data_from_db(table_name="forecast")  # type: ignore
+
+    summary_df = ReportBatch(data=forecast_df, format=format).run()
+
+    failed = summary_df[~summary_df["status"].isin(["ok", "skipped"])]
+    if not failed.empty:
+        raise RuntimeError(f"Reports failed: {failed['report_info'].tolist()}")
+
+    return summary_df
+
+
+def build_pipeline(
+    run_id: Optional[str] = None,
+    resume: bool = True,
+    reports: bool = True,
+    report_format: Literal["html", "pdf"] = "html",
+    max_workers: int = 4,
+) -> Pipeline:
+    """
+    extract -> transform -> summarize -> forecast_<level> (concurrently)
+    -> write -> report
+    """
+    forecast_stages = [
+        Stage(
+            name=f"forecast_{level.name}",
+            func=lambda level=level, **inputs: forecast_level(level, **inputs),
+            depends_on=["summarize", "extract"],
+        )
+        for level in FORECAST_LEVELS
+    ]
+
+    stages = [
+        Stage(name="extract", func=extract),
+        Stage(name="transform", func=transform, depends_on=["extract"]),
+        Stage(name="summarize", func=summarize, depends_on=["transform"]),
+        *forecast_stages,
+        Stage(
+            name="write",
+            func=write,
+            depends_on=[stage.name for stage in forecast_stages],
+        ),
+    ]
+
+    if reports:
+        stages.append(
+            Stage(
+                name="report",
+                func=lambda write: report(write, format=report_format),
+                depends_on=["write"],
+            )
+        )
+
+    return Pipeline(
+        stages=stages,
+        run_id=run_id,
+        resume=resume,
+        max_workers=max_workers,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Refresh the forecast table and the sales reports."
+    )
+    parser.add_argument("--run-id", help="Run to create or resume")
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Start a new run instead of resuming the last unfinished one",
+    )
+    parser.add_argument(
+        "--no-reports", action="store_true", help="Skip the report stage"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["html", "pdf"],
+        default="html",
+        help="Report format",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["on", "deep"],
+        help="Write profiling records to logs/profile/profile.jsonl, "
+        "'deep' also counts the bytes of object columns",
+    )
+    args = parser.parse_args()
+
+    pipeline = build_pipeline(
+        run_id=args.run_id,
+        resume=not args.no_resume,
+        reports=not args.no_reports,
+        report_format=args.format,
+    )
+    # Without --profile, HELPER_PROFILE still applies
+    profile_context = (
+        profiling(deep=args.profile == "deep")
+        if args.profile
+        else nullcontext()
+    )
+    with profile_context:
+        state = pipeline.run()
+
+    for name, entry in state.items():
+        log.info(f"{name}: {entry}")
+
+    sys.exit(0 if pipeline.succeeded else 1)